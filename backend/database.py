@@ -1,4 +1,6 @@
 from sqlalchemy import create_engine
+from sqlalchemy.engine import make_url
+from sqlalchemy.ext.asyncio import async_sessionmaker, create_async_engine
 from sqlalchemy.ext.declarative import declarative_base
 from sqlalchemy.orm import sessionmaker
 import os
@@ -27,6 +29,38 @@ else:
 
 SessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
 
+
+def _async_database_url(url: str):
+    """Same database through an asyncio driver: aiosqlite for SQLite, asyncpg for PostgreSQL"""
+    parsed = make_url(url)
+    connect_args = {}
+    if parsed.get_backend_name() == "sqlite":
+        return parsed.set(drivername="sqlite+aiosqlite"), connect_args
+    # asyncpg takes ssl=... instead of libpq's sslmode=...
+    sslmode = parsed.query.get("sslmode")
+    if sslmode:
+        parsed = parsed.difference_update_query(["sslmode"])
+        if sslmode != "disable":
+            connect_args["ssl"] = sslmode
+    return parsed.set(drivername="postgresql+asyncpg"), connect_args
+
+
+# Async engine for async route handlers - queries don't block the event loop
+ASYNC_DATABASE_URL, _async_connect_args = _async_database_url(DATABASE_URL)
+if DATABASE_URL.startswith("sqlite"):
+    async_engine = create_async_engine(ASYNC_DATABASE_URL)
+else:
+    async_engine = create_async_engine(
+        ASYNC_DATABASE_URL,
+        connect_args=_async_connect_args,
+        pool_pre_ping=True,
+        pool_size=5,
+        max_overflow=10
+    )
+
+# expire_on_commit=False: attributes can't be lazily reloaded after a commit in async code
+AsyncSessionLocal = async_sessionmaker(async_engine, autoflush=False, expire_on_commit=False)
+
 Base = declarative_base()
 
 
@@ -39,9 +73,18 @@ def get_db():
         db.close()
 
 
+async def get_async_db():
+    """Dependency to get an async database session (for async def handlers)"""
+    async with AsyncSessionLocal() as db:
+        yield db
+
+
 def init_db():
     """Initialize database tables"""
-    from models import User, Employee, Meeting, ActionItem, Topic, Task, CalendarMeeting, MeetingPrepNote, QuickNote
+    from models import (
+        User, Employee, Meeting, ActionItem, Topic, Task, CalendarMeeting, MeetingPrepNote, QuickNote,
+        ExtractionCacheEntry, AnalysisCacheEntry, Job, BackfillRun, LocalModel, TaskLshBand
+    )
     Base.metadata.create_all(bind=engine)
     
     # Run migrations for existing columns
@@ -67,3 +110,39 @@ def run_migrations():
                     print("Added password_hash column to users table")
                 except Exception as e:
                     print(f"Migration note: {e}")
+    
+    # AI analysis columns added after the meetings table was created
+    if 'meetings' in inspector.get_table_names():
+        columns = [col['name'] for col in inspector.get_columns('meetings')]
+        if 'ai_suggested_tasks' not in columns:
+            with engine.connect() as conn:
+                try:
+                    conn.execute(text("ALTER TABLE meetings ADD COLUMN ai_suggested_tasks TEXT"))
+                    conn.commit()
+                    print("Added ai_suggested_tasks column to meetings table")
+                except Exception as e:
+                    print(f"Migration note: {e}")
+        if 'ai_analysis_version' not in columns:
+            with engine.connect() as conn:
+                try:
+                    conn.execute(text("ALTER TABLE meetings ADD COLUMN ai_analysis_version VARCHAR(20)"))
+                    conn.commit()
+                    print("Added ai_analysis_version column to meetings table")
+                except Exception as e:
+                    print(f"Migration note: {e}")
+    
+    # Prep-note order keys became fractional (float) - widen the column on PostgreSQL.
+    # SQLite stores REAL values in an INTEGER-affinity column as-is.
+    if 'meeting_prep_notes' in inspector.get_table_names() and not DATABASE_URL.startswith("sqlite"):
+        order_col = next(
+            (col for col in inspector.get_columns('meeting_prep_notes') if col['name'] == 'order_index'),
+            None
+        )
+        if order_col is not None and 'INT' in str(order_col['type']).upper():
+            with engine.connect() as conn:
+                try:
+                    conn.execute(text("ALTER TABLE meeting_prep_notes ALTER COLUMN order_index TYPE DOUBLE PRECISION"))
+                    conn.commit()
+                    print("Changed meeting_prep_notes.order_index to DOUBLE PRECISION")
+                except Exception as e:
+                    print(f"Migration note: {e}")
@@ -1,34 +1,91 @@
-from fastapi import FastAPI, Request, Response
-from fastapi.middleware.cors import CORSMiddleware
-from starlette.middleware.base import BaseHTTPMiddleware
+from fastapi import FastAPI
+from fastapi.responses import PlainTextResponse
 from contextlib import asynccontextmanager
+import os
 
-from database import init_db
-from routers import employees, meetings, analytics, tasks, calendar_meetings, quick_notes, users
+from database import init_db, async_engine
+from services.hedging import provider_latency
+from services.provider_router import provider_router
+from services.http_client import ai_http_clients
+from services.rate_limiter import rate_limiter
+from services.job_queue import job_queue
+from services.loop_monitor import loop_monitor
+from routers import employees, meetings, analytics, tasks, calendar_meetings, quick_notes, users, jobs, search
 
 
-class CORSHeadersMiddleware(BaseHTTPMiddleware):
-    """Add CORS headers to all responses"""
-    async def dispatch(self, request: Request, call_next):
-        # Handle preflight OPTIONS requests
-        if request.method == "OPTIONS":
-            response = Response(status_code=200)
+CORS_ALLOWED_ORIGINS = [o.strip() for o in os.getenv("CORS_ALLOWED_ORIGINS", "*").split(",") if o.strip()]
+CORS_MAX_AGE = os.getenv("CORS_MAX_AGE", "3600")
+
+
+class CORSHeadersMiddleware:
+    """
+    Add CORS headers to all responses (pure ASGI: headers are added to the
+    http.response.start message, streaming bodies pass through untouched).
+    OPTIONS requests are answered here with precomputed preflight headers.
+    CORS_ALLOWED_ORIGINS is "*" or a comma-separated list of origins.
+    """
+    CORS_HEADER_NAMES = {
+        b"access-control-allow-origin", b"access-control-allow-methods",
+        b"access-control-allow-headers", b"access-control-max-age"
+    }
+
+    def __init__(self, app, allowed_origins: list = CORS_ALLOWED_ORIGINS, max_age: str = CORS_MAX_AGE):
+        self.app = app
+        self.any_origin = "*" in allowed_origins
+        self.allowed_origins = {origin.encode() for origin in allowed_origins}
+        self.common_headers = [
+            (b"access-control-allow-methods", b"GET, POST, PUT, DELETE, OPTIONS, PATCH"),
+            (b"access-control-allow-headers", b"*"),
+            (b"access-control-max-age", max_age.encode()),
+        ]
+        if self.any_origin:
+            self.common_headers.insert(0, (b"access-control-allow-origin", b"*"))
         else:
-            response = await call_next(request)
-        
-        # Add CORS headers to all responses
-        response.headers["Access-Control-Allow-Origin"] = "*"
-        response.headers["Access-Control-Allow-Methods"] = "GET, POST, PUT, DELETE, OPTIONS, PATCH"
-        response.headers["Access-Control-Allow-Headers"] = "*"
-        response.headers["Access-Control-Max-Age"] = "3600"
-        return response
+            self.common_headers.append((b"vary", b"Origin"))
+        self.preflight_headers = self.common_headers + [(b"content-length", b"0")]
+
+    def _headers_for(self, scope) -> list:
+        if self.any_origin:
+            return self.common_headers
+        origin = next((value for name, value in scope["headers"] if name == b"origin"), None)
+        if origin in self.allowed_origins:
+            return [(b"access-control-allow-origin", origin)] + self.common_headers
+        return self.common_headers
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        cors_headers = self._headers_for(scope)
+
+        # Handle preflight OPTIONS requests
+        if scope["method"] == "OPTIONS":
+            headers = self.preflight_headers if self.any_origin else cors_headers + [(b"content-length", b"0")]
+            await send({"type": "http.response.start", "status": 200, "headers": headers})
+            await send({"type": "http.response.body", "body": b""})
+            return
+
+        async def send_with_cors(message):
+            if message["type"] == "http.response.start":
+                headers = [h for h in message.get("headers", []) if h[0].lower() not in self.CORS_HEADER_NAMES]
+                message["headers"] = headers + cors_headers
+            await send(message)
+
+        await self.app(scope, receive, send_with_cors)
 
 
 @asynccontextmanager
 async def lifespan(app: FastAPI):
-    """Initialize database on startup"""
+    """Initialize database, background jobs and the event-loop monitor on startup, stop them and close pooled AI HTTP clients and DB connections on shutdown"""
     init_db()
+    await job_queue.start()
+    loop_monitor.start()
     yield
+    await loop_monitor.stop()
+    await job_queue.stop()
+    await ai_http_clients.aclose()
+    await async_engine.dispose()
 
 
 app = FastAPI(
@@ -49,6 +106,8 @@ app.include_router(analytics.router, prefix="/api/analytics", tags=["Analytics"]
 app.include_router(tasks.router, prefix="/api/tasks", tags=["Tasks"])
 app.include_router(calendar_meetings.router, prefix="/api/calendar", tags=["Calendar Meetings"])
 app.include_router(quick_notes.router, prefix="/api/notes", tags=["Quick Notes"])
+app.include_router(jobs.router, prefix="/api/jobs", tags=["Jobs"])
+app.include_router(search.router, prefix="/api/search", tags=["Search"])
 
 
 @app.get("/")
@@ -65,3 +124,26 @@ async def health_check():
     return {"status": "healthy"}
 
 
+@app.get("/health/providers")
+async def provider_health():
+    """Per-provider latency, error, circuit-breaker and rate-limit state for AI calls"""
+    return {
+        "latency": provider_latency.snapshot(),
+        "routing": provider_router.snapshot(),
+        "limits": rate_limiter.snapshot(),
+        "jobs": {"queue_depth": job_queue.queue_depth()}
+    }
+
+
+@app.get("/metrics", response_class=PlainTextResponse)
+async def metrics():
+    """Event-loop lag and blocking metrics in Prometheus text format"""
+    return loop_monitor.metrics()
+
+
+@app.get("/debug/event-loop")
+async def event_loop_debug():
+    """Event-loop lag and the recent calls that blocked it, with stack and route"""
+    return {**loop_monitor.snapshot(), "reports": loop_monitor.reports()}
+
+
@@ -1,4 +1,4 @@
-from sqlalchemy import Column, Integer, String, Text, DateTime, ForeignKey, Boolean, Float, Enum
+from sqlalchemy import Column, Integer, String, Text, DateTime, ForeignKey, Boolean, Float, Enum, LargeBinary, BigInteger
 from sqlalchemy.orm import relationship
 from datetime import datetime
 import enum
@@ -103,6 +103,8 @@ class Meeting(Base):
     ai_insights = Column(Text)
     ai_topics = Column(Text)  # JSON string of extracted topics
     ai_sentiment = Column(String(50))  # positive, neutral, negative
+    ai_suggested_tasks = Column(Text)  # JSON list of tasks suggested by the combined analysis
+    ai_analysis_version = Column(String(20))  # prompt version of the stored AI analysis (null = rules / never)
     
     created_at = Column(DateTime, default=datetime.utcnow)
     updated_at = Column(DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
@@ -168,7 +170,12 @@ class CalendarMeeting(Base):
 
     # Relationships
     user = relationship("User", back_populates="calendar_meetings")
-    prep_notes = relationship("MeetingPrepNote", back_populates="calendar_meeting", cascade="all, delete-orphan")
+    prep_notes = relationship(
+        "MeetingPrepNote",
+        back_populates="calendar_meeting",
+        cascade="all, delete-orphan",
+        order_by="MeetingPrepNote.order_index"
+    )
 
 
 class MeetingPrepNote(Base):
@@ -179,7 +186,7 @@ class MeetingPrepNote(Base):
     calendar_meeting_id = Column(Integer, ForeignKey("calendar_meetings.id"), nullable=False)
     content = Column(Text, nullable=False)
     is_completed = Column(Boolean, default=False)
-    order_index = Column(Integer, default=0)
+    order_index = Column(Float, default=0)  # מפתח סדר שברי - הזזה מעדכנת שורה אחת בלבד
     
     created_at = Column(DateTime, default=datetime.utcnow)
     updated_at = Column(DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
@@ -251,3 +258,96 @@ class QuickNote(Base):
     person = relationship("Employee")
 
 
+class ExtractionCacheEntry(Base):
+    """מטמון תוצאות חילוץ מצילומי מסך - לפי hash של התמונה, ההקשר והמודל"""
+    __tablename__ = "extraction_cache"
+
+    id = Column(Integer, primary_key=True, index=True)
+    cache_key = Column(String(64), unique=True, nullable=False, index=True)  # sha256 hex
+    kind = Column(String(20), nullable=False)  # calendar, tasks
+    result = Column(Text, nullable=False)  # JSON of the parsed response
+    hit_count = Column(Integer, default=0)
+
+    created_at = Column(DateTime, default=datetime.utcnow)
+    last_used_at = Column(DateTime, default=datetime.utcnow, index=True)
+
+
+class AnalysisCacheEntry(Base):
+    """מטמון ניתוח AI של סיכומי פגישות - לפי hash של הטקסט המנורמל, גרסת הפרומפט והמודל"""
+    __tablename__ = "analysis_cache"
+
+    id = Column(Integer, primary_key=True, index=True)
+    cache_key = Column(String(64), unique=True, nullable=False, index=True)  # sha256 hex
+    kind = Column(String(20), nullable=False, index=True)  # analysis, tasks
+    prompt_version = Column(String(20), nullable=False)
+    model = Column(String(100), nullable=False)  # provider:model that produced the result
+    result = Column(Text, nullable=False)  # JSON of the parsed response
+    hit_count = Column(Integer, default=0)
+
+    created_at = Column(DateTime, default=datetime.utcnow)
+    last_used_at = Column(DateTime, default=datetime.utcnow, index=True)
+
+
+class Job(Base):
+    """משימת רקע לפעולות AI ארוכות - נשמרת ב-DB כדי לשרוד הפעלה מחדש של השרת"""
+    __tablename__ = "jobs"
+
+    id = Column(String(32), primary_key=True)  # uuid4 hex
+    kind = Column(String(50), nullable=False)  # analyze_meeting, extract_meeting_tasks, ...
+    status = Column(String(20), default="queued", index=True)  # queued, running, succeeded, failed
+    payload = Column(Text, nullable=False)  # JSON arguments for the handler
+    result = Column(Text, nullable=True)  # JSON result once succeeded
+    error = Column(Text, nullable=True)
+    attempts = Column(Integer, default=0)
+
+    created_at = Column(DateTime, default=datetime.utcnow, index=True)
+    started_at = Column(DateTime, nullable=True)
+    finished_at = Column(DateTime, nullable=True)
+
+
+class BackfillRun(Base):
+    """הרצת ניתוח AI מחדש לפגישות היסטוריות - שומרת נקודת התקדמות כדי להמשיך אחרי קריסה"""
+    __tablename__ = "backfill_runs"
+
+    id = Column(Integer, primary_key=True, index=True)
+    mode = Column(String(20), default="online")  # online (direct calls), batch (provider batch API)
+    only_stale = Column(Boolean, default=True)  # Skip meetings already analyzed with the current prompt
+    status = Column(String(20), default="queued")  # queued, running, completed, failed
+
+    # Checkpoint: every meeting with id <= last_meeting_id has been handled
+    last_meeting_id = Column(Integer, default=0)
+    processed = Column(Integer, default=0)
+    failed = Column(Integer, default=0)
+    total = Column(Integer, default=0)
+
+    # Batch mode: provider batch submitted for meetings up to batch_last_meeting_id
+    provider_batch_id = Column(String(100), nullable=True)
+    batch_last_meeting_id = Column(Integer, nullable=True)
+
+    error = Column(Text, nullable=True)
+    created_at = Column(DateTime, default=datetime.utcnow)
+    updated_at = Column(DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
+    finished_at = Column(DateTime, nullable=True)
+
+
+class LocalModel(Base):
+    """מודל סיווג מקומי (נושאים וסנטימנט) שאומן על פגישות שנותחו ב-AI - נשמר ב-DB כדי שכל השרתים יטענו אותו"""
+    __tablename__ = "local_models"
+
+    id = Column(Integer, primary_key=True, index=True)
+    name = Column(String(50), nullable=False, index=True)  # topics_sentiment
+    data = Column(LargeBinary, nullable=False)  # Compressed NumPy archive of weights and labels
+    samples = Column(Integer, default=0)  # Labeled meetings used for training
+    metrics = Column(Text, nullable=True)  # JSON of the held-out evaluation
+
+    created_at = Column(DateTime, default=datetime.utcnow, index=True)
+
+
+class TaskLshBand(Base):
+    """מפתחות LSH של חתימות MinHash למשימות פתוחות - לזיהוי משימות כפולות בלי להשוות מול כל המשימות"""
+    __tablename__ = "task_lsh_bands"
+
+    id = Column(Integer, primary_key=True, index=True)
+    # No foreign key: rows of deleted or closed tasks are filtered out by the lookup join
+    task_id = Column(Integer, nullable=False, index=True)
+    band_key = Column(BigInteger, nullable=False, index=True)  # (band << 32) | crc32 of the band's rows
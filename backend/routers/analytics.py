@@ -5,14 +5,23 @@ from typing import Optional
 from datetime import datetime, timedelta
 from collections import defaultdict
 import json
+import asyncio
 
-from database import get_db
-from models import Meeting, Employee, ActionItem, Topic
+from database import get_db, SessionLocal
+from models import Meeting, Employee, ActionItem, Topic, BackfillRun, LocalModel
 from schemas import (
     EmployeeAnalytics, OverallAnalytics, TopicFrequency,
-    AIAnalysisRequest, AIAnalysisResponse
+    AIAnalysisRequest, AIAnalysisResponse, JobResponse,
+    BackfillRequest, BackfillRunResponse, LocalModelResponse
+)
+from services.ai_analyzer import AIAnalyzer, ANALYSIS_PROMPT_VERSION
+from services.http_client import AIHttpClients, get_ai_http
+from services.job_queue import job_queue, job_to_dict
+from services.ai_stream import StreamSink, sse_response
+from services.backfill import create_run, run_backfill
+from services.local_classifier import (
+    local_classifier, train_from_db, LOCAL_CLASSIFIER, LOCAL_CLASSIFIER_MIN_SAMPLES, MODEL_NAME
 )
-from services.ai_analyzer import AIAnalyzer
 
 router = APIRouter()
 
@@ -193,25 +202,183 @@ def get_pending_action_items(
 
 
 @router.post("/analyze", response_model=AIAnalysisResponse)
-async def analyze_meeting(request: AIAnalysisRequest, db: Session = Depends(get_db)):
+async def analyze_meeting(
+    request: AIAnalysisRequest,
+    db: Session = Depends(get_db),
+    http: AIHttpClients = Depends(get_ai_http)
+):
     """Analyze meeting notes using AI"""
+    return await _analyze_meeting(request, db, http)
+
+
+@router.post("/analyze/stream")
+def stream_analyze_meeting(
+    request: AIAnalysisRequest,
+    db: Session = Depends(get_db),
+    http: AIHttpClients = Depends(get_ai_http)
+):
+    """
+    Analyze meeting notes as server-sent events: insights / topic /
+    sentiment / action_item events while the answer streams in, then a
+    "result" event with the full AIAnalysisResponse
+    """
+    if not db.query(Meeting.id).filter(Meeting.id == request.meeting_id).first():
+        raise HTTPException(status_code=404, detail="Meeting not found")
+    
+    sink = StreamSink({
+        "insights": "insights",
+        "topics": "topic",
+        "sentiment": "sentiment",
+        "action_items_suggested": "action_item"
+    })
+    
+    async def work():
+        with SessionLocal() as db:
+            return await _analyze_meeting(request, db, http, sink)
+    
+    return sse_response(sink, work())
+
+
+@router.post("/analyze/jobs", response_model=JobResponse, status_code=202)
+def enqueue_analyze_meeting(
+    request: AIAnalysisRequest,
+    db: Session = Depends(get_db)
+):
+    """Queue an AI analysis in the background; poll /api/jobs/{id} for the result"""
+    if not db.query(Meeting.id).filter(Meeting.id == request.meeting_id).first():
+        raise HTTPException(status_code=404, detail="Meeting not found")
+    
+    job = job_queue.enqueue(db, "analyze_meeting", request.model_dump())
+    return job_to_dict(job)
+
+
+async def _run_analyze_job(payload: dict) -> dict:
+    with SessionLocal() as db:
+        analysis = await _analyze_meeting(AIAnalysisRequest(**payload), db, get_ai_http())
+    return analysis.model_dump(mode="json")
+
+
+job_queue.register("analyze_meeting", _run_analyze_job)
+
+
+async def _analyze_meeting(
+    request: AIAnalysisRequest, db: Session, http: AIHttpClients, sink: Optional[StreamSink] = None
+) -> AIAnalysisResponse:
     meeting = db.query(Meeting).filter(Meeting.id == request.meeting_id).first()
     if not meeting:
         raise HTTPException(status_code=404, detail="Meeting not found")
+    db.commit()  # End the read so the connection isn't held during the provider call
     
-    analyzer = AIAnalyzer()
-    analysis = await analyzer.analyze_notes(request.notes)
+    analyzer = AIAnalyzer(http, db)
+    analysis = await analyzer.analyze_notes_incremental(
+        request.notes, sink=sink, require_insights=request.require_insights
+    )
     
     # Update meeting with AI analysis
     meeting.ai_insights = analysis.insights
     meeting.ai_topics = json.dumps(analysis.topics)
     meeting.ai_sentiment = analysis.sentiment
+    meeting.ai_analysis_version = ANALYSIS_PROMPT_VERSION if analyzer.from_provider else None
     
     db.commit()
     
     return analysis
 
 
+@router.post("/backfill", response_model=BackfillRunResponse, status_code=202)
+def start_analysis_backfill(
+    request: BackfillRequest,
+    db: Session = Depends(get_db)
+):
+    """
+    Re-analyze historical meetings in the background (e.g. after a prompt or
+    model change). Progress is checkpointed; poll /backfill/{run_id}.
+    """
+    try:
+        run = create_run(db, mode=request.mode, only_stale=request.only_stale)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    
+    job = job_queue.enqueue(db, "analysis_backfill", {"run_id": run.id})
+    response = BackfillRunResponse.model_validate(run)
+    response.job_id = job.id
+    return response
+
+
+@router.get("/backfill/{run_id}", response_model=BackfillRunResponse)
+def get_analysis_backfill(run_id: int, db: Session = Depends(get_db)):
+    """Progress of a backfill run"""
+    run = db.query(BackfillRun).filter(BackfillRun.id == run_id).first()
+    if not run:
+        raise HTTPException(status_code=404, detail="Backfill run not found")
+    return run
+
+
+@router.post("/backfill/{run_id}/resume", response_model=BackfillRunResponse, status_code=202)
+def resume_analysis_backfill(run_id: int, db: Session = Depends(get_db)):
+    """Continue a failed backfill run from its last checkpoint"""
+    run = db.query(BackfillRun).filter(BackfillRun.id == run_id).first()
+    if not run:
+        raise HTTPException(status_code=404, detail="Backfill run not found")
+    if run.status != "failed":
+        raise HTTPException(status_code=400, detail=f"Backfill run is {run.status}")
+    
+    run.status = "queued"
+    run.error = None
+    job = job_queue.enqueue(db, "analysis_backfill", {"run_id": run.id})
+    response = BackfillRunResponse.model_validate(run)
+    response.job_id = job.id
+    return response
+
+
+async def _run_backfill_job(payload: dict) -> dict:
+    return await run_backfill(payload["run_id"], get_ai_http())
+
+
+job_queue.register("analysis_backfill", _run_backfill_job)
+
+
+@router.post("/local-model/train", response_model=JobResponse, status_code=202)
+def train_local_model(db: Session = Depends(get_db)):
+    """
+    Train the local topic/sentiment classifier on the meetings already
+    analyzed by an AI provider. Runs in the background; poll /api/jobs/{job_id}.
+    """
+    job = job_queue.enqueue(db, "train_local_classifier", {})
+    return job_to_dict(job)
+
+
+async def _run_train_local_job(payload: dict) -> dict:
+    def train() -> dict:
+        with SessionLocal() as db:
+            model = train_from_db(db)
+            return {"model_id": model.id, "samples": model.samples, "metrics": json.loads(model.metrics)}
+    return await asyncio.to_thread(train)
+
+
+job_queue.register("train_local_classifier", _run_train_local_job)
+
+
+@router.get("/local-model", response_model=LocalModelResponse)
+def get_local_model(db: Session = Depends(get_db)):
+    """The newest trained local classifier and its held-out metrics"""
+    model = db.query(LocalModel).filter(LocalModel.name == MODEL_NAME).order_by(LocalModel.id.desc()).first()
+    if not model:
+        raise HTTPException(
+            status_code=404,
+            detail=f"No local model trained yet (needs {LOCAL_CLASSIFIER_MIN_SAMPLES} AI-analyzed meetings)"
+        )
+    classifier = local_classifier.get(db)
+    return LocalModelResponse(
+        id=model.id,
+        samples=model.samples,
+        metrics=json.loads(model.metrics) if model.metrics else None,
+        created_at=model.created_at,
+        mode=LOCAL_CLASSIFIER,
+        loaded=classifier is not None and classifier.model_id == model.id
+    )
+
+
 @router.get("/topics/trends")
 def get_topic_trends(
     months: int = Query(6, ge=1, le=24),
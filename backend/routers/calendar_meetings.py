@@ -1,9 +1,10 @@
 """
 Calendar Meetings API - לניהול ישיבות יומיות והכנה אליהן
 """
-from fastapi import APIRouter, Depends, HTTPException, Query
-from sqlalchemy.orm import Session
-from sqlalchemy import and_
+from fastapi import APIRouter, Depends, HTTPException, Query, Request
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import Session, selectinload
+from sqlalchemy import and_, func, select
 from datetime import datetime, date, timedelta
 from typing import Optional, List
 from pydantic import BaseModel
@@ -13,14 +14,29 @@ import httpx
 import base64
 import re
 
-from database import get_db
+from database import get_db, get_async_db, AsyncSessionLocal
 from models import CalendarMeeting, MeetingPrepNote
+from services.extraction_cache import SCREENSHOT_PROMPT_VERSION, AsyncExtractionCache, decode_image
+from services.image_preprocessor import ImagePreprocessStats, prepare_image_async
+from services.screenshot_upload import read_screenshot_body
+from services.hedging import fallback_call, hedged_call, timed_call
+from services.provider_router import provider_router
+from services.http_client import AIHttpClients, ai_http_clients, ai_timeout, get_ai_http
+from services.job_queue import job_queue, job_to_dict
+from services.ai_stream import StreamSink, sse_response, stream_completion
+from services.calendar_ocr import SCREENSHOT_LOCAL_OCR, SCREENSHOT_OCR_MIN_CONFIDENCE, run_local_ocr_async
 from schemas import (
     CalendarMeetingCreate, CalendarMeetingUpdate, CalendarMeetingResponse,
     CalendarMeetingsListResponse, MeetingPrepNoteCreate, MeetingPrepNoteUpdate,
-    MeetingPrepNoteResponse
+    MeetingPrepNoteResponse, MeetingPrepNoteBatchRequest,
+    CalendarMeetingBulkUpsertRequest, CalendarMeetingBulkUpsertResponse, JobResponse
 )
 
+# Gap between consecutive prep-note order keys. Moving a note takes the midpoint
+# of its new neighbours, so only the moved row changes until the gap is exhausted.
+PREP_NOTE_ORDER_GAP = 1024.0
+PREP_NOTE_MIN_GAP = 1e-6
+
 
 class ScreenshotExtractRequest(BaseModel):
     image: str  # Base64 encoded image
@@ -38,15 +54,33 @@ class ExtractedMeeting(BaseModel):
 class ScreenshotExtractResponse(BaseModel):
     meetings: List[ExtractedMeeting]
     total: int
+    cached: bool = False
+    preprocessing: Optional[ImagePreprocessStats] = None
+    ocr_confidence: Optional[float] = None  # Set when the local OCR tier produced the answer
+
 
 router = APIRouter()
 
 
+def _meetings_query():
+    """CalendarMeetingResponse includes prep_notes, which can't be lazy-loaded in async code"""
+    return select(CalendarMeeting).options(selectinload(CalendarMeeting.prep_notes))
+
+
+async def _get_meeting(db: AsyncSession, meeting_id: int) -> CalendarMeeting:
+    meeting = (await db.execute(
+        _meetings_query().filter(CalendarMeeting.id == meeting_id)
+    )).scalar_one_or_none()
+    if not meeting:
+        raise HTTPException(status_code=404, detail="Meeting not found")
+    return meeting
+
+
 @router.get("/", response_model=CalendarMeetingsListResponse)
 async def get_calendar_meetings(
     target_date: Optional[str] = Query(None, description="Date in YYYY-MM-DD format"),
     user_id: Optional[int] = Query(None, description="Filter by user"),
-    db: Session = Depends(get_db)
+    db: AsyncSession = Depends(get_async_db)
 ):
     """קבלת ישיבות לתאריך מסוים (ברירת מחדל: היום)"""
     if target_date:
@@ -61,7 +95,7 @@ async def get_calendar_meetings(
     day_start = datetime.combine(selected_date, datetime.min.time())
     day_end = datetime.combine(selected_date, datetime.max.time())
     
-    query = db.query(CalendarMeeting).filter(
+    query = _meetings_query().filter(
         and_(
             CalendarMeeting.start_time >= day_start,
             CalendarMeeting.start_time <= day_end
@@ -72,7 +106,7 @@ async def get_calendar_meetings(
     if user_id:
         query = query.filter(CalendarMeeting.user_id == user_id)
     
-    meetings = query.order_by(CalendarMeeting.start_time).all()
+    meetings = (await db.execute(query.order_by(CalendarMeeting.start_time))).scalars().all()
     
     return CalendarMeetingsListResponse(
         meetings=[CalendarMeetingResponse.model_validate(m) for m in meetings],
@@ -84,7 +118,7 @@ async def get_calendar_meetings(
 @router.get("/week", response_model=List[CalendarMeetingResponse])
 async def get_week_meetings(
     start_date: Optional[str] = Query(None, description="Start date in YYYY-MM-DD format"),
-    db: Session = Depends(get_db)
+    db: AsyncSession = Depends(get_async_db)
 ):
     """קבלת ישיבות לשבוע (מתאריך התחלה או מהיום)"""
     if start_date:
@@ -100,22 +134,20 @@ async def get_week_meetings(
     day_start = datetime.combine(week_start, datetime.min.time())
     day_end = datetime.combine(week_end, datetime.max.time())
     
-    meetings = db.query(CalendarMeeting).filter(
+    meetings = (await db.execute(_meetings_query().filter(
         and_(
             CalendarMeeting.start_time >= day_start,
             CalendarMeeting.start_time <= day_end
         )
-    ).order_by(CalendarMeeting.start_time).all()
+    ).order_by(CalendarMeeting.start_time))).scalars().all()
     
     return [CalendarMeetingResponse.model_validate(m) for m in meetings]
 
 
 @router.get("/{meeting_id}", response_model=CalendarMeetingResponse)
-async def get_calendar_meeting(meeting_id: int, db: Session = Depends(get_db)):
+async def get_calendar_meeting(meeting_id: int, db: AsyncSession = Depends(get_async_db)):
     """קבלת פרטי ישיבה ספציפית"""
-    meeting = db.query(CalendarMeeting).filter(CalendarMeeting.id == meeting_id).first()
-    if not meeting:
-        raise HTTPException(status_code=404, detail="Meeting not found")
+    meeting = await _get_meeting(db, meeting_id)
     return CalendarMeetingResponse.model_validate(meeting)
 
 
@@ -123,7 +155,7 @@ async def get_calendar_meeting(meeting_id: int, db: Session = Depends(get_db)):
 async def create_calendar_meeting(
     meeting: CalendarMeetingCreate, 
     user_id: Optional[int] = Query(None, description="User ID"),
-    db: Session = Depends(get_db)
+    db: AsyncSession = Depends(get_async_db)
 ):
     """יצירת ישיבה חדשה (ידנית)"""
     db_meeting = CalendarMeeting(
@@ -139,50 +171,220 @@ async def create_calendar_meeting(
         is_recurring=meeting.is_recurring
     )
     db.add(db_meeting)
-    db.commit()
-    db.refresh(db_meeting)
+    await db.commit()
+    await db.refresh(db_meeting, ["prep_notes"])
     return CalendarMeetingResponse.model_validate(db_meeting)
 
 
+def _normalize_meeting_title(title: str) -> str:
+    """Title form used for dedup - case, punctuation and extra spaces ignored"""
+    return re.sub(r'[\W_]+', ' ', title).strip().casefold()
+
+
+def _meeting_dedup_keys(meeting) -> List[tuple]:
+    """Keys identifying the same calendar meeting across imports"""
+    keys = [("slot", meeting.start_time, _normalize_meeting_title(meeting.title))]
+    if meeting.external_id:
+        keys.append(("external", meeting.external_id))
+    return keys
+
+
+@router.post("/bulk", response_model=CalendarMeetingBulkUpsertResponse)
+async def bulk_upsert_calendar_meetings(
+    request: CalendarMeetingBulkUpsertRequest,
+    user_id: Optional[int] = Query(None, description="User ID"),
+    db: AsyncSession = Depends(get_async_db)
+):
+    """יצירה/עדכון מרוכזים של ישיבות (למשל מצילום מסך) - בלי כפילויות"""
+    if not request.meetings:
+        return CalendarMeetingBulkUpsertResponse(meetings=[], created=0, updated=0)
+    
+    # One range lookup covering every day in the batch
+    range_start = datetime.combine(min(m.start_time for m in request.meetings).date(), datetime.min.time())
+    range_end = datetime.combine(max(m.start_time for m in request.meetings).date(), datetime.max.time())
+    
+    existing = (await db.execute(select(CalendarMeeting).filter(
+        and_(
+            CalendarMeeting.user_id == user_id,
+            CalendarMeeting.start_time >= range_start,
+            CalendarMeeting.start_time <= range_end
+        )
+    ))).scalars().all()
+    
+    by_key = {}
+    for db_meeting in existing:
+        for key in _meeting_dedup_keys(db_meeting):
+            by_key.setdefault(key, db_meeting)
+    
+    touched = []
+    created = 0
+    updated = 0
+    for meeting in request.meetings:
+        keys = _meeting_dedup_keys(meeting)
+        db_meeting = next((by_key[k] for k in keys if k in by_key), None)
+        
+        if db_meeting is None:
+            db_meeting = CalendarMeeting(
+                user_id=user_id,
+                external_id=meeting.external_id,
+                title=meeting.title,
+                description=meeting.description,
+                start_time=meeting.start_time,
+                end_time=meeting.end_time,
+                location=meeting.location,
+                attendees=meeting.attendees,
+                calendar_source=meeting.calendar_source,
+                is_recurring=meeting.is_recurring
+            )
+            db.add(db_meeting)
+            created += 1
+        else:
+            if db_meeting in touched:
+                continue  # Duplicate inside the same batch
+            db_meeting.end_time = meeting.end_time
+            for field in ("external_id", "description", "location", "attendees"):
+                value = getattr(meeting, field)
+                if value is not None:
+                    setattr(db_meeting, field, value)
+            updated += 1
+        
+        touched.append(db_meeting)
+        for key in keys:
+            by_key.setdefault(key, db_meeting)
+    
+    await db.flush()
+    touched_ids = [m.id for m in touched]
+    await db.commit()
+    
+    meetings = (await db.execute(
+        _meetings_query().filter(
+            CalendarMeeting.id.in_(touched_ids)
+        ).order_by(CalendarMeeting.start_time).execution_options(populate_existing=True)
+    )).scalars().all()
+    
+    return CalendarMeetingBulkUpsertResponse(
+        meetings=[CalendarMeetingResponse.model_validate(m) for m in meetings],
+        created=created,
+        updated=updated
+    )
+
+
 @router.put("/{meeting_id}", response_model=CalendarMeetingResponse)
 async def update_calendar_meeting(
     meeting_id: int,
     meeting: CalendarMeetingUpdate,
-    db: Session = Depends(get_db)
+    db: AsyncSession = Depends(get_async_db)
 ):
     """עדכון פרטי ישיבה"""
-    db_meeting = db.query(CalendarMeeting).filter(CalendarMeeting.id == meeting_id).first()
-    if not db_meeting:
-        raise HTTPException(status_code=404, detail="Meeting not found")
+    db_meeting = await _get_meeting(db, meeting_id)
     
     update_data = meeting.model_dump(exclude_unset=True)
     for field, value in update_data.items():
         setattr(db_meeting, field, value)
     
-    db.commit()
-    db.refresh(db_meeting)
+    await db.commit()
     return CalendarMeetingResponse.model_validate(db_meeting)
 
 
 @router.delete("/{meeting_id}")
-async def delete_calendar_meeting(meeting_id: int, db: Session = Depends(get_db)):
+async def delete_calendar_meeting(meeting_id: int, db: AsyncSession = Depends(get_async_db)):
     """מחיקת ישיבה"""
-    db_meeting = db.query(CalendarMeeting).filter(CalendarMeeting.id == meeting_id).first()
-    if not db_meeting:
-        raise HTTPException(status_code=404, detail="Meeting not found")
+    db_meeting = await _get_meeting(db, meeting_id)  # prep_notes loaded for the delete cascade
     
-    db.delete(db_meeting)
-    db.commit()
+    await db.delete(db_meeting)
+    await db.commit()
     return {"message": "Meeting deleted successfully"}
 
 
 # ============== Screenshot Extraction ==============
 
 @router.post("/extract-from-screenshot", response_model=ScreenshotExtractResponse)
-async def extract_meetings_from_screenshot(request: ScreenshotExtractRequest):
+async def extract_meetings_from_screenshot(
+    request: ScreenshotExtractRequest,
+    db: AsyncSession = Depends(get_async_db),
+    http: AIHttpClients = Depends(get_ai_http)
+):
     """חילוץ ישיבות מצילום מסך של קאלנדר באמצעות AI"""
+    try:
+        image_bytes = decode_image(request.image)
+    except ValueError:
+        raise HTTPException(status_code=400, detail="Invalid image data")
+    
+    return await _extract_meetings_from_image(image_bytes, request.target_date, db, http)
+
+
+@router.post("/extract-from-screenshot/jobs", response_model=JobResponse, status_code=202)
+def enqueue_extract_meetings_from_screenshot(
+    request: ScreenshotExtractRequest,
+    db: Session = Depends(get_db)
+):
+    """הכנסת חילוץ ישיבות מצילום מסך לתור רקע - התוצאה ב-/api/jobs/{id}"""
+    try:
+        decode_image(request.image)
+    except ValueError:
+        raise HTTPException(status_code=400, detail="Invalid image data")
+    
+    job = job_queue.enqueue(db, "extract_calendar_screenshot", request.model_dump())
+    return job_to_dict(job)
+
+
+async def _run_screenshot_job(payload: dict) -> dict:
+    async with AsyncSessionLocal() as db:
+        result = await _extract_meetings_from_image(
+            decode_image(payload["image"]), payload["target_date"], db, get_ai_http()
+        )
+    return result.model_dump(mode="json")
+
+
+job_queue.register("extract_calendar_screenshot", _run_screenshot_job)
+
+
+@router.post("/extract-from-screenshot/stream")
+async def stream_extract_meetings_from_screenshot(
+    request: ScreenshotExtractRequest,
+    http: AIHttpClients = Depends(get_ai_http)
+):
+    """
+    חילוץ ישיבות מצילום מסך כ-Server-Sent Events:
+    אירוע meeting לכל ישיבה ברגע שהיא מפוענחת, ובסוף אירוע result עם התשובה המלאה
+    """
+    try:
+        image_bytes = decode_image(request.image)
+    except ValueError:
+        raise HTTPException(status_code=400, detail="Invalid image data")
+    
+    def validate_meeting(key: str, item):
+        try:
+            return ExtractedMeeting(**item).model_dump()
+        except (TypeError, ValueError):
+            return None
     
-    # Get API keys from environment
+    # Same de-duplication by start time as the final response
+    sink = StreamSink(
+        {"meetings": "meeting"}, transform=validate_meeting, dedupe_key=lambda meeting: meeting["start_time"]
+    )
+    
+    async def work():
+        async with AsyncSessionLocal() as db:
+            return await _extract_meetings_from_image(image_bytes, request.target_date, db, http, sink)
+    
+    return sse_response(sink, work())
+
+
+@router.post("/extract-from-screenshot/upload", response_model=ScreenshotExtractResponse)
+async def extract_meetings_from_screenshot_upload(
+    request: Request,
+    target_date: str = Query(..., description="Date in YYYY-MM-DD format"),
+    db: AsyncSession = Depends(get_async_db),
+    http: AIHttpClients = Depends(get_ai_http)
+):
+    """חילוץ ישיבות מצילום מסך שנשלח כקובץ בינארי (בלי base64)"""
+    image_bytes = await read_screenshot_body(request)
+    return await _extract_meetings_from_image(image_bytes, target_date, db, http)
+
+
+def _calendar_vision_providers(http: AIHttpClients, sink: Optional[StreamSink] = None) -> list:
+    """Configured vision providers in precedence order: (provider, model, extract function)"""
     gemini_api_key = os.getenv("GEMINI_API_KEY")
     anthropic_api_key = os.getenv("ANTHROPIC_API_KEY")
     openai_api_key = os.getenv("OPENAI_API_KEY")
@@ -190,7 +392,51 @@ async def extract_meetings_from_screenshot(request: ScreenshotExtractRequest):
     azure_openai_endpoint = os.getenv("AZURE_OPENAI_ENDPOINT")
     azure_openai_deployment = os.getenv("AZURE_OPENAI_DEPLOYMENT", "gpt-4o")
     
-    if not gemini_api_key and not anthropic_api_key and not openai_api_key and not azure_openai_key:
+    providers = []
+    if gemini_api_key:
+        providers.append(("gemini", "gemini-1.5-flash",
+                          lambda img, d, mime: extract_with_gemini(img, gemini_api_key, d, mime, http.get("gemini"), sink)))
+    if azure_openai_key and azure_openai_endpoint:
+        providers.append(("azure", azure_openai_deployment,
+                          lambda img, d, mime: extract_with_azure_openai(
+                              img, azure_openai_key, azure_openai_endpoint, azure_openai_deployment, d, mime, http.get("azure"), sink)))
+    if anthropic_api_key:
+        providers.append(("anthropic", "claude-3-5-sonnet-20241022",
+                          lambda img, d, mime: extract_with_claude(img, anthropic_api_key, d, mime, http.get("anthropic"), sink)))
+    if openai_api_key:
+        providers.append(("openai", "gpt-4o",
+                          lambda img, d, mime: extract_with_openai(img, openai_api_key, d, mime, http.get("openai"), sink)))
+    return providers
+
+
+async def _extract_meetings_from_image(
+    image_bytes: bytes, target_date: str, db: AsyncSession, http: AIHttpClients,
+    sink: Optional[StreamSink] = None
+) -> ScreenshotExtractResponse:
+    """
+    Shared extraction pipeline for the JSON, binary upload and streaming endpoints.
+    Order: vision cache, optional local OCR tier, vision provider.
+    With a sink the provider answer is streamed into it (and never hedged,
+    since two racing streams can't share one sink).
+    """
+    # Fastest healthy provider first (circuit-broken providers are skipped)
+    providers = provider_router.order(_calendar_vision_providers(http, sink), key=lambda p: f"{p[0]}:{p[1]}")
+    cache = AsyncExtractionCache(db, kind="calendar")
+    
+    if providers:
+        provider_model = f"{providers[0][0]}:{providers[0][1]}"
+        cache_key = cache.make_key(image_bytes, target_date, SCREENSHOT_PROMPT_VERSION, provider_model)
+        cached = await cache.get(cache_key)
+        if cached is not None:
+            print(f"[Screenshot Extract] Cache hit ({provider_model})")
+            return ScreenshotExtractResponse(**cached, cached=True)
+    
+    if SCREENSHOT_LOCAL_OCR in ("grid", "text"):
+        local = await _extract_meetings_locally(image_bytes, target_date, cache, http, force=not providers)
+        if local is not None:
+            return local
+    
+    if not providers:
         # Return sample data for testing if no API key
         return ScreenshotExtractResponse(
             meetings=[
@@ -209,50 +455,42 @@ async def extract_meetings_from_screenshot(request: ScreenshotExtractRequest):
             total=2
         )
     
-    # Extract base64 data from data URL if present
-    image_data = request.image
-    if image_data.startswith('data:'):
-        image_data = image_data.split(',')[1]
+    async def run_provider(provider: str, extract) -> tuple:
+        # Crop/downscale/re-encode for this provider (in a worker thread).
+        # The image is base64-encoded exactly once, here at the provider boundary.
+        prepared = await prepare_image_async(image_bytes, provider)
+        image_data = base64.b64encode(prepared.data if prepared else image_bytes).decode()
+        mime_type = prepared.mime_type if prepared else "image/png"
+        if prepared:
+            print(
+                f"[Screenshot Extract] {provider} image {prepared.stats.original_size} -> {prepared.stats.final_size}, "
+                f"{prepared.stats.original_bytes} -> {prepared.stats.final_bytes} bytes, "
+                f"~{prepared.stats.estimated_tokens_before} -> {prepared.stats.estimated_tokens_after} tokens"
+            )
+        print(f"[Screenshot Extract] Calling {provider} API...")
+        meetings = await extract(image_data, target_date, mime_type)
+        print(f"[Screenshot Extract] {provider} returned {len(meetings)} meetings")
+        return meetings, prepared
+    
+    attempts = [
+        (f"{provider}:{model}", lambda provider=provider, extract=extract: run_provider(provider, extract))
+        for provider, model, extract in providers
+    ]
     
     try:
-        print(f"[Screenshot Extract] Using API: {'Gemini' if gemini_api_key else 'Azure' if azure_openai_key else 'Anthropic' if anthropic_api_key else 'OpenAI'}")
-        
-        if gemini_api_key:
-            print(f"[Screenshot Extract] Calling Gemini API...")
-            meetings = await extract_with_gemini(image_data, gemini_api_key, request.target_date)
-            print(f"[Screenshot Extract] Gemini returned {len(meetings)} meetings")
-        elif azure_openai_key and azure_openai_endpoint:
-            meetings = await extract_with_azure_openai(
-                image_data, azure_openai_key, azure_openai_endpoint, 
-                azure_openai_deployment, request.target_date
-            )
-        elif anthropic_api_key:
-            print(f"[Screenshot Extract] Calling Claude API...")
-            meetings = await extract_with_claude(image_data, anthropic_api_key, request.target_date)
-            print(f"[Screenshot Extract] Claude returned {len(meetings)} meetings")
+        # Opt-in hedging: if the preferred provider is slow, race a second one
+        hedge_after = os.getenv("SCREENSHOT_HEDGE_AFTER_SECONDS")
+        if hedge_after and len(attempts) > 1 and sink is None:
+            winner, (meetings, prepared) = await hedged_call(attempts[:2], float(hedge_after))
         else:
-            meetings = await extract_with_openai(image_data, openai_api_key, request.target_date)
+            winner, (meetings, prepared) = await fallback_call(attempts)
         
-        # Remove duplicate meetings (same start time, or very similar title)
-        print(f"[Screenshot Extract] Raw meetings from AI: {len(meetings)}")
-        for m in meetings:
-            print(f"  - {m.start_time}-{m.end_time}: {m.title}")
-        
-        seen_times = set()
-        unique_meetings = []
-        for meeting in meetings:
-            # Use start_time as primary key (usually unique per meeting)
-            key = meeting.start_time
-            if key not in seen_times:
-                seen_times.add(key)
-                unique_meetings.append(meeting)
-        
-        print(f"[Screenshot Extract] After dedup: {len(unique_meetings)} (removed {len(meetings) - len(unique_meetings)})")
-        
-        return ScreenshotExtractResponse(
-            meetings=unique_meetings,
-            total=len(unique_meetings)
-        )
+        response = _meetings_response(meetings)
+        # Stored under the model that answered, which may be the hedge's backup
+        winner_key = cache.make_key(image_bytes, target_date, SCREENSHOT_PROMPT_VERSION, winner)
+        await cache.set(winner_key, response.model_dump(exclude={"cached", "preprocessing"}))
+        response.preprocessing = prepared.stats if prepared else None
+        return response
     except Exception as e:
         import traceback
         print(f"[Screenshot Extract] ERROR: {str(e)}")
@@ -260,7 +498,190 @@ async def extract_meetings_from_screenshot(request: ScreenshotExtractRequest):
         raise HTTPException(status_code=500, detail=f"Error extracting meetings: {str(e)}")
 
 
-async def extract_with_gemini(image_base64: str, api_key: str, target_date: str) -> List[ExtractedMeeting]:
+def _meetings_response(meetings: List[ExtractedMeeting]) -> ScreenshotExtractResponse:
+    """Remove duplicate meetings (same start time) and wrap them in a response"""
+    print(f"[Screenshot Extract] Raw meetings: {len(meetings)}")
+    for m in meetings:
+        print(f"  - {m.start_time}-{m.end_time}: {m.title}")
+    
+    seen_times = set()
+    unique_meetings = []
+    for meeting in meetings:
+        # Use start_time as primary key (usually unique per meeting)
+        key = meeting.start_time
+        if key not in seen_times:
+            seen_times.add(key)
+            unique_meetings.append(meeting)
+    
+    print(f"[Screenshot Extract] After dedup: {len(unique_meetings)} (removed {len(meetings) - len(unique_meetings)})")
+    return ScreenshotExtractResponse(meetings=unique_meetings, total=len(unique_meetings))
+
+
+async def _extract_meetings_locally(
+    image_bytes: bytes, target_date: str, cache: AsyncExtractionCache, http: AIHttpClients, force: bool = False
+) -> Optional[ScreenshotExtractResponse]:
+    """
+    Local OCR tier (SCREENSHOT_LOCAL_OCR=grid|text, see services/calendar_ocr.py).
+    A confident OCR grid is the answer as is. Otherwise, in text mode, only the
+    positioned OCR text goes to a text model, which costs far fewer tokens than
+    the image. Returns None to fall through to the vision providers (`force`
+    returns the OCR grid anyway, when there are no providers to fall back to);
+    so does a text answer that doesn't parse or finds no meetings. Empty
+    results are never cached.
+    """
+    tier_key = cache.make_key(image_bytes, target_date, SCREENSHOT_PROMPT_VERSION, f"local-ocr:{SCREENSHOT_LOCAL_OCR}")
+    cached = await cache.get(tier_key)
+    if cached is not None:
+        return ScreenshotExtractResponse(**cached, cached=True)
+    
+    ocr = await run_local_ocr_async(image_bytes)
+    if ocr is None:
+        return None
+    print(f"[Screenshot Extract] Local OCR: {len(ocr.meetings)} meetings, confidence {ocr.confidence:.2f}")
+    
+    response = None
+    if ocr.confidence >= SCREENSHOT_OCR_MIN_CONFIDENCE:
+        response = _meetings_response([ExtractedMeeting(**m) for m in ocr.meetings])
+    elif SCREENSHOT_LOCAL_OCR == "text" and ocr.layout_text:
+        prompt = _ocr_text_prompt(ocr.layout_text, target_date)
+        text_providers = provider_router.order(_calendar_text_providers(http), key=lambda p: f"{p[0]}:{p[1]}")
+        for provider, model, complete in text_providers:
+            async def ask(complete=complete) -> List[ExtractedMeeting]:
+                # An answer that doesn't parse counts as a failed call
+                return _parse_meetings_content(await complete(prompt))
+            try:
+                meetings = await timed_call(f"{provider}:{model}", ask)
+            except Exception as e:
+                print(f"[Screenshot Extract] {provider} OCR-text call failed: {e}")
+                continue
+            if meetings:
+                response = _meetings_response(meetings)
+            else:
+                print(f"[Screenshot Extract] {provider} found no meetings in the OCR text")
+            break
+    
+    if response is None:
+        if not force:
+            return None
+        response = _meetings_response([ExtractedMeeting(**m) for m in ocr.meetings])
+    elif response.meetings:
+        # An empty answer from OCR text is more likely a miss than an empty calendar, so it isn't cached
+        await cache.set(tier_key, response.model_dump(exclude={"cached", "preprocessing"}) | {"ocr_confidence": ocr.confidence})
+    response.ocr_confidence = ocr.confidence
+    return response
+
+
+def _ocr_text_prompt(layout_text: str, target_date: str) -> str:
+    return f"""The following is OCR output of a calendar screenshot. Each line is prefixed with its
+position in pixels ([x= y= w= h=]); a time axis usually runs down the left side.
+Reconstruct all UNIQUE meetings/events for {target_date}.
+
+OCR output:
+---
+{layout_text}
+---
+
+For each meeting provide: title, start_time (HH:MM, 24-hour), end_time (HH:MM, 24-hour),
+location (or null), attendees (or null).
+
+Return ONLY valid JSON, no markdown:
+{{"meetings": [{{"title": "Meeting Name", "start_time": "09:00", "end_time": "10:00", "location": null, "attendees": null}}]}}
+
+Empty calendar: {{"meetings": []}}
+"""
+
+
+def _parse_meetings_content(content: str) -> List[ExtractedMeeting]:
+    """
+    Meetings in a model answer. Raises ValueError when the answer holds no
+    valid meetings JSON, so the call counts as failed: a hedged race moves
+    on to the other provider and nothing is cached.
+    """
+    json_match = re.search(r'\{[\s\S]*\}', content)
+    if not json_match:
+        raise ValueError("No JSON in the model answer")
+    data = json.loads(json_match.group())
+    if not isinstance(data, dict) or not isinstance(data.get("meetings", []), list):
+        raise ValueError("Unexpected JSON shape in the model answer")
+    try:
+        return [ExtractedMeeting(**m) for m in data.get("meetings", [])]
+    except TypeError as e:
+        raise ValueError(f"Unexpected meeting in the model answer: {e}")
+
+
+def _calendar_text_providers(http: AIHttpClients) -> list:
+    """Configured providers for the text-only OCR prompt: (provider, model, complete(prompt) -> text)"""
+    gemini_api_key = os.getenv("GEMINI_API_KEY")
+    anthropic_api_key = os.getenv("ANTHROPIC_API_KEY")
+    openai_api_key = os.getenv("OPENAI_API_KEY")
+    azure_openai_key = os.getenv("AZURE_OPENAI_API_KEY")
+    azure_openai_endpoint = os.getenv("AZURE_OPENAI_ENDPOINT")
+    azure_openai_deployment = os.getenv("AZURE_OPENAI_DEPLOYMENT", "gpt-4o")
+    
+    async def gemini(prompt: str) -> str:
+        response = await http.get("gemini").post(
+            f"https://generativelanguage.googleapis.com/v1beta/models/gemini-1.5-flash:generateContent?key={gemini_api_key}",
+            json={"contents": [{"parts": [{"text": prompt}]}], "generationConfig": {"maxOutputTokens": 2000}},
+            timeout=ai_timeout(30.0)
+        )
+        if response.status_code != 200:
+            raise Exception(f"Gemini API error (status {response.status_code}): {response.text}")
+        return response.json()["candidates"][0]["content"]["parts"][0]["text"]
+    
+    async def azure(prompt: str) -> str:
+        response = await http.get("azure").post(
+            f"{azure_openai_endpoint.rstrip('/')}/openai/deployments/{azure_openai_deployment}/chat/completions?api-version=2024-08-01-preview",
+            headers={"api-key": azure_openai_key},
+            json={"max_tokens": 2000, "messages": [{"role": "user", "content": prompt}]},
+            timeout=ai_timeout(30.0)
+        )
+        if response.status_code != 200:
+            raise Exception(f"Azure OpenAI API error: {response.text}")
+        return response.json()["choices"][0]["message"]["content"]
+    
+    async def anthropic(prompt: str) -> str:
+        response = await http.get("anthropic").post(
+            "https://api.anthropic.com/v1/messages",
+            headers={"x-api-key": anthropic_api_key, "anthropic-version": "2023-06-01"},
+            json={
+                "model": "claude-3-5-sonnet-20241022",
+                "max_tokens": 2000,
+                "messages": [{"role": "user", "content": prompt}]
+            },
+            timeout=ai_timeout(30.0)
+        )
+        if response.status_code != 200:
+            raise Exception(f"Claude API error (status {response.status_code}): {response.text}")
+        return response.json()["content"][0]["text"]
+    
+    async def openai(prompt: str) -> str:
+        response = await http.get("openai").post(
+            "https://api.openai.com/v1/chat/completions",
+            headers={"Authorization": f"Bearer {openai_api_key}"},
+            json={"model": "gpt-4o", "max_tokens": 2000, "messages": [{"role": "user", "content": prompt}]},
+            timeout=ai_timeout(30.0)
+        )
+        if response.status_code != 200:
+            raise Exception(f"OpenAI API error: {response.text}")
+        return response.json()["choices"][0]["message"]["content"]
+    
+    providers = []
+    if gemini_api_key:
+        providers.append(("gemini", "gemini-1.5-flash", gemini))
+    if azure_openai_key and azure_openai_endpoint:
+        providers.append(("azure", azure_openai_deployment, azure))
+    if anthropic_api_key:
+        providers.append(("anthropic", "claude-3-5-sonnet-20241022", anthropic))
+    if openai_api_key:
+        providers.append(("openai", "gpt-4o", openai))
+    return providers
+
+
+async def extract_with_gemini(
+    image_base64: str, api_key: str, target_date: str, mime_type: str = "image/png",
+    client: Optional[httpx.AsyncClient] = None,
+    sink: Optional[StreamSink] = None
+) -> List[ExtractedMeeting]:
     """Extract meetings using Google Gemini Vision API"""
     
     prompt = f"""Analyze this calendar screenshot and extract all meetings/events.
@@ -285,47 +706,46 @@ If no meetings in image, return: {{"meetings": []}}
 
     api_url = f"https://generativelanguage.googleapis.com/v1beta/models/gemini-1.5-flash:generateContent?key={api_key}"
     
-    async with httpx.AsyncClient() as client:
-        response = await client.post(
-            api_url,
-            headers={"Content-Type": "application/json"},
-            json={
-                "contents": [{
-                    "parts": [
-                        {
-                            "inline_data": {
-                                "mime_type": "image/png",
-                                "data": image_base64
-                            }
-                        },
-                        {"text": prompt}
-                    ]
-                }],
-                "generationConfig": {
-                    "maxOutputTokens": 2000
-                }
-            },
-            timeout=60.0
-        )
-        
+    client = client or ai_http_clients.get("gemini")
+    headers = {"Content-Type": "application/json"}
+    body = {
+        "contents": [{
+            "parts": [
+                {
+                    "inline_data": {
+                        "mime_type": mime_type,
+                        "data": image_base64
+                    }
+                },
+                {"text": prompt}
+            ]
+        }],
+        "generationConfig": {
+            "maxOutputTokens": 2000
+        }
+    }
+    if sink is not None:
+        stream_url = api_url.replace(":generateContent?", ":streamGenerateContent?alt=sse&")
+        content = await stream_completion(client, "gemini", stream_url, headers, body, ai_timeout(60.0), sink)
+    else:
+        response = await client.post(api_url, headers=headers, json=body, timeout=ai_timeout(60.0))
+    
         print(f"[Gemini] Response status: {response.status_code}")
         if response.status_code != 200:
             print(f"[Gemini] Error response: {response.text}")
             raise Exception(f"Gemini API error (status {response.status_code}): {response.text}")
-        
+    
         result = response.json()
         content = result["candidates"][0]["content"]["parts"][0]["text"]
-        
-        # Parse JSON from response
-        json_match = re.search(r'\{[\s\S]*\}', content)
-        if json_match:
-            data = json.loads(json_match.group())
-            return [ExtractedMeeting(**m) for m in data.get("meetings", [])]
-        
-        return []
+    
+    return _parse_meetings_content(content)
 
 
-async def extract_with_claude(image_base64: str, api_key: str, target_date: str) -> List[ExtractedMeeting]:
+async def extract_with_claude(
+    image_base64: str, api_key: str, target_date: str, mime_type: str = "image/png",
+    client: Optional[httpx.AsyncClient] = None,
+    sink: Optional[StreamSink] = None
+) -> List[ExtractedMeeting]:
     """Extract meetings using Claude Vision API"""
     
     prompt = f"""אנא נתח את צילום המסך הזה של יומן/קאלנדר וחלץ את כל הישיבות/פגישות שאתה רואה.
@@ -348,58 +768,59 @@ async def extract_with_claude(image_base64: str, api_key: str, target_date: str)
 אם אין ישיבות בתמונה, החזר: {{"meetings": []}}
 """
 
-    async with httpx.AsyncClient() as client:
-        response = await client.post(
-            "https://api.anthropic.com/v1/messages",
-            headers={
-                "x-api-key": api_key,
-                "anthropic-version": "2023-06-01",
-                "content-type": "application/json"
-            },
-            json={
-                "model": "claude-3-5-sonnet-20241022",
-                "max_tokens": 2000,
-                "messages": [
+    client = client or ai_http_clients.get("anthropic")
+    api_url = "https://api.anthropic.com/v1/messages"
+    headers = {
+        "x-api-key": api_key,
+        "anthropic-version": "2023-06-01",
+        "content-type": "application/json"
+    }
+    body = {
+        "model": "claude-3-5-sonnet-20241022",
+        "max_tokens": 2000,
+        "messages": [
+            {
+                "role": "user",
+                "content": [
+                    {
+                        "type": "image",
+                        "source": {
+                            "type": "base64",
+                            "media_type": mime_type,
+                            "data": image_base64
+                        }
+                    },
                     {
-                        "role": "user",
-                        "content": [
-                            {
-                                "type": "image",
-                                "source": {
-                                    "type": "base64",
-                                    "media_type": "image/png",
-                                    "data": image_base64
-                                }
-                            },
-                            {
-                                "type": "text",
-                                "text": prompt
-                            }
-                        ]
+                        "type": "text",
+                        "text": prompt
                     }
                 ]
-            },
-            timeout=60.0
+            }
+        ]
+    }
+    if sink is not None:
+        content = await stream_completion(
+            client, "anthropic", api_url, headers, {**body, "stream": True}, ai_timeout(60.0), sink
         )
-        
+    else:
+        response = await client.post(api_url, headers=headers, json=body, timeout=ai_timeout(60.0))
+    
         print(f"[Claude] Response status: {response.status_code}")
         if response.status_code != 200:
             print(f"[Claude] Error response: {response.text}")
             raise Exception(f"Claude API error (status {response.status_code}): {response.text}")
-        
+    
         result = response.json()
         content = result["content"][0]["text"]
-        
-        # Parse JSON from response
-        json_match = re.search(r'\{[\s\S]*\}', content)
-        if json_match:
-            data = json.loads(json_match.group())
-            return [ExtractedMeeting(**m) for m in data.get("meetings", [])]
-        
-        return []
+    
+    return _parse_meetings_content(content)
 
 
-async def extract_with_openai(image_base64: str, api_key: str, target_date: str) -> List[ExtractedMeeting]:
+async def extract_with_openai(
+    image_base64: str, api_key: str, target_date: str, mime_type: str = "image/png",
+    client: Optional[httpx.AsyncClient] = None,
+    sink: Optional[StreamSink] = None
+) -> List[ExtractedMeeting]:
     """Extract meetings using OpenAI Vision API"""
     
     prompt = f"""Analyze this calendar screenshot and extract all meetings/events.
@@ -422,50 +843,47 @@ Return JSON only:
 If no meetings in image, return: {{"meetings": []}}
 """
 
-    async with httpx.AsyncClient() as client:
-        response = await client.post(
-            "https://api.openai.com/v1/chat/completions",
-            headers={
-                "Authorization": f"Bearer {api_key}",
-                "Content-Type": "application/json"
-            },
-            json={
-                "model": "gpt-4o",
-                "max_tokens": 2000,
-                "messages": [
+    client = client or ai_http_clients.get("openai")
+    api_url = "https://api.openai.com/v1/chat/completions"
+    headers = {
+        "Authorization": f"Bearer {api_key}",
+        "Content-Type": "application/json"
+    }
+    body = {
+        "model": "gpt-4o",
+        "max_tokens": 2000,
+        "messages": [
+            {
+                "role": "user",
+                "content": [
+                    {
+                        "type": "image_url",
+                        "image_url": {
+                            "url": f"data:{mime_type};base64,{image_base64}"
+                        }
+                    },
                     {
-                        "role": "user",
-                        "content": [
-                            {
-                                "type": "image_url",
-                                "image_url": {
-                                    "url": f"data:image/png;base64,{image_base64}"
-                                }
-                            },
-                            {
-                                "type": "text",
-                                "text": prompt
-                            }
-                        ]
+                        "type": "text",
+                        "text": prompt
                     }
                 ]
-            },
-            timeout=60.0
+            }
+        ]
+    }
+    if sink is not None:
+        content = await stream_completion(
+            client, "openai", api_url, headers, {**body, "stream": True}, ai_timeout(60.0), sink
         )
-        
+    else:
+        response = await client.post(api_url, headers=headers, json=body, timeout=ai_timeout(60.0))
+    
         if response.status_code != 200:
             raise Exception(f"OpenAI API error: {response.text}")
-        
+    
         result = response.json()
         content = result["choices"][0]["message"]["content"]
-        
-        # Parse JSON from response
-        json_match = re.search(r'\{[\s\S]*\}', content)
-        if json_match:
-            data = json.loads(json_match.group())
-            return [ExtractedMeeting(**m) for m in data.get("meetings", [])]
-        
-        return []
+    
+    return _parse_meetings_content(content)
 
 
 async def extract_with_azure_openai(
@@ -473,7 +891,10 @@ async def extract_with_azure_openai(
     api_key: str, 
     endpoint: str, 
     deployment: str, 
-    target_date: str
+    target_date: str,
+    mime_type: str = "image/png",
+    client: Optional[httpx.AsyncClient] = None,
+    sink: Optional[StreamSink] = None
 ) -> List[ExtractedMeeting]:
     """Extract meetings using Azure OpenAI Vision API"""
     
@@ -501,142 +922,230 @@ Empty calendar: {{"meetings": []}}
     print(f"[Azure] Calling URL: {api_url}")
     print(f"[Azure] Deployment: {deployment}")
     
-    async with httpx.AsyncClient() as client:
-        response = await client.post(
-            api_url,
-            headers={
-                "api-key": api_key,
-                "Content-Type": "application/json"
-            },
-            json={
-                "max_tokens": 2000,
-                "messages": [
+    client = client or ai_http_clients.get("azure")
+    headers = {
+        "api-key": api_key,
+        "Content-Type": "application/json"
+    }
+    body = {
+        "max_tokens": 2000,
+        "messages": [
+            {
+                "role": "user",
+                "content": [
                     {
-                        "role": "user",
-                        "content": [
-                            {
-                                "type": "image_url",
-                                "image_url": {
-                                    "url": f"data:image/png;base64,{image_base64}"
-                                }
-                            },
-                            {
-                                "type": "text",
-                                "text": prompt
-                            }
-                        ]
+                        "type": "image_url",
+                        "image_url": {
+                            "url": f"data:{mime_type};base64,{image_base64}"
+                        }
+                    },
+                    {
+                        "type": "text",
+                        "text": prompt
                     }
                 ]
-            },
-            timeout=60.0
+            }
+        ]
+    }
+    if sink is not None:
+        content = await stream_completion(
+            client, "azure", api_url, headers, {**body, "stream": True}, ai_timeout(60.0), sink
         )
-        
+    else:
+        response = await client.post(api_url, headers=headers, json=body, timeout=ai_timeout(60.0))
+    
         if response.status_code != 200:
             raise Exception(f"Azure OpenAI API error: {response.text}")
-        
+    
         result = response.json()
         content = result["choices"][0]["message"]["content"]
-        
-        # Parse JSON from response
-        json_match = re.search(r'\{[\s\S]*\}', content)
-        if json_match:
-            data = json.loads(json_match.group())
-            return [ExtractedMeeting(**m) for m in data.get("meetings", [])]
-        
-        return []
+    
+    return _parse_meetings_content(content)
 
 
 # ============== Prep Notes Endpoints ==============
 
+def _order_key_between(lower: Optional[float], upper: Optional[float]) -> Optional[float]:
+    """Order key that sorts between two neighbours (None = list edge).
+    Returns None when the neighbours are too close and the list needs rebalancing."""
+    if lower is None and upper is None:
+        return PREP_NOTE_ORDER_GAP
+    if lower is None:
+        return upper - PREP_NOTE_ORDER_GAP
+    if upper is None:
+        return lower + PREP_NOTE_ORDER_GAP
+    if upper - lower < PREP_NOTE_MIN_GAP:
+        return None
+    return (lower + upper) / 2
+
+
+def _rebalance_prep_notes(notes: List[MeetingPrepNote]) -> None:
+    """Re-spread order keys evenly (rare - only after many moves into the same gap)"""
+    for i, n in enumerate(notes):
+        n.order_index = (i + 1) * PREP_NOTE_ORDER_GAP
+
+
+def _move_prep_note(
+    notes: List[MeetingPrepNote],
+    note: MeetingPrepNote,
+    after: Optional[MeetingPrepNote],
+    before: Optional[MeetingPrepNote]
+) -> None:
+    """Place `note` between its new neighbours, touching only its own row.
+    Raises ValueError, before changing anything, when `after` does not come before `before`."""
+    others = [n for n in notes if n.id != note.id]
+    if after is not None and before is not None and others.index(after) >= others.index(before):
+        raise ValueError("after_id must come before before_id")
+    if after is not None and before is None:
+        idx = others.index(after)
+        before = others[idx + 1] if idx + 1 < len(others) else None
+    elif before is not None and after is None:
+        idx = others.index(before)
+        after = others[idx - 1] if idx > 0 else None
+    
+    key = _order_key_between(
+        after.order_index if after is not None else None,
+        before.order_index if before is not None else None
+    )
+    if key is None:
+        _rebalance_prep_notes(others)
+        key = _order_key_between(
+            after.order_index if after is not None else None,
+            before.order_index if before is not None else None
+        )
+    if key is None:
+        raise ValueError("No order key between the given neighbours")
+    note.order_index = key
+    notes.sort(key=lambda n: n.order_index or 0)
+
+
+async def _get_prep_note(db: AsyncSession, meeting_id: int, note_id: int) -> MeetingPrepNote:
+    db_note = (await db.execute(select(MeetingPrepNote).filter(
+        and_(
+            MeetingPrepNote.id == note_id,
+            MeetingPrepNote.calendar_meeting_id == meeting_id
+        )
+    ))).scalar_one_or_none()
+    if not db_note:
+        raise HTTPException(status_code=404, detail="Note not found")
+    return db_note
+
+
 @router.post("/{meeting_id}/notes", response_model=MeetingPrepNoteResponse)
 async def add_prep_note(
     meeting_id: int,
     note: MeetingPrepNoteCreate,
-    db: Session = Depends(get_db)
+    db: AsyncSession = Depends(get_async_db)
 ):
     """הוספת נקודה להכנה לישיבה"""
-    meeting = db.query(CalendarMeeting).filter(CalendarMeeting.id == meeting_id).first()
-    if not meeting:
-        raise HTTPException(status_code=404, detail="Meeting not found")
+    # Verify the meeting and read the current last order key in one query
+    row = (await db.execute(select(
+        CalendarMeeting.id,
+        func.max(MeetingPrepNote.order_index)
+    ).outerjoin(
+        MeetingPrepNote, MeetingPrepNote.calendar_meeting_id == CalendarMeeting.id
+    ).filter(CalendarMeeting.id == meeting_id).group_by(CalendarMeeting.id))).first()
     
-    # Get max order index
-    max_order = db.query(MeetingPrepNote).filter(
-        MeetingPrepNote.calendar_meeting_id == meeting_id
-    ).count()
+    if not row:
+        raise HTTPException(status_code=404, detail="Meeting not found")
     
     db_note = MeetingPrepNote(
         calendar_meeting_id=meeting_id,
         content=note.content,
         is_completed=note.is_completed,
-        order_index=max_order
+        order_index=_order_key_between(row[1], None)
     )
     db.add(db_note)
-    db.commit()
-    db.refresh(db_note)
+    await db.commit()
     return MeetingPrepNoteResponse.model_validate(db_note)
 
 
+@router.post("/{meeting_id}/notes/batch", response_model=List[MeetingPrepNoteResponse])
+async def batch_update_prep_notes(
+    meeting_id: int,
+    batch: MeetingPrepNoteBatchRequest,
+    db: AsyncSession = Depends(get_async_db)
+):
+    """עדכון מרוכז של נקודות הכנה (סדר/סימון/תוכן) בטרנזקציה אחת"""
+    notes = list((await db.execute(select(MeetingPrepNote).filter(
+        MeetingPrepNote.calendar_meeting_id == meeting_id
+    ).order_by(MeetingPrepNote.order_index, MeetingPrepNote.id))).scalars().all())
+    notes_by_id = {n.id: n for n in notes}
+    
+    if not notes:
+        meeting = await db.get(CalendarMeeting, meeting_id)
+        if not meeting:
+            raise HTTPException(status_code=404, detail="Meeting not found")
+    
+    for change in batch.changes:
+        referenced = [change.id, change.after_id, change.before_id]
+        if any(ref is not None and ref not in notes_by_id for ref in referenced):
+            raise HTTPException(status_code=404, detail="Note not found")
+        
+        db_note = notes_by_id[change.id]
+        if change.after_id is not None or change.before_id is not None:
+            if change.id in (change.after_id, change.before_id):
+                raise HTTPException(status_code=400, detail="A note cannot be placed next to itself")
+            if change.after_id is not None and change.after_id == change.before_id:
+                raise HTTPException(status_code=400, detail="after_id and before_id must be different notes")
+            try:
+                _move_prep_note(
+                    notes,
+                    db_note,
+                    notes_by_id.get(change.after_id),
+                    notes_by_id.get(change.before_id)
+                )
+            except ValueError as e:
+                raise HTTPException(status_code=400, detail=str(e))
+        
+        if change.content is not None:
+            db_note.content = change.content
+        if change.is_completed is not None:
+            db_note.is_completed = change.is_completed
+    
+    await db.commit()
+    
+    notes = list((await db.execute(select(MeetingPrepNote).filter(
+        MeetingPrepNote.calendar_meeting_id == meeting_id
+    ).order_by(MeetingPrepNote.order_index, MeetingPrepNote.id))).scalars().all())
+    return [MeetingPrepNoteResponse.model_validate(n) for n in notes]
+
+
 @router.put("/{meeting_id}/notes/{note_id}", response_model=MeetingPrepNoteResponse)
 async def update_prep_note(
     meeting_id: int,
     note_id: int,
     note: MeetingPrepNoteUpdate,
-    db: Session = Depends(get_db)
+    db: AsyncSession = Depends(get_async_db)
 ):
     """עדכון נקודת הכנה"""
-    db_note = db.query(MeetingPrepNote).filter(
-        and_(
-            MeetingPrepNote.id == note_id,
-            MeetingPrepNote.calendar_meeting_id == meeting_id
-        )
-    ).first()
-    
-    if not db_note:
-        raise HTTPException(status_code=404, detail="Note not found")
+    db_note = await _get_prep_note(db, meeting_id, note_id)
     
     update_data = note.model_dump(exclude_unset=True)
     for field, value in update_data.items():
         setattr(db_note, field, value)
     
-    db.commit()
-    db.refresh(db_note)
+    await db.commit()
     return MeetingPrepNoteResponse.model_validate(db_note)
 
 
 @router.delete("/{meeting_id}/notes/{note_id}")
-async def delete_prep_note(meeting_id: int, note_id: int, db: Session = Depends(get_db)):
+async def delete_prep_note(meeting_id: int, note_id: int, db: AsyncSession = Depends(get_async_db)):
     """מחיקת נקודת הכנה"""
-    db_note = db.query(MeetingPrepNote).filter(
-        and_(
-            MeetingPrepNote.id == note_id,
-            MeetingPrepNote.calendar_meeting_id == meeting_id
-        )
-    ).first()
-    
-    if not db_note:
-        raise HTTPException(status_code=404, detail="Note not found")
+    db_note = await _get_prep_note(db, meeting_id, note_id)
     
-    db.delete(db_note)
-    db.commit()
+    await db.delete(db_note)
+    await db.commit()
     return {"message": "Note deleted successfully"}
 
 
 @router.post("/{meeting_id}/notes/{note_id}/toggle", response_model=MeetingPrepNoteResponse)
-async def toggle_prep_note(meeting_id: int, note_id: int, db: Session = Depends(get_db)):
+async def toggle_prep_note(meeting_id: int, note_id: int, db: AsyncSession = Depends(get_async_db)):
     """החלפת סטטוס הושלם/לא הושלם של נקודה"""
-    db_note = db.query(MeetingPrepNote).filter(
-        and_(
-            MeetingPrepNote.id == note_id,
-            MeetingPrepNote.calendar_meeting_id == meeting_id
-        )
-    ).first()
-    
-    if not db_note:
-        raise HTTPException(status_code=404, detail="Note not found")
+    db_note = await _get_prep_note(db, meeting_id, note_id)
     
     db_note.is_completed = not db_note.is_completed
-    db.commit()
-    db.refresh(db_note)
+    await db.commit()
     return MeetingPrepNoteResponse.model_validate(db_note)
 
 
@@ -6,6 +6,7 @@ from typing import List, Optional
 from database import get_db
 from models import Employee, Meeting, Task
 from schemas import EmployeeCreate, EmployeeUpdate, EmployeeResponse
+from services.person_resolver import person_index
 
 router = APIRouter()
 
@@ -119,6 +120,7 @@ def create_employee(employee: EmployeeCreate, user_id: Optional[int] = None, db:
     db.add(db_employee)
     db.commit()
     db.refresh(db_employee)
+    person_index.invalidate(db_employee.user_id)
     
     return EmployeeResponse(
         id=db_employee.id,
@@ -151,6 +153,7 @@ def update_employee(employee_id: int, employee: EmployeeUpdate, db: Session = De
     
     db.commit()
     db.refresh(db_employee)
+    person_index.invalidate(db_employee.user_id)
     
     meeting_count = db.query(func.count(Meeting.id)).filter(Meeting.employee_id == db_employee.id).scalar()
     last_meeting = db.query(func.max(Meeting.date)).filter(Meeting.employee_id == db_employee.id).scalar()
@@ -185,12 +188,14 @@ def delete_employee(employee_id: int, hard_delete: bool = False, db: Session = D
     if not db_employee:
         raise HTTPException(status_code=404, detail="Employee not found")
     
+    user_id = db_employee.user_id
     if hard_delete:
         db.delete(db_employee)
     else:
         db_employee.is_active = False
     
     db.commit()
+    person_index.invalidate(user_id)
     return None
 
 
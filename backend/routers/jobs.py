@@ -0,0 +1,21 @@
+"""
+Jobs API - מעקב אחרי משימות רקע של AI
+"""
+from fastapi import APIRouter, Depends, HTTPException
+from sqlalchemy.orm import Session
+
+from database import get_db
+from models import Job
+from schemas import JobResponse
+from services.job_queue import job_to_dict
+
+router = APIRouter()
+
+
+@router.get("/{job_id}", response_model=JobResponse)
+def get_job(job_id: str, db: Session = Depends(get_db)):
+    """Status of a background job, with its result once it has succeeded"""
+    job = db.query(Job).filter(Job.id == job_id).first()
+    if not job:
+        raise HTTPException(status_code=404, detail="Job not found")
+    return job_to_dict(job)
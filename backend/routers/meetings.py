@@ -3,16 +3,21 @@ from sqlalchemy.orm import Session, joinedload
 from sqlalchemy import func, desc
 from typing import List, Optional
 from datetime import datetime
+import json
 
-from database import get_db
+from database import get_db, SessionLocal
 from models import Meeting, Employee, ActionItem, Topic
 from schemas import (
-    MeetingCreate, MeetingUpdate, MeetingResponse,
+    MeetingCreate, MeetingUpdate, MeetingResponse, TaskCreate,
     ActionItemCreate, ActionItemUpdate, ActionItemResponse,
     TopicCreate, TopicResponse,
-    ExtractTasksResponse
+    ExtractTasksResponse, MeetingAnalysisResponse, JobResponse
 )
-from services.ai_analyzer import AIAnalyzer
+from services.ai_analyzer import AIAnalyzer, ANALYSIS_PROMPT_VERSION
+from services.http_client import AIHttpClients, get_ai_http
+from services.job_queue import job_queue, job_to_dict
+from services.ai_stream import StreamSink, sse_response
+from services.semantic_search import index_meeting, remove_document
 
 router = APIRouter()
 
@@ -61,6 +66,7 @@ def get_meetings(
             "ai_insights": meeting.ai_insights,
             "ai_topics": meeting.ai_topics,
             "ai_sentiment": meeting.ai_sentiment,
+            "ai_suggested_tasks": meeting.ai_suggested_tasks,
             "created_at": meeting.created_at,
             "updated_at": meeting.updated_at,
             "action_items": meeting.action_items,
@@ -94,6 +100,7 @@ def get_meeting(meeting_id: int, db: Session = Depends(get_db)):
         ai_insights=meeting.ai_insights,
         ai_topics=meeting.ai_topics,
         ai_sentiment=meeting.ai_sentiment,
+        ai_suggested_tasks=meeting.ai_suggested_tasks,
         created_at=meeting.created_at,
         updated_at=meeting.updated_at,
         action_items=meeting.action_items,
@@ -128,6 +135,7 @@ def create_meeting(meeting: MeetingCreate, db: Session = Depends(get_db)):
     
     db.commit()
     db.refresh(db_meeting)
+    index_meeting(db_meeting)
     
     return MeetingResponse(
         id=db_meeting.id,
@@ -139,6 +147,7 @@ def create_meeting(meeting: MeetingCreate, db: Session = Depends(get_db)):
         ai_insights=db_meeting.ai_insights,
         ai_topics=db_meeting.ai_topics,
         ai_sentiment=db_meeting.ai_sentiment,
+        ai_suggested_tasks=db_meeting.ai_suggested_tasks,
         created_at=db_meeting.created_at,
         updated_at=db_meeting.updated_at,
         action_items=db_meeting.action_items,
@@ -165,6 +174,8 @@ def update_meeting(meeting_id: int, meeting: MeetingUpdate, db: Session = Depend
     
     db.commit()
     db.refresh(db_meeting)
+    if {"notes", "summary", "employee_id"} & update_data.keys():
+        index_meeting(db_meeting)
     
     return MeetingResponse(
         id=db_meeting.id,
@@ -176,6 +187,7 @@ def update_meeting(meeting_id: int, meeting: MeetingUpdate, db: Session = Depend
         ai_insights=db_meeting.ai_insights,
         ai_topics=db_meeting.ai_topics,
         ai_sentiment=db_meeting.ai_sentiment,
+        ai_suggested_tasks=db_meeting.ai_suggested_tasks,
         created_at=db_meeting.created_at,
         updated_at=db_meeting.updated_at,
         action_items=db_meeting.action_items,
@@ -191,8 +203,10 @@ def delete_meeting(meeting_id: int, db: Session = Depends(get_db)):
     if not db_meeting:
         raise HTTPException(status_code=404, detail="Meeting not found")
     
+    user_id = db_meeting.employee.user_id if db_meeting.employee else None
     db.delete(db_meeting)
     db.commit()
+    remove_document(user_id, "meeting", meeting_id)
     return None
 
 
@@ -278,9 +292,109 @@ def delete_topic(topic_id: int, db: Session = Depends(get_db)):
 
 # ============== Task Extraction ==============
 
+@router.post("/{meeting_id}/analyze", response_model=MeetingAnalysisResponse)
+async def analyze_meeting_full(
+    meeting_id: int,
+    db: Session = Depends(get_db),
+    http: AIHttpClients = Depends(get_ai_http)
+):
+    """
+    Analyze the meeting notes and extract tasks with a single AI call.
+    Saves insights, topics, sentiment and suggested tasks on the meeting.
+    """
+    meeting = db.query(Meeting).filter(Meeting.id == meeting_id).first()
+    if not meeting:
+        raise HTTPException(status_code=404, detail="Meeting not found")
+    
+    if not meeting.notes:
+        raise HTTPException(status_code=400, detail="Meeting has no notes to analyze")
+    
+    analyzer = AIAnalyzer(http, db)
+    result = await analyzer.analyze_meeting(
+        notes=meeting.notes,
+        person_id=meeting.employee_id,
+        meeting_id=meeting_id
+    )
+    
+    meeting.ai_insights = result.insights
+    meeting.ai_topics = json.dumps(result.topics)
+    meeting.ai_sentiment = result.sentiment
+    meeting.ai_analysis_version = ANALYSIS_PROMPT_VERSION if analyzer.from_provider else None
+    meeting.ai_suggested_tasks = json.dumps(
+        [task.model_dump(mode="json") for task in result.suggested_tasks], ensure_ascii=False
+    )
+    db.commit()
+    
+    return result
+
+
 @router.post("/{meeting_id}/extract-tasks", response_model=ExtractTasksResponse)
-async def extract_tasks_from_meeting(meeting_id: int, db: Session = Depends(get_db)):
+async def extract_tasks_from_meeting(
+    meeting_id: int,
+    db: Session = Depends(get_db),
+    http: AIHttpClients = Depends(get_ai_http)
+):
     """Extract tasks from meeting notes using AI"""
+    return await _extract_meeting_tasks(meeting_id, db, http)
+
+
+@router.post("/{meeting_id}/extract-tasks/stream")
+def stream_extract_tasks_from_meeting(
+    meeting_id: int,
+    db: Session = Depends(get_db),
+    http: AIHttpClients = Depends(get_ai_http)
+):
+    """Extract tasks as server-sent events: a "task" event per task as it streams in, then a "result" event"""
+    meeting = db.query(Meeting.id, Meeting.employee_id).filter(Meeting.id == meeting_id).first()
+    if not meeting:
+        raise HTTPException(status_code=404, detail="Meeting not found")
+    
+    def to_task(key: str, item):
+        if not isinstance(item, dict) or not item.get("title"):
+            return None
+        return TaskCreate(
+            title=item["title"],
+            description=item.get("description"),
+            task_type="from_meeting",
+            priority=item.get("priority", "medium"),
+            person_id=meeting.employee_id,
+            meeting_id=meeting_id
+        ).model_dump(mode="json")
+    
+    sink = StreamSink({"tasks": "task"}, transform=to_task)
+    
+    async def work():
+        with SessionLocal() as db:
+            return await _extract_meeting_tasks(meeting_id, db, http, sink)
+    
+    return sse_response(sink, work())
+
+
+@router.post("/{meeting_id}/extract-tasks/jobs", response_model=JobResponse, status_code=202)
+def enqueue_extract_tasks_from_meeting(
+    meeting_id: int,
+    db: Session = Depends(get_db)
+):
+    """Queue task extraction in the background; poll /api/jobs/{id} for the result"""
+    if not db.query(Meeting.id).filter(Meeting.id == meeting_id).first():
+        raise HTTPException(status_code=404, detail="Meeting not found")
+    
+    job = job_queue.enqueue(db, "extract_meeting_tasks", {"meeting_id": meeting_id})
+    return job_to_dict(job)
+
+
+async def _run_extract_tasks_job(payload: dict) -> dict:
+    with SessionLocal() as db:
+        result = await _extract_meeting_tasks(payload["meeting_id"], db, get_ai_http())
+    return result.model_dump(mode="json")
+
+
+job_queue.register("extract_meeting_tasks", _run_extract_tasks_job)
+
+
+async def _extract_meeting_tasks(
+    meeting_id: int, db: Session, http: AIHttpClients, sink: Optional[StreamSink] = None
+) -> ExtractTasksResponse:
     meeting = db.query(Meeting).options(
         joinedload(Meeting.employee)
     ).filter(Meeting.id == meeting_id).first()
@@ -291,11 +405,15 @@ async def extract_tasks_from_meeting(meeting_id: int, db: Session = Depends(get_
     if not meeting.notes:
         return ExtractTasksResponse(suggested_tasks=[])
     
-    analyzer = AIAnalyzer()
+    notes, person_id = meeting.notes, meeting.employee_id
+    db.commit()  # End the read so the connection isn't held during the provider call
+    
+    analyzer = AIAnalyzer(http, db)
     result = await analyzer.extract_tasks_from_notes(
-        notes=meeting.notes,
-        person_id=meeting.employee_id,
-        meeting_id=meeting_id
+        notes=notes,
+        person_id=person_id,
+        meeting_id=meeting_id,
+        sink=sink
     )
     
     return result
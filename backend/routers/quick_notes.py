@@ -1,15 +1,18 @@
 """
 Quick Notes API - פתקים מהירים לשמירת מידע חשוב
 """
+import asyncio
 from fastapi import APIRouter, Depends, HTTPException, Query
-from sqlalchemy.orm import Session
-from sqlalchemy import desc
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import selectinload
+from sqlalchemy import desc, select
 from datetime import datetime
 from typing import Optional, List
 from pydantic import BaseModel
 
-from database import get_db
+from database import get_async_db
 from models import QuickNote
+from services.semantic_search import index_quick_note, remove_document
 
 router = APIRouter()
 
@@ -51,6 +54,18 @@ class QuickNotesListResponse(BaseModel):
     total: int
 
 
+# ============== Helpers ==============
+
+async def _get_note(db: AsyncSession, note_id: int) -> QuickNote:
+    """Note with its person loaded (nothing can be lazy-loaded in async code), or 404"""
+    note = (await db.execute(
+        select(QuickNote).options(selectinload(QuickNote.person)).filter(QuickNote.id == note_id)
+    )).scalar_one_or_none()
+    if not note:
+        raise HTTPException(status_code=404, detail="Note not found")
+    return note
+
+
 # ============== Endpoints ==============
 
 @router.get("/", response_model=QuickNotesListResponse)
@@ -60,10 +75,10 @@ async def get_quick_notes(
     search: Optional[str] = Query(None, description="Search in title and content"),
     pinned_only: bool = Query(False, description="Show only pinned notes"),
     user_id: Optional[int] = Query(None, description="Filter by user"),
-    db: Session = Depends(get_db)
+    db: AsyncSession = Depends(get_async_db)
 ):
     """קבלת כל הפתקים"""
-    query = db.query(QuickNote)
+    query = select(QuickNote).options(selectinload(QuickNote.person))
     
     # Filter by user if provided
     if user_id:
@@ -86,7 +101,7 @@ async def get_quick_notes(
         )
     
     # Order: pinned first, then by updated_at
-    notes = query.order_by(desc(QuickNote.is_pinned), desc(QuickNote.updated_at)).all()
+    notes = (await db.execute(query.order_by(desc(QuickNote.is_pinned), desc(QuickNote.updated_at)))).scalars().all()
     
     # Add person names
     result = []
@@ -108,11 +123,9 @@ async def get_quick_notes(
 
 
 @router.get("/{note_id}", response_model=QuickNoteResponse)
-async def get_quick_note(note_id: int, db: Session = Depends(get_db)):
+async def get_quick_note(note_id: int, db: AsyncSession = Depends(get_async_db)):
     """קבלת פתק ספציפי"""
-    note = db.query(QuickNote).filter(QuickNote.id == note_id).first()
-    if not note:
-        raise HTTPException(status_code=404, detail="Note not found")
+    note = await _get_note(db, note_id)
     
     return QuickNoteResponse(
         id=note.id,
@@ -131,7 +144,7 @@ async def get_quick_note(note_id: int, db: Session = Depends(get_db)):
 async def create_quick_note(
     note: QuickNoteCreate, 
     user_id: Optional[int] = Query(None, description="User ID"),
-    db: Session = Depends(get_db)
+    db: AsyncSession = Depends(get_async_db)
 ):
     """יצירת פתק חדש"""
     db_note = QuickNote(
@@ -143,8 +156,9 @@ async def create_quick_note(
         user_id=user_id
     )
     db.add(db_note)
-    db.commit()
-    db.refresh(db_note)
+    await db.commit()
+    await db.refresh(db_note, ["person"])
+    await asyncio.to_thread(index_quick_note, db_note)
     
     return QuickNoteResponse(
         id=db_note.id,
@@ -163,19 +177,19 @@ async def create_quick_note(
 async def update_quick_note(
     note_id: int,
     note: QuickNoteUpdate,
-    db: Session = Depends(get_db)
+    db: AsyncSession = Depends(get_async_db)
 ):
     """עדכון פתק"""
-    db_note = db.query(QuickNote).filter(QuickNote.id == note_id).first()
-    if not db_note:
-        raise HTTPException(status_code=404, detail="Note not found")
+    db_note = await _get_note(db, note_id)
     
     update_data = note.model_dump(exclude_unset=True)
     for field, value in update_data.items():
         setattr(db_note, field, value)
     
-    db.commit()
-    db.refresh(db_note)
+    await db.commit()
+    await db.refresh(db_note, ["updated_at", "person"])
+    if {"title", "content", "person_id"} & update_data.keys():
+        await asyncio.to_thread(index_quick_note, db_note)
     
     return QuickNoteResponse(
         id=db_note.id,
@@ -191,15 +205,13 @@ async def update_quick_note(
 
 
 @router.post("/{note_id}/toggle-pin", response_model=QuickNoteResponse)
-async def toggle_pin(note_id: int, db: Session = Depends(get_db)):
+async def toggle_pin(note_id: int, db: AsyncSession = Depends(get_async_db)):
     """הצמדה/ביטול הצמדה של פתק"""
-    db_note = db.query(QuickNote).filter(QuickNote.id == note_id).first()
-    if not db_note:
-        raise HTTPException(status_code=404, detail="Note not found")
+    db_note = await _get_note(db, note_id)
     
     db_note.is_pinned = not db_note.is_pinned
-    db.commit()
-    db.refresh(db_note)
+    await db.commit()
+    await db.refresh(db_note, ["updated_at"])
     
     return QuickNoteResponse(
         id=db_note.id,
@@ -215,13 +227,13 @@ async def toggle_pin(note_id: int, db: Session = Depends(get_db)):
 
 
 @router.delete("/{note_id}")
-async def delete_quick_note(note_id: int, db: Session = Depends(get_db)):
+async def delete_quick_note(note_id: int, db: AsyncSession = Depends(get_async_db)):
     """מחיקת פתק"""
-    db_note = db.query(QuickNote).filter(QuickNote.id == note_id).first()
-    if not db_note:
-        raise HTTPException(status_code=404, detail="Note not found")
+    db_note = await _get_note(db, note_id)
     
-    db.delete(db_note)
-    db.commit()
+    user_id = db_note.user_id
+    await db.delete(db_note)
+    await db.commit()
+    await asyncio.to_thread(remove_document, user_id, "quick_note", note_id)
     return {"message": "Note deleted successfully"}
 
@@ -0,0 +1,134 @@
+"""
+Search API - חיפוש סמנטי מקומי בפגישות, פתקים ומשימות
+"""
+import re
+import asyncio
+from typing import Dict, List, Optional, Set
+
+from fastapi import APIRouter, Depends, HTTPException, Query
+from sqlalchemy.orm import Session, joinedload
+
+from database import get_db, SessionLocal
+from models import Meeting, QuickNote, Task
+from schemas import SearchResult
+from services.semantic_search import KINDS, search, tenant_documents, tenant_index
+from services.job_queue import job_queue
+
+router = APIRouter()
+
+SNIPPET_CHARS = 200
+
+_pending_rebuilds: Set[Optional[int]] = set()
+
+
+def _ensure_index(db: Session, user_id: Optional[int]) -> None:
+    """אינדקס חסר נבנה מיד; אינדקס ישן ממשיך לשרת ונבנה מחדש ברקע"""
+    index = tenant_index(user_id)
+    if not index.exists():
+        index.rebuild(tenant_documents(db, user_id))
+    elif index.is_stale() and user_id not in _pending_rebuilds:
+        _pending_rebuilds.add(user_id)
+        job_queue.enqueue(db, "rebuild_search_index", {"user_id": user_id})
+
+
+async def _run_rebuild_job(payload: dict) -> dict:
+    user_id = payload.get("user_id")
+
+    def rebuild() -> int:
+        with SessionLocal() as db:
+            documents = tenant_documents(db, user_id)
+        tenant_index(user_id).rebuild(documents)
+        return len(documents)
+
+    try:
+        return {"documents": await asyncio.to_thread(rebuild)}
+    finally:
+        _pending_rebuilds.discard(user_id)
+
+
+job_queue.register("rebuild_search_index", _run_rebuild_job)
+
+
+def _snippet(text: Optional[str], query: str) -> Optional[str]:
+    """השורה עם הכי הרבה מילים מהשאילתה"""
+    if not text:
+        return None
+    words = set(re.findall(r"\w+", query.lower()))
+    lines = [line.strip() for line in text.splitlines() if line.strip()]
+    if not lines:
+        return None
+    best = max(lines, key=lambda line: len(words & set(re.findall(r"\w+", line.lower()))))
+    return best[:SNIPPET_CHARS]
+
+
+def _parse_kinds(kinds: Optional[str]) -> Optional[List[str]]:
+    if not kinds:
+        return None
+    parsed = [kind.strip() for kind in kinds.split(",") if kind.strip()]
+    unknown = [kind for kind in parsed if kind not in KINDS]
+    if unknown:
+        raise HTTPException(status_code=400, detail=f"Unknown kinds: {', '.join(unknown)}")
+    return parsed
+
+
+@router.get("/", response_model=List[SearchResult])
+def semantic_search(
+    q: str = Query(..., min_length=1, description="Free-text question or keywords"),
+    user_id: Optional[int] = None,
+    kinds: Optional[str] = Query(None, description="Comma-separated: meeting, quick_note, task"),
+    limit: int = Query(10, ge=1, le=50),
+    db: Session = Depends(get_db)
+):
+    """
+    חיפוש לפי משמעות בסיכומי פגישות, פתקים וכותרות משימות של המשתמש.
+    האינדקס מקומי (ללא רשת) ונבנה אוטומטית כשהוא חסר או ישן.
+    """
+    kind_list = _parse_kinds(kinds)
+    _ensure_index(db, user_id)
+    matches = search(user_id, q, limit, kind_list)
+    ids: Dict[str, List[int]] = {}
+    for kind, doc_id, _ in matches:
+        ids.setdefault(kind, []).append(doc_id)
+
+    # Rows deleted or moved to another user since they were indexed are dropped here
+    rows = {}
+    if ids.get("meeting"):
+        for m in db.query(Meeting).options(joinedload(Meeting.employee)).filter(Meeting.id.in_(ids["meeting"])):
+            if m.employee and m.employee.user_id == user_id:
+                rows[("meeting", m.id)] = SearchResult(
+                    kind="meeting", id=m.id, score=0, title=m.employee.name,
+                    snippet=_snippet(m.summary, q) or _snippet(m.notes, q),
+                    date=m.date, person_id=m.employee_id, person_name=m.employee.name
+                )
+    if ids.get("quick_note"):
+        for n in db.query(QuickNote).options(joinedload(QuickNote.person)).filter(QuickNote.id.in_(ids["quick_note"])):
+            if n.user_id == user_id:
+                rows[("quick_note", n.id)] = SearchResult(
+                    kind="quick_note", id=n.id, score=0, title=n.title, snippet=_snippet(n.content, q),
+                    date=n.updated_at or n.created_at, person_id=n.person_id,
+                    person_name=n.person.name if n.person else None
+                )
+    if ids.get("task"):
+        for t in db.query(Task).options(joinedload(Task.person)).filter(Task.id.in_(ids["task"])):
+            if t.user_id == user_id:
+                rows[("task", t.id)] = SearchResult(
+                    kind="task", id=t.id, score=0, title=t.title, snippet=_snippet(t.description, q),
+                    date=t.due_date or t.created_at, person_id=t.person_id,
+                    person_name=t.person.name if t.person else None
+                )
+
+    results = []
+    for kind, doc_id, score in matches:
+        row = rows.get((kind, doc_id))
+        if row is not None:
+            row.score = round(score, 4)
+            results.append(row)
+    return results
+
+
+@router.post("/rebuild")
+def rebuild_search_index(user_id: Optional[int] = None, db: Session = Depends(get_db)):
+    """בנייה מחדש של האינדקס של המשתמש (למשל אחרי ייבוא נתונים)"""
+    documents = tenant_documents(db, user_id)
+    tenant_index(user_id).rebuild(documents)
+    return {"documents": len(documents)}
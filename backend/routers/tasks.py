@@ -1,4 +1,4 @@
-from fastapi import APIRouter, Depends, HTTPException, Query
+from fastapi import APIRouter, Depends, HTTPException, Query, Request
 from sqlalchemy.orm import Session
 from sqlalchemy import func, or_
 from typing import List, Optional
@@ -8,12 +8,24 @@ import os
 import httpx
 import json
 import re
+import base64
 
-from database import get_db
+from database import get_db, SessionLocal
 from models import Task, Employee, Meeting, User
+from services.extraction_cache import SCREENSHOT_PROMPT_VERSION, ExtractionCache, decode_image
+from services.image_preprocessor import ImagePreprocessStats, prepare_image_async
+from services.screenshot_upload import read_screenshot_body
+from services.hedging import fallback_call, hedged_call, timed_call
+from services.provider_router import provider_router
+from services.http_client import AIHttpClients, ai_http_clients, ai_timeout, get_ai_http
+from services.job_queue import job_queue, job_to_dict
+from services.ai_stream import StreamSink, sse_response, stream_completion
+from services.semantic_search import index_task, remove_document
+from services import task_dedup
+from services.person_resolver import person_index
 from schemas import (
     TaskCreate, TaskUpdate, TaskResponse, 
-    TasksListResponse, ExtractTasksRequest, ExtractTasksResponse
+    TasksListResponse, ExtractTasksRequest, ExtractTasksResponse, JobResponse
 )
 
 router = APIRouter()
@@ -27,6 +39,8 @@ class ExtractedTask(BaseModel):
     priority: str = "medium"  # low, medium, high
     person_name: Optional[str] = None  # Related person if detected
     due_date: Optional[str] = None  # YYYY-MM-DD if detected
+    person_id: Optional[int] = None  # person_name resolved to one of the user's people
+    person_confidence: Optional[float] = None
 
 
 class ScreenshotTaskExtractRequest(BaseModel):
@@ -39,9 +53,18 @@ class ScreenshotTaskExtractResponse(BaseModel):
     total: int
     meeting_title: Optional[str] = None
     summary: Optional[str] = None
+    cached: bool = False
+    preprocessing: Optional[ImagePreprocessStats] = None
 
 
-def build_task_response(task: Task, db: Session, include_creator: bool = False, is_assigned_to_me: bool = False) -> TaskResponse:
+def build_task_response(
+    task: Task,
+    db: Session,
+    include_creator: bool = False,
+    is_assigned_to_me: bool = False,
+    duplicate: Optional[tuple] = None,
+    merged: bool = False
+) -> TaskResponse:
     """Build a TaskResponse with person name and optionally creator info"""
     person_name = None
     if task.person_id:
@@ -74,10 +97,46 @@ def build_task_response(task: Task, db: Session, include_creator: bool = False,
         due_date=task.due_date,
         completed_at=task.completed_at,
         created_at=task.created_at,
-        updated_at=task.updated_at
+        updated_at=task.updated_at,
+        duplicate_of=duplicate[0].id if duplicate else None,
+        similarity=duplicate[1] if duplicate else None,
+        merged=merged
     )
 
 
+DUPLICATES_QUERY = Query(
+    task_dedup.TASK_DEDUP_MODE,
+    pattern="^(flag|merge|allow)$",
+    description="Near-duplicate open tasks: flag (create and report), merge (update the existing task) or allow"
+)
+
+
+def _create_or_merge(task: TaskCreate, user_id: Optional[int], duplicates: str, db: Session):
+    """
+    Add the task (flushed and indexed, not committed) or fold it into a
+    near-duplicate open task of the same user.
+    Returns (task, duplicate, merged).
+    """
+    duplicate = None
+    if duplicates != "allow":
+        duplicate = task_dedup.find_duplicate(db, user_id, task.title, task.description, task.person_id)
+    if duplicate and duplicates == "merge":
+        existing = duplicate[0]
+        task_dedup.merge_into(existing, **task.model_dump(exclude={"title", "task_type"}))
+        db.flush()
+        task_dedup.index_task(db, existing)
+        return existing, duplicate, True
+
+    task_data = task.model_dump()
+    if user_id:
+        task_data["user_id"] = user_id
+    db_task = Task(**task_data)
+    db.add(db_task)
+    db.flush()
+    task_dedup.index_task(db, db_task)
+    return db_task, duplicate, False
+
+
 @router.get("/", response_model=TasksListResponse)
 def get_tasks(
     skip: int = Query(0, ge=0),
@@ -395,8 +454,13 @@ def get_task(task_id: int, db: Session = Depends(get_db)):
 
 
 @router.post("/", response_model=TaskResponse, status_code=201)
-def create_task(task: TaskCreate, user_id: Optional[int] = None, db: Session = Depends(get_db)):
-    """Create a new task"""
+def create_task(
+    task: TaskCreate,
+    user_id: Optional[int] = None,
+    duplicates: str = DUPLICATES_QUERY,
+    db: Session = Depends(get_db)
+):
+    """Create a new task (near-duplicates of an open task are flagged or merged)"""
     # Validate person_id if provided
     if task.person_id:
         person = db.query(Employee).filter(Employee.id == task.person_id).first()
@@ -409,15 +473,12 @@ def create_task(task: TaskCreate, user_id: Optional[int] = None, db: Session = D
         if not meeting:
             raise HTTPException(status_code=404, detail="Meeting not found")
     
-    task_data = task.model_dump()
-    if user_id:
-        task_data["user_id"] = user_id
-    db_task = Task(**task_data)
-    db.add(db_task)
+    db_task, duplicate, merged = _create_or_merge(task, user_id, duplicates, db)
     db.commit()
     db.refresh(db_task)
+    index_task(db_task)
     
-    return build_task_response(db_task, db)
+    return build_task_response(db_task, db, duplicate=duplicate, merged=merged)
 
 
 @router.put("/{task_id}", response_model=TaskResponse)
@@ -436,8 +497,13 @@ def update_task(task_id: int, task: TaskUpdate, db: Session = Depends(get_db)):
     for key, value in update_data.items():
         setattr(db_task, key, value)
     
+    if {"title", "description", "status"} & update_data.keys():
+        db.flush()
+        task_dedup.index_task(db, db_task)
     db.commit()
     db.refresh(db_task)
+    if {"title", "person_id"} & update_data.keys():
+        index_task(db_task)
     
     return build_task_response(db_task, db)
 
@@ -449,8 +515,11 @@ def delete_task(task_id: int, db: Session = Depends(get_db)):
     if not db_task:
         raise HTTPException(status_code=404, detail="Task not found")
     
+    user_id = db_task.user_id
+    task_dedup.unindex_task(db, task_id)
     db.delete(db_task)
     db.commit()
+    remove_document(user_id, "task", task_id)
     return None
 
 
@@ -463,6 +532,7 @@ def complete_task(task_id: int, db: Session = Depends(get_db)):
     
     db_task.status = "completed"
     db_task.completed_at = datetime.now()
+    task_dedup.unindex_task(db, task_id)
     
     db.commit()
     db.refresh(db_task)
@@ -471,37 +541,179 @@ def complete_task(task_id: int, db: Session = Depends(get_db)):
 
 
 @router.post("/bulk", response_model=List[TaskResponse], status_code=201)
-def create_bulk_tasks(tasks: List[TaskCreate], db: Session = Depends(get_db)):
-    """Create multiple tasks at once (e.g., from meeting extraction)"""
-    created_tasks = []
-    
-    for task in tasks:
-        db_task = Task(**task.model_dump())
-        db.add(db_task)
-        created_tasks.append(db_task)
+def create_bulk_tasks(
+    tasks: List[TaskCreate],
+    user_id: Optional[int] = None,
+    duplicates: str = DUPLICATES_QUERY,
+    db: Session = Depends(get_db)
+):
+    """
+    Create multiple tasks at once (e.g., from meeting extraction).
+    Each task is checked against the open tasks, including the ones created
+    earlier in the same request.
+    """
+    results = [_create_or_merge(task, user_id, duplicates, db) for task in tasks]
     
     db.commit()
     
-    for task in created_tasks:
+    for task, _, _ in results:
         db.refresh(task)
+        index_task(task)
     
-    return [build_task_response(task, db) for task in created_tasks]
+    return [build_task_response(task, db, duplicate=duplicate, merged=merged) for task, duplicate, merged in results]
 
 
 # ============== Screenshot Task Extraction ==============
 
 @router.post("/extract-from-screenshot", response_model=ScreenshotTaskExtractResponse)
-async def extract_tasks_from_screenshot(request: ScreenshotTaskExtractRequest):
+async def extract_tasks_from_screenshot(
+    request: ScreenshotTaskExtractRequest,
+    user_id: Optional[int] = None,
+    db: Session = Depends(get_db),
+    http: AIHttpClients = Depends(get_ai_http)
+):
     """חילוץ משימות מצילום מסך של ישיבה/קאלנדר באמצעות AI Vision"""
+    try:
+        image_bytes = decode_image(request.image)
+    except ValueError:
+        raise HTTPException(status_code=400, detail="Invalid image data")
+    
+    return await _extract_tasks_from_image(image_bytes, request.context, db, http, user_id=user_id)
+
+
+@router.post("/extract-from-screenshot/jobs", response_model=JobResponse, status_code=202)
+def enqueue_extract_tasks_from_screenshot(
+    request: ScreenshotTaskExtractRequest,
+    user_id: Optional[int] = None,
+    db: Session = Depends(get_db)
+):
+    """הכנסת חילוץ משימות מצילום מסך לתור רקע - התוצאה ב-/api/jobs/{id}"""
+    try:
+        decode_image(request.image)
+    except ValueError:
+        raise HTTPException(status_code=400, detail="Invalid image data")
+    
+    job = job_queue.enqueue(db, "extract_tasks_screenshot", {**request.model_dump(), "user_id": user_id})
+    return job_to_dict(job)
+
+
+async def _run_screenshot_job(payload: dict) -> dict:
+    with SessionLocal() as db:
+        result = await _extract_tasks_from_image(
+            decode_image(payload["image"]), payload.get("context"), db, get_ai_http(),
+            user_id=payload.get("user_id")
+        )
+    return result.model_dump(mode="json")
+
+
+job_queue.register("extract_tasks_screenshot", _run_screenshot_job)
+
+
+@router.post("/extract-from-screenshot/stream")
+async def stream_extract_tasks_from_screenshot(
+    request: ScreenshotTaskExtractRequest,
+    user_id: Optional[int] = None,
+    http: AIHttpClients = Depends(get_ai_http)
+):
+    """
+    חילוץ משימות מצילום מסך כ-Server-Sent Events:
+    אירוע task לכל משימה ברגע שהיא מפוענחת, ובסוף אירוע result עם התשובה המלאה
+    """
+    try:
+        image_bytes = decode_image(request.image)
+    except ValueError:
+        raise HTTPException(status_code=400, detail="Invalid image data")
+    
+    people = None  # The user's person index, loaded before the first task streams in
+    
+    def validate_item(key: str, item):
+        if key != "tasks":
+            return item
+        try:
+            task = ExtractedTask(**item)
+        except (TypeError, ValueError):
+            return None
+        if people is not None:
+            _resolve_person(task, people)
+        return task.model_dump()
+    
+    sink = StreamSink(
+        {"meeting_title": "meeting_title", "summary": "summary", "tasks": "task"}, transform=validate_item
+    )
     
-    # Get API keys from environment
+    async def work():
+        nonlocal people
+        with SessionLocal() as db:
+            people = person_index.get(db, user_id)
+            return await _extract_tasks_from_image(image_bytes, request.context, db, http, sink, user_id=user_id)
+    
+    return sse_response(sink, work())
+
+
+@router.post("/extract-from-screenshot/upload", response_model=ScreenshotTaskExtractResponse)
+async def extract_tasks_from_screenshot_upload(
+    request: Request,
+    context: Optional[str] = Query(None, description="Additional context about the meeting"),
+    user_id: Optional[int] = None,
+    db: Session = Depends(get_db),
+    http: AIHttpClients = Depends(get_ai_http)
+):
+    """חילוץ משימות מצילום מסך שנשלח כקובץ בינארי (בלי base64)"""
+    image_bytes = await read_screenshot_body(request)
+    return await _extract_tasks_from_image(image_bytes, context, db, http, user_id=user_id)
+
+
+def _task_vision_providers(http: AIHttpClients, sink: Optional[StreamSink] = None) -> list:
+    """Configured vision providers in precedence order: (provider, model, extract function)"""
     azure_openai_key = os.getenv("AZURE_OPENAI_API_KEY")
     azure_openai_endpoint = os.getenv("AZURE_OPENAI_ENDPOINT")
     azure_openai_deployment = os.getenv("AZURE_OPENAI_DEPLOYMENT", "gpt-4o")
     anthropic_api_key = os.getenv("ANTHROPIC_API_KEY")
     openai_api_key = os.getenv("OPENAI_API_KEY")
     
-    if not azure_openai_key and not anthropic_api_key and not openai_api_key:
+    providers = []
+    if azure_openai_key and azure_openai_endpoint:
+        providers.append(("azure", azure_openai_deployment,
+                          lambda img, ctx, mime: extract_tasks_azure_openai(
+                              img, azure_openai_key, azure_openai_endpoint, azure_openai_deployment, ctx, mime, http.get("azure"), sink)))
+    if anthropic_api_key:
+        providers.append(("anthropic", "claude-sonnet-4-20250514",
+                          lambda img, ctx, mime: extract_tasks_claude(img, anthropic_api_key, ctx, mime, http.get("anthropic"), sink)))
+    if openai_api_key:
+        providers.append(("openai", "gpt-4o",
+                          lambda img, ctx, mime: extract_tasks_openai(img, openai_api_key, ctx, mime, http.get("openai"), sink)))
+    return providers
+
+
+def _resolve_person(task: ExtractedTask, people) -> None:
+    match = people.resolve(task.person_name) if task.person_name else None
+    task.person_id, task.person_confidence = match if match else (None, None)
+
+
+def _resolve_people(result: ScreenshotTaskExtractResponse, db: Session, user_id: Optional[int]) -> ScreenshotTaskExtractResponse:
+    """Map every extracted person_name to one of the user's people (one index lookup for the whole response)"""
+    if any(task.person_name for task in result.tasks):
+        people = person_index.get(db, user_id)
+        for task in result.tasks:
+            _resolve_person(task, people)
+    return result
+
+
+async def _extract_tasks_from_image(
+    image_bytes: bytes, context: Optional[str], db: Session, http: AIHttpClients,
+    sink: Optional[StreamSink] = None, user_id: Optional[int] = None
+) -> ScreenshotTaskExtractResponse:
+    """
+    Shared extraction pipeline for the JSON, binary upload and streaming endpoints.
+    With a sink the provider answer is streamed into it (and never hedged,
+    since two racing streams can't share one sink).
+    Person names are resolved against the user's people after the cache, so
+    cached answers pick up people added since.
+    """
+    # Fastest healthy provider first (circuit-broken providers are skipped)
+    providers = provider_router.order(_task_vision_providers(http, sink), key=lambda p: f"{p[0]}:{p[1]}")
+    
+    if not providers:
         # Return sample data for testing
         return ScreenshotTaskExtractResponse(
             tasks=[
@@ -520,33 +732,77 @@ async def extract_tasks_from_screenshot(request: ScreenshotTaskExtractRequest):
             summary="זוהי תשובת דוגמה - אנא הגדירו AZURE_OPENAI_API_KEY לחילוץ אמיתי"
         )
     
-    # Extract base64 data from data URL if present
-    image_data = request.image
-    if image_data.startswith('data:'):
-        image_data = image_data.split(',')[1]
+    provider_model = f"{providers[0][0]}:{providers[0][1]}"
+    
+    cache = ExtractionCache(db, kind="tasks")
+    cache_key = cache.make_key(image_bytes, context, SCREENSHOT_PROMPT_VERSION, provider_model)
+    cached = cache.get(cache_key)
+    if cached is not None:
+        return _resolve_people(ScreenshotTaskExtractResponse(**cached, cached=True), db, user_id)
+    
+    async def run_provider(provider: str, extract) -> tuple:
+        # Crop/downscale/re-encode for this provider (in a worker thread).
+        # The image is base64-encoded exactly once, here at the provider boundary.
+        prepared = await prepare_image_async(image_bytes, provider)
+        image_data = base64.b64encode(prepared.data if prepared else image_bytes).decode()
+        mime_type = prepared.mime_type if prepared else "image/png"
+        return await extract(image_data, context, mime_type), prepared
+    
+    attempts = [
+        (f"{provider}:{model}", lambda provider=provider, extract=extract: run_provider(provider, extract))
+        for provider, model, extract in providers
+    ]
     
     try:
-        if azure_openai_key and azure_openai_endpoint:
-            result = await extract_tasks_azure_openai(
-                image_data, azure_openai_key, azure_openai_endpoint, 
-                azure_openai_deployment, request.context
-            )
-        elif anthropic_api_key:
-            result = await extract_tasks_claude(image_data, anthropic_api_key, request.context)
+        # Opt-in hedging: if the preferred provider is slow, race a second one
+        hedge_after = os.getenv("SCREENSHOT_HEDGE_AFTER_SECONDS")
+        if hedge_after and len(attempts) > 1 and sink is None:
+            winner, (result, prepared) = await hedged_call(attempts[:2], float(hedge_after))
         else:
-            result = await extract_tasks_openai(image_data, openai_api_key, request.context)
+            winner, (result, prepared) = await fallback_call(attempts)
         
-        return result
+        # Stored under the model that answered, which may be the hedge's backup
+        winner_key = cache.make_key(image_bytes, context, SCREENSHOT_PROMPT_VERSION, winner)
+        cache.set(winner_key, result.model_dump(exclude={"cached", "preprocessing"}))
+        result.preprocessing = prepared.stats if prepared else None
+        return _resolve_people(result, db, user_id)
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"Error extracting tasks: {str(e)}")
 
 
+def _parse_tasks_content(content: str) -> ScreenshotTaskExtractResponse:
+    """
+    Tasks in a model answer. Raises ValueError when the answer holds no
+    valid tasks JSON, so the call counts as failed: a hedged race moves on
+    to the other provider and nothing is cached.
+    """
+    json_match = re.search(r'\{[\s\S]*\}', content)
+    if not json_match:
+        raise ValueError("No JSON in the model answer")
+    data = json.loads(json_match.group())
+    if not isinstance(data, dict) or not isinstance(data.get("tasks", []), list):
+        raise ValueError("Unexpected JSON shape in the model answer")
+    try:
+        tasks = [ExtractedTask(**t) for t in data.get("tasks", [])]
+    except TypeError as e:
+        raise ValueError(f"Unexpected task in the model answer: {e}")
+    return ScreenshotTaskExtractResponse(
+        tasks=tasks,
+        total=len(tasks),
+        meeting_title=data.get("meeting_title"),
+        summary=data.get("summary")
+    )
+
+
 async def extract_tasks_azure_openai(
     image_base64: str, 
     api_key: str, 
     endpoint: str, 
     deployment: str,
-    context: Optional[str] = None
+    context: Optional[str] = None,
+    mime_type: str = "image/png",
+    client: Optional[httpx.AsyncClient] = None,
+    sink: Optional[StreamSink] = None
 ) -> ScreenshotTaskExtractResponse:
     """Extract tasks from screenshot using Azure OpenAI Vision"""
     
@@ -583,61 +839,54 @@ async def extract_tasks_azure_openai(
 
     api_url = f"{endpoint}/openai/deployments/{deployment}/chat/completions?api-version=2024-02-15-preview"
     
-    async with httpx.AsyncClient() as client:
-        response = await client.post(
-            api_url,
-            headers={
-                "api-key": api_key,
-                "Content-Type": "application/json"
-            },
-            json={
-                "max_tokens": 3000,
-                "messages": [
+    client = client or ai_http_clients.get("azure")
+    headers = {
+        "api-key": api_key,
+        "Content-Type": "application/json"
+    }
+    body = {
+        "max_tokens": 3000,
+        "messages": [
+            {
+                "role": "user",
+                "content": [
                     {
-                        "role": "user",
-                        "content": [
-                            {
-                                "type": "image_url",
-                                "image_url": {
-                                    "url": f"data:image/png;base64,{image_base64}"
-                                }
-                            },
-                            {
-                                "type": "text",
-                                "text": prompt
-                            }
-                        ]
+                        "type": "image_url",
+                        "image_url": {
+                            "url": f"data:{mime_type};base64,{image_base64}"
+                        }
+                    },
+                    {
+                        "type": "text",
+                        "text": prompt
                     }
                 ]
-            },
-            timeout=90.0
+            }
+        ]
+    }
+    if sink is not None:
+        content = await stream_completion(
+            client, "azure", api_url, headers, {**body, "stream": True}, ai_timeout(90.0), sink
         )
-        
+    else:
+        response = await client.post(api_url, headers=headers, json=body, timeout=ai_timeout(90.0))
+    
         if response.status_code != 200:
             raise Exception(f"Azure OpenAI API error: {response.text}")
-        
+    
         result = response.json()
         content = result["choices"][0]["message"]["content"]
-        
-        # Parse JSON from response
-        json_match = re.search(r'\{[\s\S]*\}', content)
-        if json_match:
-            data = json.loads(json_match.group())
-            tasks = [ExtractedTask(**t) for t in data.get("tasks", [])]
-            return ScreenshotTaskExtractResponse(
-                tasks=tasks,
-                total=len(tasks),
-                meeting_title=data.get("meeting_title"),
-                summary=data.get("summary")
-            )
-        
-        return ScreenshotTaskExtractResponse(tasks=[], total=0, summary="לא הצלחתי לפרסר את התשובה")
+    
+    return _parse_tasks_content(content)
 
 
 async def extract_tasks_claude(
     image_base64: str, 
     api_key: str, 
-    context: Optional[str] = None
+    context: Optional[str] = None,
+    mime_type: str = "image/png",
+    client: Optional[httpx.AsyncClient] = None,
+    sink: Optional[StreamSink] = None
 ) -> ScreenshotTaskExtractResponse:
     """Extract tasks from screenshot using Claude Vision"""
     
@@ -661,61 +910,56 @@ async def extract_tasks_claude(
 }}
 """
 
-    async with httpx.AsyncClient() as client:
-        response = await client.post(
-            "https://api.anthropic.com/v1/messages",
-            headers={
-                "x-api-key": api_key,
-                "anthropic-version": "2023-06-01",
-                "content-type": "application/json"
-            },
-            json={
-                "model": "claude-sonnet-4-20250514",
-                "max_tokens": 3000,
-                "messages": [
+    client = client or ai_http_clients.get("anthropic")
+    api_url = "https://api.anthropic.com/v1/messages"
+    headers = {
+        "x-api-key": api_key,
+        "anthropic-version": "2023-06-01",
+        "content-type": "application/json"
+    }
+    body = {
+        "model": "claude-sonnet-4-20250514",
+        "max_tokens": 3000,
+        "messages": [
+            {
+                "role": "user",
+                "content": [
                     {
-                        "role": "user",
-                        "content": [
-                            {
-                                "type": "image",
-                                "source": {
-                                    "type": "base64",
-                                    "media_type": "image/png",
-                                    "data": image_base64
-                                }
-                            },
-                            {"type": "text", "text": prompt}
-                        ]
-                    }
+                        "type": "image",
+                        "source": {
+                            "type": "base64",
+                            "media_type": mime_type,
+                            "data": image_base64
+                        }
+                    },
+                    {"type": "text", "text": prompt}
                 ]
-            },
-            timeout=90.0
+            }
+        ]
+    }
+    if sink is not None:
+        content = await stream_completion(
+            client, "anthropic", api_url, headers, {**body, "stream": True}, ai_timeout(90.0), sink
         )
-        
+    else:
+        response = await client.post(api_url, headers=headers, json=body, timeout=ai_timeout(90.0))
+    
         if response.status_code != 200:
             raise Exception(f"Claude API error: {response.text}")
-        
+    
         result = response.json()
         content = result["content"][0]["text"]
-        
-        json_match = re.search(r'\{[\s\S]*\}', content)
-        if json_match:
-            data = json.loads(json_match.group())
-            tasks = [ExtractedTask(**t) for t in data.get("tasks", [])]
-            return ScreenshotTaskExtractResponse(
-                tasks=tasks,
-                total=len(tasks),
-                meeting_title=data.get("meeting_title"),
-                summary=data.get("summary")
-            )
-        
-        return ScreenshotTaskExtractResponse(tasks=[], total=0)
+    
+    return _parse_tasks_content(content)
 
 
 async def extract_tasks_openai(
     image_base64: str, 
     api_key: str, 
-    context: Optional[str] = None
+    context: Optional[str] = None,
+    mime_type: str = "image/png",
+    client: Optional[httpx.AsyncClient] = None,
+    sink: Optional[StreamSink] = None
 ) -> ScreenshotTaskExtractResponse:
     """Extract tasks from screenshot using OpenAI Vision"""
     
@@ -739,50 +983,42 @@ Return JSON only:
 }}
 """
 
-    async with httpx.AsyncClient() as client:
-        response = await client.post(
-            "https://api.openai.com/v1/chat/completions",
-            headers={
-                "Authorization": f"Bearer {api_key}",
-                "Content-Type": "application/json"
-            },
-            json={
-                "model": "gpt-4o",
-                "max_tokens": 3000,
-                "messages": [
+    client = client or ai_http_clients.get("openai")
+    api_url = "https://api.openai.com/v1/chat/completions"
+    headers = {
+        "Authorization": f"Bearer {api_key}",
+        "Content-Type": "application/json"
+    }
+    body = {
+        "model": "gpt-4o",
+        "max_tokens": 3000,
+        "messages": [
+            {
+                "role": "user",
+                "content": [
                     {
-                        "role": "user",
-                        "content": [
-                            {
-                                "type": "image_url",
-                                "image_url": {"url": f"data:image/png;base64,{image_base64}"}
-                            },
-                            {"type": "text", "text": prompt}
-                        ]
-                    }
+                        "type": "image_url",
+                        "image_url": {"url": f"data:{mime_type};base64,{image_base64}"}
+                    },
+                    {"type": "text", "text": prompt}
                 ]
-            },
-            timeout=90.0
+            }
+        ]
+    }
+    if sink is not None:
+        content = await stream_completion(
+            client, "openai", api_url, headers, {**body, "stream": True}, ai_timeout(90.0), sink
         )
-        
+    else:
+        response = await client.post(api_url, headers=headers, json=body, timeout=ai_timeout(90.0))
+    
         if response.status_code != 200:
             raise Exception(f"OpenAI API error: {response.text}")
-        
+    
         result = response.json()
         content = result["choices"][0]["message"]["content"]
-        
-        json_match = re.search(r'\{[\s\S]*\}', content)
-        if json_match:
-            data = json.loads(json_match.group())
-            tasks = [ExtractedTask(**t) for t in data.get("tasks", [])]
-            return ScreenshotTaskExtractResponse(
-                tasks=tasks,
-                total=len(tasks),
-                meeting_title=data.get("meeting_title"),
-                summary=data.get("summary")
-            )
-        
-        return ScreenshotTaskExtractResponse(tasks=[], total=0)
+    
+    return _parse_tasks_content(content)
 
 
 
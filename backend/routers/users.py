@@ -1,13 +1,16 @@
 from fastapi import APIRouter, Depends, HTTPException
-from sqlalchemy.orm import Session
+from sqlalchemy import select, update
+from sqlalchemy.ext.asyncio import AsyncSession
 from datetime import datetime
 from pydantic import BaseModel
 from typing import Optional
 import hashlib
 import secrets
 
-from database import get_db
+from database import get_async_db
 from models import User, Employee, Task, QuickNote, CalendarMeeting
+from services.semantic_search import invalidate_tenant
+from services.person_resolver import person_index
 
 router = APIRouter()
 
@@ -29,6 +32,10 @@ def verify_password(plain_password: str, hashed_password: str) -> bool:
         return False
 
 
+async def _user_by_username(db: AsyncSession, username: str) -> Optional[User]:
+    return (await db.execute(select(User).filter(User.username == username))).scalar_one_or_none()
+
+
 class UserLogin(BaseModel):
     username: str
     password: str
@@ -52,7 +59,7 @@ class UserResponse(BaseModel):
 
 
 @router.post("/login", response_model=UserResponse)
-async def login(data: UserLogin, db: Session = Depends(get_db)):
+async def login(data: UserLogin, db: AsyncSession = Depends(get_async_db)):
     """
     Login with username and password.
     """
@@ -65,7 +72,7 @@ async def login(data: UserLogin, db: Session = Depends(get_db)):
         raise HTTPException(status_code=400, detail="סיסמה נדרשת")
     
     # Check if user exists
-    user = db.query(User).filter(User.username == username).first()
+    user = await _user_by_username(db, username)
     
     if not user:
         raise HTTPException(status_code=401, detail="שם משתמש או סיסמה שגויים")
@@ -79,14 +86,13 @@ async def login(data: UserLogin, db: Session = Depends(get_db)):
     
     # Update last login
     user.last_login = datetime.utcnow()
-    db.commit()
-    db.refresh(user)
+    await db.commit()
     
     return user
 
 
 @router.post("/register", response_model=UserResponse)
-async def register(data: UserRegister, db: Session = Depends(get_db)):
+async def register(data: UserRegister, db: AsyncSession = Depends(get_async_db)):
     """
     Register a new user with username and password.
     If user exists without password, set the password.
@@ -103,7 +109,7 @@ async def register(data: UserRegister, db: Session = Depends(get_db)):
         raise HTTPException(status_code=400, detail="הסיסמה חייבת להכיל לפחות 4 תווים")
     
     # Check if user already exists
-    existing_user = db.query(User).filter(User.username == username).first()
+    existing_user = await _user_by_username(db, username)
     if existing_user:
         # If user exists but has no password, allow setting password
         if not existing_user.password_hash:
@@ -111,8 +117,7 @@ async def register(data: UserRegister, db: Session = Depends(get_db)):
             existing_user.last_login = datetime.utcnow()
             if data.display_name:
                 existing_user.display_name = data.display_name
-            db.commit()
-            db.refresh(existing_user)
+            await db.commit()
             return existing_user
         else:
             raise HTTPException(status_code=400, detail="שם משתמש כבר קיים במערכת")
@@ -126,60 +131,55 @@ async def register(data: UserRegister, db: Session = Depends(get_db)):
         last_login=datetime.utcnow()
     )
     db.add(user)
-    db.commit()
-    db.refresh(user)
+    await db.commit()
     
     return user
 
 
 @router.get("/me", response_model=UserResponse)
-async def get_current_user(user_id: int, db: Session = Depends(get_db)):
+async def get_current_user(user_id: int, db: AsyncSession = Depends(get_async_db)):
     """Get user by ID"""
-    user = db.query(User).filter(User.id == user_id).first()
+    user = await db.get(User, user_id)
     if not user:
         raise HTTPException(status_code=404, detail="משתמש לא נמצא")
     return user
 
 
 @router.get("/check/{username}")
-async def check_username(username: str, db: Session = Depends(get_db)):
+async def check_username(username: str, db: AsyncSession = Depends(get_async_db)):
     """Check if username exists"""
     username_lower = username.strip().lower()
-    user = db.query(User).filter(User.username == username_lower).first()
+    user = await _user_by_username(db, username_lower)
     return {"exists": user is not None, "user": UserResponse.from_orm(user) if user else None}
 
 
 @router.post("/migrate-data/{user_id}")
-async def migrate_existing_data(user_id: int, db: Session = Depends(get_db)):
+async def migrate_existing_data(user_id: int, db: AsyncSession = Depends(get_async_db)):
     """
     Migrate all existing data (with no user_id) to the specified user.
     This is a one-time migration endpoint.
     """
-    user = db.query(User).filter(User.id == user_id).first()
+    user = await db.get(User, user_id)
     if not user:
         raise HTTPException(status_code=404, detail="משתמש לא נמצא")
     
-    # Migrate employees
-    employees_count = db.query(Employee).filter(Employee.user_id == None).update(
-        {"user_id": user_id}, synchronize_session=False
-    )
-    
-    # Migrate tasks
-    tasks_count = db.query(Task).filter(Task.user_id == None).update(
-        {"user_id": user_id}, synchronize_session=False
-    )
-    
-    # Migrate quick notes
-    notes_count = db.query(QuickNote).filter(QuickNote.user_id == None).update(
-        {"user_id": user_id}, synchronize_session=False
-    )
-    
-    # Migrate calendar meetings
-    calendar_count = db.query(CalendarMeeting).filter(CalendarMeeting.user_id == None).update(
-        {"user_id": user_id}, synchronize_session=False
-    )
-    
-    db.commit()
+    async def claim(model) -> int:
+        result = await db.execute(
+            update(model).where(model.user_id == None).values(user_id=user_id).execution_options(synchronize_session=False)
+        )
+        return result.rowcount
+    
+    # Migrate employees, tasks, quick notes and calendar meetings
+    employees_count = await claim(Employee)
+    tasks_count = await claim(Task)
+    notes_count = await claim(QuickNote)
+    calendar_count = await claim(CalendarMeeting)
+    
+    await db.commit()
+    invalidate_tenant(None)
+    invalidate_tenant(user_id)
+    person_index.invalidate(None)
+    person_index.invalidate(user_id)
     
     return {
         "message": "Data migrated successfully",
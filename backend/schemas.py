@@ -126,6 +126,7 @@ class MeetingResponse(MeetingBase):
     ai_insights: Optional[str] = None
     ai_topics: Optional[str] = None
     ai_sentiment: Optional[str] = None
+    ai_suggested_tasks: Optional[str] = None
     created_at: datetime
     updated_at: datetime
     action_items: List[ActionItemResponse] = []
@@ -164,6 +165,7 @@ class OverallAnalytics(BaseModel):
 class AIAnalysisRequest(BaseModel):
     meeting_id: int
     notes: str
+    require_insights: bool = False  # Skip the local-model tier (LOCAL_CLASSIFIER=prefer)
 
 
 class AIAnalysisResponse(BaseModel):
@@ -171,6 +173,7 @@ class AIAnalysisResponse(BaseModel):
     topics: List[str]
     sentiment: str
     action_items_suggested: List[str] = []
+    cached: bool = False
 
 
 # ============== Task Schemas ==============
@@ -211,6 +214,9 @@ class TaskResponse(TaskBase):
     completed_at: Optional[datetime] = None
     created_at: datetime
     updated_at: datetime
+    duplicate_of: Optional[int] = None  # משימה פתוחה דומה שכבר קיימת
+    similarity: Optional[float] = None  # Jaccard similarity to duplicate_of
+    merged: bool = False  # לא נוצרה משימה חדשה - המשימה הקיימת עודכנה
 
     class Config:
         from_attributes = True
@@ -230,6 +236,12 @@ class ExtractTasksRequest(BaseModel):
 
 class ExtractTasksResponse(BaseModel):
     suggested_tasks: List[TaskCreate]
+    cached: bool = False
+
+
+class MeetingAnalysisResponse(AIAnalysisResponse):
+    """Insights, topics, sentiment and structured tasks from a single AI call"""
+    suggested_tasks: List[TaskCreate] = []
 
 
 # ============== Calendar Meeting Schemas ==============
@@ -237,7 +249,7 @@ class ExtractTasksResponse(BaseModel):
 class MeetingPrepNoteBase(BaseModel):
     content: str = Field(..., min_length=1)
     is_completed: bool = False
-    order_index: int = 0
+    order_index: float = 0
 
 
 class MeetingPrepNoteCreate(MeetingPrepNoteBase):
@@ -247,7 +259,20 @@ class MeetingPrepNoteCreate(MeetingPrepNoteBase):
 class MeetingPrepNoteUpdate(BaseModel):
     content: Optional[str] = None
     is_completed: Optional[bool] = None
-    order_index: Optional[int] = None
+    order_index: Optional[float] = None
+
+
+class MeetingPrepNoteBatchItem(BaseModel):
+    """שינוי אחד בתוך עדכון מרוכז (גרירה/סימון של כמה נקודות)"""
+    id: int
+    content: Optional[str] = Field(None, min_length=1)
+    is_completed: Optional[bool] = None
+    after_id: Optional[int] = None  # למקם מיד אחרי הנקודה הזו
+    before_id: Optional[int] = None  # למקם מיד לפני הנקודה הזו
+
+
+class MeetingPrepNoteBatchRequest(BaseModel):
+    changes: List[MeetingPrepNoteBatchItem]
 
 
 class MeetingPrepNoteResponse(MeetingPrepNoteBase):
@@ -303,6 +328,16 @@ class CalendarMeetingsListResponse(BaseModel):
     date: str
 
 
+class CalendarMeetingBulkUpsertRequest(BaseModel):
+    meetings: List[CalendarMeetingCreate]
+
+
+class CalendarMeetingBulkUpsertResponse(BaseModel):
+    meetings: List[CalendarMeetingResponse]
+    created: int
+    updated: int
+
+
 class GoogleCalendarAuthUrl(BaseModel):
     auth_url: str
 
@@ -311,3 +346,66 @@ class GoogleCalendarToken(BaseModel):
     code: str
 
 
+# ============== Backfill Schemas ==============
+
+class BackfillRequest(BaseModel):
+    mode: str = "online"  # online, batch (provider batch API - cheaper, slower)
+    only_stale: bool = True  # Skip meetings already analyzed with the current prompt version
+
+
+class BackfillRunResponse(BaseModel):
+    id: int
+    mode: str
+    only_stale: bool
+    status: str
+    last_meeting_id: int
+    processed: int
+    failed: int
+    total: int
+    provider_batch_id: Optional[str] = None
+    error: Optional[str] = None
+    job_id: Optional[str] = None
+    created_at: datetime
+    updated_at: datetime
+    finished_at: Optional[datetime] = None
+
+    class Config:
+        from_attributes = True
+
+
+# ============== Background Job Schemas ==============
+
+class JobResponse(BaseModel):
+    id: str
+    kind: str
+    status: str  # queued, running, succeeded, failed
+    result: Optional[dict] = None
+    error: Optional[str] = None
+    attempts: int = 0
+    created_at: datetime
+    started_at: Optional[datetime] = None
+    finished_at: Optional[datetime] = None
+
+
+# ============== Local Model Schemas ==============
+
+class LocalModelResponse(BaseModel):
+    id: int
+    samples: int
+    metrics: Optional[dict] = None  # Held-out evaluation from training
+    created_at: datetime
+    mode: str  # LOCAL_CLASSIFIER: off, fallback, prefer
+    loaded: bool  # This process is serving this model
+
+
+# ============== Search Schemas ==============
+
+class SearchResult(BaseModel):
+    kind: str  # meeting, quick_note, task
+    id: int
+    score: float  # Cosine similarity, 0..1
+    title: str
+    snippet: Optional[str] = None
+    date: Optional[datetime] = None
+    person_id: Optional[int] = None
+    person_name: Optional[str] = None
@@ -0,0 +1 @@
+# Maintenance and benchmark scripts (run from backend/: python -m scripts.<name>)
@@ -0,0 +1,41 @@
+"""
+Re-analyze historical meetings with the current AI prompt / model.
+
+    cd backend && python -m scripts.backfill_analysis [--mode batch] [--all]
+    cd backend && python -m scripts.backfill_analysis --resume RUN_ID
+
+Progress is checkpointed in the backfill_runs table, so an interrupted run
+continues where it stopped when resumed.
+"""
+import argparse
+import asyncio
+
+from database import SessionLocal, init_db
+from services.backfill import BACKFILL_MODES, create_run, run_backfill
+from services.http_client import ai_http_clients
+
+
+async def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--mode", choices=BACKFILL_MODES, default="online")
+    parser.add_argument("--all", action="store_true", help="Re-analyze every meeting, not only stale ones")
+    parser.add_argument("--resume", type=int, metavar="RUN_ID", help="Continue an existing run")
+    args = parser.parse_args()
+
+    init_db()
+    if args.resume:
+        run_id = args.resume
+    else:
+        with SessionLocal() as db:
+            run = create_run(db, mode=args.mode, only_stale=not args.all)
+            run_id = run.id
+            print(f"Backfill run {run_id}: {run.total} meetings to analyze")
+
+    try:
+        print(await run_backfill(run_id, ai_http_clients))
+    finally:
+        await ai_http_clients.aclose()
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
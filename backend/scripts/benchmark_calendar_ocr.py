@@ -0,0 +1,178 @@
+"""
+Accuracy/latency benchmark for the local calendar OCR tier.
+
+A fixture is an image plus a JSON file with the same name holding the
+expected answer: {"target_date": "YYYY-MM-DD", "meetings": [ExtractedMeeting, ...]}.
+
+    cd backend && python -m scripts.benchmark_calendar_ocr --generate 20 --fixtures /tmp/calendar-fixtures
+    cd backend && python -m scripts.benchmark_calendar_ocr --fixtures /tmp/calendar-fixtures [--vision]
+
+--generate renders synthetic day-view screenshots; real Outlook / Google
+Calendar screenshots with hand-written JSON can be dropped in the same
+directory. --vision also runs the preferred configured vision provider on
+every fixture for comparison (needs API keys).
+"""
+import argparse
+import asyncio
+import base64
+import difflib
+import json
+import random
+import statistics
+import time
+from pathlib import Path
+
+from PIL import Image, ImageDraw, ImageFont
+
+from services.calendar_ocr import SCREENSHOT_OCR_MIN_CONFIDENCE, local_ocr_available, run_local_ocr
+
+TITLES = [
+    "Team sync", "1:1 Dana", "Design review", "Sprint planning", "Lunch", "Budget review",
+    "Interview - backend", "Customer call", "Roadmap", "Retro", "Offsite prep", "Hiring sync",
+]
+ROOMS = ["Room 4", "Zoom", "Tel Aviv 12", None, None]
+
+
+def _font(size: int):
+    try:
+        return ImageFont.load_default(size=size)
+    except TypeError:  # Pillow without FreeType
+        return ImageFont.load_default()
+
+
+def generate(directory: Path, count: int, seed: int) -> None:
+    """Render synthetic day-view screenshots with their expected meetings"""
+    rng = random.Random(seed)
+    directory.mkdir(parents=True, exist_ok=True)
+    hour_px, top, first_hour, hours = 80, 60, 8, 10
+    label_font, title_font = _font(14), _font(16)
+    for n in range(count):
+        img = Image.new("RGB", (900, top + hour_px * hours + 20), "white")
+        draw = ImageDraw.Draw(img)
+        draw.text((300, 15), "Monday, March 2", fill="black", font=title_font)
+        twelve_hour = rng.random() < 0.5
+        for i in range(hours):
+            hour = first_hour + i
+            y = top + i * hour_px
+            label = f"{(hour - 1) % 12 + 1} {'AM' if hour < 12 else 'PM'}" if twelve_hour else f"{hour:02d}:00"
+            draw.text((10, y - 8), label, fill="gray", font=label_font)
+            draw.line((80, y, 880, y), fill=(220, 220, 220))
+
+        meetings, slot = [], 0
+        while slot < hours * 4 - 2:
+            slot += rng.randint(0, 4)
+            length = rng.choice([2, 2, 3, 4])
+            if slot + length > hours * 4:
+                break
+            start = first_hour * 60 + slot * 15
+            end = start + length * 15
+            title = rng.choice(TITLES)
+            room = rng.choice(ROOMS)
+            y0, y1 = top + slot * hour_px // 4, top + (slot + length) * hour_px // 4
+            draw.rectangle((100, y0 + 1, 860, y1 - 1), fill=(210, 228, 252), outline=(120, 160, 230))
+            lines = [title]
+            if rng.random() < 0.6:
+                lines.append(f"{start // 60}:{start % 60:02d} - {end // 60}:{end % 60:02d}")
+            if room:
+                lines.append(room)
+            for i, text in enumerate(lines[:max(1, (y1 - y0 - 6) // 18)]):
+                draw.text((110, y0 + 4 + i * 18), text, fill="black", font=title_font)
+            meetings.append({
+                "title": title, "start_time": f"{start // 60:02d}:{start % 60:02d}",
+                "end_time": f"{end // 60:02d}:{end % 60:02d}", "location": room, "attendees": None
+            })
+            slot += length
+
+        img.save(directory / f"synthetic-{n:03d}.png")
+        (directory / f"synthetic-{n:03d}.json").write_text(
+            json.dumps({"target_date": "2026-03-02", "meetings": meetings}, ensure_ascii=False, indent=2)
+        )
+    print(f"Generated {count} fixtures in {directory}")
+
+
+def score(expected: list, found: list) -> dict:
+    """Greedy matching on title similarity; times must match exactly to count as correct"""
+    remaining = list(found)
+    matched = exact = 0
+    for meeting in expected:
+        best, best_ratio = None, 0.6
+        for candidate in remaining:
+            ratio = difflib.SequenceMatcher(None, meeting["title"].lower(), candidate["title"].lower()).ratio()
+            if ratio >= best_ratio:
+                best, best_ratio = candidate, ratio
+        if best is not None:
+            remaining.remove(best)
+            matched += 1
+            if (best["start_time"], best["end_time"]) == (meeting["start_time"], meeting["end_time"]):
+                exact += 1
+    return {"expected": len(expected), "found": len(found), "matched": matched, "exact": exact}
+
+
+def summarize(label: str, rows: list) -> None:
+    if not rows:
+        return
+    expected = sum(row["expected"] for row in rows)
+    found = sum(row["found"] for row in rows)
+    exact = sum(row["exact"] for row in rows)
+    latencies = sorted(row["seconds"] for row in rows)
+    print(
+        f"{label:<22} fixtures={len(rows):<4} recall={exact / max(expected, 1):6.1%} "
+        f"precision={exact / max(found, 1):6.1%} p50={statistics.median(latencies) * 1000:7.0f} ms "
+        f"p95={latencies[min(len(latencies) - 1, int(len(latencies) * 0.95))] * 1000:7.0f} ms"
+    )
+
+
+async def run_vision(image_bytes: bytes, target_date: str) -> list:
+    from routers.calendar_meetings import _calendar_vision_providers
+    from services.http_client import ai_http_clients
+    from services.provider_router import provider_router
+
+    providers = provider_router.order(_calendar_vision_providers(ai_http_clients), key=lambda p: f"{p[0]}:{p[1]}")
+    if not providers:
+        raise SystemExit("--vision needs a configured vision provider")
+    _, _, extract = providers[0]
+    meetings = await extract(base64.b64encode(image_bytes).decode(), target_date, "image/png")
+    return [meeting.model_dump() for meeting in meetings]
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--fixtures", type=Path, required=True)
+    parser.add_argument("--generate", type=int, default=0, help="Render this many synthetic fixtures first")
+    parser.add_argument("--seed", type=int, default=1)
+    parser.add_argument("--vision", action="store_true", help="Also benchmark the vision provider")
+    args = parser.parse_args()
+
+    if args.generate:
+        generate(args.fixtures, args.generate, args.seed)
+    if not local_ocr_available():
+        raise SystemExit("Local OCR needs pytesseract and the tesseract binary (with the eng/heb language data)")
+
+    ocr_rows, confident_rows, vision_rows = [], [], []
+    loop = asyncio.new_event_loop()  # One loop for all vision calls: the pooled clients are bound to it
+    for image_path in sorted(args.fixtures.glob("*.png")):
+        truth = json.loads(image_path.with_suffix(".json").read_text())
+        image_bytes = image_path.read_bytes()
+
+        started = time.perf_counter()
+        result = run_local_ocr(image_bytes)
+        row = score(truth["meetings"], result.meetings) | {"seconds": time.perf_counter() - started}
+        ocr_rows.append(row)
+        if result.confidence >= SCREENSHOT_OCR_MIN_CONFIDENCE:
+            confident_rows.append(row)
+        print(f"{image_path.name}: confidence {result.confidence:.2f}, {row['exact']}/{row['expected']} exact")
+
+        if args.vision:
+            started = time.perf_counter()
+            found = loop.run_until_complete(run_vision(image_bytes, truth["target_date"]))
+            vision_rows.append(score(truth["meetings"], found) | {"seconds": time.perf_counter() - started})
+
+    print()
+    summarize("local OCR (all)", ocr_rows)
+    summarize("local OCR (confident)", confident_rows)
+    print(f"{'answered locally':<22} {len(confident_rows)}/{len(ocr_rows)} at confidence >= {SCREENSHOT_OCR_MIN_CONFIDENCE}")
+    summarize("vision model", vision_rows)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,112 @@
+"""
+Benchmark: CORS middleware overhead, the previous BaseHTTPMiddleware
+implementation vs the pure ASGI CORSHeadersMiddleware in main.py.
+
+Requests are driven straight through the ASGI interface (no server, no
+sockets), so the numbers are the per-request cost of the app + middleware.
+
+    cd backend && python -m scripts.benchmark_cors [--requests 5000]
+"""
+import argparse
+import asyncio
+import time
+
+from fastapi import FastAPI, Request, Response
+from fastapi.responses import StreamingResponse
+from starlette.middleware.base import BaseHTTPMiddleware
+
+from main import CORSHeadersMiddleware
+
+
+class LegacyCORSHeadersMiddleware(BaseHTTPMiddleware):
+    """The implementation this replaced, kept here only as the baseline"""
+    async def dispatch(self, request: Request, call_next):
+        if request.method == "OPTIONS":
+            response = Response(status_code=200)
+        else:
+            response = await call_next(request)
+        response.headers["Access-Control-Allow-Origin"] = "*"
+        response.headers["Access-Control-Allow-Methods"] = "GET, POST, PUT, DELETE, OPTIONS, PATCH"
+        response.headers["Access-Control-Allow-Headers"] = "*"
+        response.headers["Access-Control-Max-Age"] = "3600"
+        return response
+
+
+def build_app(middleware) -> FastAPI:
+    app = FastAPI()
+    app.add_middleware(middleware)
+
+    @app.get("/health")
+    async def health():
+        return {"status": "healthy"}
+
+    @app.get("/stream")
+    async def stream():
+        async def events():
+            for i in range(20):
+                yield f"event: item\ndata: {i}\n\n"
+        return StreamingResponse(events(), media_type="text/event-stream")
+
+    return app
+
+
+async def call(app, method: str, path: str) -> int:
+    scope = {
+        "type": "http", "asgi": {"version": "3.0"}, "http_version": "1.1", "method": method,
+        "scheme": "http", "path": path, "raw_path": path.encode(), "root_path": "", "query_string": b"",
+        "headers": [(b"host", b"bench"), (b"origin", b"http://localhost:5173")],
+        "client": ("127.0.0.1", 1234), "server": ("bench", 80),
+    }
+    status = 0
+    request_sent = False
+    response_done = asyncio.Event()
+
+    async def receive():
+        # Like a server: the request body first, then block until the client goes away
+        nonlocal request_sent
+        if not request_sent:
+            request_sent = True
+            return {"type": "http.request", "body": b"", "more_body": False}
+        await response_done.wait()
+        return {"type": "http.disconnect"}
+
+    async def send(message):
+        nonlocal status
+        if message["type"] == "http.response.start":
+            status = message["status"]
+            assert any(name.lower() == b"access-control-allow-origin" for name, _ in message["headers"])
+        elif not message.get("more_body"):
+            response_done.set()
+
+    await app(scope, receive, send)
+    return status
+
+
+async def requests_per_second(app, method: str, path: str, requests: int) -> float:
+    for _ in range(100):  # Warm up
+        await call(app, method, path)
+    started = time.perf_counter()
+    for _ in range(requests):
+        await call(app, method, path)
+    return requests / (time.perf_counter() - started)
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--requests", type=int, default=5000)
+    args = parser.parse_args()
+
+    apps = {"BaseHTTPMiddleware": build_app(LegacyCORSHeadersMiddleware), "pure ASGI": build_app(CORSHeadersMiddleware)}
+    cases = [("GET /health", "GET", "/health"), ("OPTIONS preflight", "OPTIONS", "/health"), ("GET /stream (SSE)", "GET", "/stream")]
+
+    async def run() -> None:
+        print(f"{'':<20}" + "".join(f"{name:>22}" for name in apps) + f"{'speedup':>10}")
+        for label, method, path in cases:
+            rates = [await requests_per_second(app, method, path, args.requests) for app in apps.values()]
+            print(f"{label:<20}" + "".join(f"{rate:>16.0f} req/s" for rate in rates) + f"{rates[1] / rates[0]:>9.1f}x")
+
+    asyncio.run(run())
+
+
+if __name__ == "__main__":
+    main()
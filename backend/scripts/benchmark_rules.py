@@ -0,0 +1,102 @@
+"""
+Microbenchmark: rule-based analysis / task extraction, per-pattern loop vs
+the precompiled rule engine.
+
+    cd backend && python -m scripts.benchmark_rules [--meetings 5000]
+"""
+import argparse
+import random
+import re
+import time
+
+from schemas import TaskCreate, ExtractTasksResponse
+from services import rule_engine
+
+SAMPLE_LINES = [
+    "- need to update the roadmap doc",
+    "discussed career growth and promotion",
+    "- TODO: send feedback to the team",
+    "feeling stuck on the project deadline",
+    "family health is good, happy with the progress",
+    "- צריך לסיים את הפרויקט עד יום חמישי",
+    "general chat about the week",
+    "urgent: fix the build asap",
+    "- will review the open PRs when possible",
+    "some frustrated comments on workload and overtime",
+    "",
+    "notes about everything that happened this week in the team",
+]
+
+LEGACY_ACTION_PATTERNS = [
+    r'^\s*[-•*]\s*(?:TODO|לעשות|משימה|action item)[:：]?\s*(.+)',
+    r'^\s*[-•*]\s*צריך\s+(.+)',
+    r'^\s*[-•*]\s*need to\s+(.+)',
+    r'^\s*[-•*]\s*should\s+(.+)',
+    r'^\s*[-•*]\s*will\s+(.+)',
+    r'(?:TODO|לעשות|משימה)[:：]\s*(.+)',
+]
+
+
+def legacy_extract_tasks(notes: str) -> ExtractTasksResponse:
+    """The previous implementation: up to six re.search calls per line"""
+    tasks = []
+    for line in notes.split('\n'):
+        line = line.strip()
+        if not line:
+            continue
+        for pattern in LEGACY_ACTION_PATTERNS:
+            match = re.search(pattern, line, re.IGNORECASE)
+            if match:
+                title = match.group(1).strip()
+                if len(title) > 5:
+                    priority = "medium"
+                    if any(word in line.lower() for word in ["urgent", "דחוף", "asap", "critical"]):
+                        priority = "high"
+                    elif any(word in line.lower() for word in ["when possible", "כשיהיה זמן", "low priority"]):
+                        priority = "low"
+                    tasks.append(TaskCreate(title=title[:200], task_type="from_meeting", priority=priority))
+                break
+    return ExtractTasksResponse(suggested_tasks=tasks)
+
+
+def legacy_scan(notes: str) -> int:
+    """Pattern matching only (no model construction) of the previous implementation"""
+    found = 0
+    for line in notes.split('\n'):
+        line = line.strip()
+        if line and any(re.search(pattern, line, re.IGNORECASE) for pattern in LEGACY_ACTION_PATTERNS):
+            found += 1
+    return found
+
+
+def timed(label: str, fn, corpus) -> float:
+    started = time.perf_counter()
+    fn(corpus)
+    elapsed = time.perf_counter() - started
+    print(f"{label:<28} {elapsed * 1000:8.1f} ms  {len(corpus) / elapsed:10.0f} meetings/s")
+    return elapsed
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--meetings", type=int, default=5000)
+    parser.add_argument("--seed", type=int, default=1)
+    args = parser.parse_args()
+
+    rng = random.Random(args.seed)
+    corpus = [
+        "\n".join(rng.choice(SAMPLE_LINES) for _ in range(rng.randint(5, 40)))
+        for _ in range(args.meetings)
+    ]
+
+    legacy = timed("scan: per-line patterns", lambda c: [legacy_scan(n) for n in c], corpus)
+    engine = timed("scan: compiled alternation", lambda c: [sum(1 for _ in rule_engine.ACTION_ITEM_RE.finditer(n)) for n in c], corpus)
+    print(f"{'speedup':<28} {legacy / engine:8.1f}x")
+    legacy = timed("tasks: per-line patterns", lambda c: [legacy_extract_tasks(n) for n in c], corpus)
+    engine = timed("tasks: rule engine batch", lambda c: rule_engine.extract_tasks_batch((n, None, None) for n in c), corpus)
+    print(f"{'speedup':<28} {legacy / engine:8.1f}x")
+    timed("analysis: rule engine batch", rule_engine.analyze_batch, corpus)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,161 @@
+"""
+Load test: event-loop latency under concurrent calendar and quick-notes
+traffic, async DB layer vs the old pattern (a sync Session queried inside an
+async def handler, which blocks the loop for the whole query).
+
+A ticker coroutine sleeps TICK seconds in a loop; how late it wakes up is the
+time the event loop was blocked. Runs in-process against a throwaway SQLite
+database (or DATABASE_URL if set).
+
+    cd backend && python -m scripts.load_test_async_db [--notes 2000] [--requests 400] [--concurrency 20]
+"""
+import argparse
+import asyncio
+import os
+import statistics
+import tempfile
+import time
+from datetime import datetime, timedelta
+
+if "DATABASE_URL" not in os.environ:
+    os.environ["DATABASE_URL"] = f"sqlite:///{tempfile.mkdtemp()}/load_test.db"
+
+import httpx
+from sqlalchemy import and_, desc
+from sqlalchemy.orm import selectinload
+
+from database import SessionLocal, init_db
+from main import app
+from models import CalendarMeeting, QuickNote, User
+from routers.quick_notes import QuickNoteResponse
+from schemas import CalendarMeetingResponse
+
+TICK = 0.005
+DAY = "2026-01-05"
+DAY_START = datetime(2026, 1, 5, 8)
+
+
+def seed(notes: int, meetings: int) -> int:
+    with SessionLocal() as db:
+        user = User(username=f"load-test-{time.time_ns()}", display_name="Load test")
+        db.add(user)
+        db.flush()
+        db.add_all(
+            QuickNote(user_id=user.id, title=f"Note {i}", content="Follow up on the roadmap " * 20, category="general")
+            for i in range(notes)
+        )
+        db.add_all(
+            CalendarMeeting(
+                user_id=user.id,
+                title=f"Meeting {i}",
+                start_time=DAY_START + timedelta(minutes=3 * i % 600),
+                end_time=DAY_START + timedelta(minutes=3 * i % 600 + 30)
+            )
+            for i in range(meetings)
+        )
+        db.commit()
+        return user.id
+
+
+@app.get("/load-test/sync-notes")
+async def sync_notes(user_id: int):
+    """The pre-async pattern, kept here only as the baseline"""
+    with SessionLocal() as db:
+        notes = db.query(QuickNote).options(selectinload(QuickNote.person)).filter(
+            QuickNote.user_id == user_id
+        ).order_by(desc(QuickNote.is_pinned), desc(QuickNote.updated_at)).all()
+        return {"notes": [
+            QuickNoteResponse.model_validate(n).model_copy(update={"person_name": n.person.name if n.person else None})
+            for n in notes
+        ], "total": len(notes)}
+
+
+@app.get("/load-test/sync-calendar")
+async def sync_calendar(user_id: int):
+    with SessionLocal() as db:
+        meetings = db.query(CalendarMeeting).options(selectinload(CalendarMeeting.prep_notes)).filter(
+            and_(
+                CalendarMeeting.user_id == user_id,
+                CalendarMeeting.start_time >= DAY_START.replace(hour=0),
+                CalendarMeeting.start_time < DAY_START.replace(hour=0) + timedelta(days=1)
+            )
+        ).order_by(CalendarMeeting.start_time).all()
+        return {"meetings": [CalendarMeetingResponse.model_validate(m) for m in meetings], "total": len(meetings)}
+
+
+async def ticker(lags: list, stop: asyncio.Event) -> None:
+    while not stop.is_set():
+        started = time.perf_counter()
+        await asyncio.sleep(TICK)
+        lags.append((time.perf_counter() - started - TICK) * 1000)
+
+
+async def run(paths: list, requests: int, concurrency: int) -> dict:
+    lags, latencies = [], []
+    stop = asyncio.Event()
+    semaphore = asyncio.Semaphore(concurrency)
+    transport = httpx.ASGITransport(app=app)
+
+    async with httpx.AsyncClient(transport=transport, base_url="http://load-test") as client:
+        async def one(i: int) -> None:
+            async with semaphore:
+                started = time.perf_counter()
+                response = await client.get(paths[i % len(paths)])
+                response.raise_for_status()
+                latencies.append((time.perf_counter() - started) * 1000)
+
+        tick = asyncio.create_task(ticker(lags, stop))
+        started = time.perf_counter()
+        await asyncio.gather(*(one(i) for i in range(requests)))
+        elapsed = time.perf_counter() - started
+        stop.set()
+        await tick
+
+    lags.sort()
+    latencies.sort()
+    return {
+        "rps": requests / elapsed,
+        "lag_p50": statistics.median(lags),
+        "lag_p99": lags[int(len(lags) * 0.99) - 1],
+        "lag_max": lags[-1],
+        "latency_p50": statistics.median(latencies),
+        "latency_p99": latencies[int(len(latencies) * 0.99) - 1],
+    }
+
+
+def report(name: str, result: dict) -> None:
+    print(
+        f"{name:<10} {result['rps']:7.1f} req/s | loop lag p50 {result['lag_p50']:6.2f} ms, "
+        f"p99 {result['lag_p99']:6.2f} ms, max {result['lag_max']:6.2f} ms | "
+        f"request p50 {result['latency_p50']:6.1f} ms, p99 {result['latency_p99']:6.1f} ms"
+    )
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--notes", type=int, default=2000)
+    parser.add_argument("--meetings", type=int, default=200)
+    parser.add_argument("--requests", type=int, default=400)
+    parser.add_argument("--concurrency", type=int, default=20)
+    args = parser.parse_args()
+
+    init_db()
+    user_id = seed(args.notes, args.meetings)
+    print(f"Seeded {args.notes} notes and {args.meetings} meetings, "
+          f"{args.requests} requests at concurrency {args.concurrency}")
+
+    async_paths = [f"/api/notes/?user_id={user_id}", f"/api/calendar/?target_date={DAY}&user_id={user_id}"]
+    sync_paths = [f"/load-test/sync-notes?user_id={user_id}", f"/load-test/sync-calendar?user_id={user_id}"]
+
+    async def compare() -> None:
+        # One event loop for all runs: pooled async connections belong to the loop that opened them
+        await run(async_paths, 20, 4)  # Warm up both engines
+        await run(sync_paths, 20, 4)
+        report("sync", await run(sync_paths, args.requests, args.concurrency))
+        report("async", await run(async_paths, args.requests, args.concurrency))
+
+    asyncio.run(compare())
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,63 @@
+"""
+Train the local topic/sentiment classifier on meetings already analyzed by
+an AI provider, and measure its scoring latency.
+
+    cd backend && python -m scripts.train_local_classifier
+    cd backend && python -m scripts.train_local_classifier --benchmark-only [--batch 256]
+
+Serving it needs LOCAL_CLASSIFIER=fallback or LOCAL_CLASSIFIER=prefer.
+"""
+import argparse
+import json
+import statistics
+import time
+
+from database import SessionLocal, init_db
+from models import LocalModel
+from services.local_classifier import MODEL_NAME, LocalClassifier, train_from_db, training_data
+
+
+def benchmark(classifier: LocalClassifier, texts: list, batch: int, rounds: int = 5) -> None:
+    if not texts:
+        return
+    texts = (texts * (batch // max(len(texts), 1) + 1))[:batch]
+    single, batched = [], []
+    for _ in range(rounds):
+        for text in texts[:100]:
+            started = time.perf_counter()
+            classifier.predict([text])
+            single.append(time.perf_counter() - started)
+        started = time.perf_counter()
+        classifier.predict(texts)
+        batched.append((time.perf_counter() - started) / len(texts))
+    print(f"one meeting per call: p50 {statistics.median(single) * 1e6:8.0f} us")
+    print(f"batches of {len(texts):<9} {statistics.median(batched) * 1e6:8.0f} us per meeting")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--benchmark-only", action="store_true", help="Benchmark the stored model without training")
+    parser.add_argument("--batch", type=int, default=256)
+    args = parser.parse_args()
+
+    init_db()
+    with SessionLocal() as db:
+        if args.benchmark_only:
+            model = db.query(LocalModel).filter(LocalModel.name == MODEL_NAME).order_by(LocalModel.id.desc()).first()
+            if not model:
+                raise SystemExit("No trained local model")
+        else:
+            try:
+                model = train_from_db(db)
+            except ValueError as e:
+                raise SystemExit(str(e))
+            print(json.dumps(json.loads(model.metrics), indent=2))
+        classifier = LocalClassifier.from_bytes(model.data, model.id)
+        texts, _, _ = training_data(db)
+
+    print(f"Model {model.id}: {model.samples} meetings, {len(classifier.topics)} topics, {len(model.data) / 1e6:.1f} MB stored")
+    benchmark(classifier, texts, args.batch)
+
+
+if __name__ == "__main__":
+    main()
@@ -1,90 +1,271 @@
 import os
 import json
-import re
+import asyncio
 from typing import List, Optional
-import httpx
 
-from schemas import AIAnalysisResponse, TaskCreate, ExtractTasksResponse
+from sqlalchemy.orm import Session
+
+from schemas import AIAnalysisResponse, TaskCreate, ExtractTasksResponse, MeetingAnalysisResponse
+from services import rule_engine
+from services.analysis_cache import AnalysisCache
+from services.note_chunks import split_notes, split_paragraphs, estimate_tokens, merge_chunk_analyses
+from services.hedging import timed_call
+from services.provider_router import provider_router
+from services.http_client import AIHttpClients, ai_http_clients, ai_timeout
+from services.ai_stream import StreamSink, stream_completion
+from services.local_classifier import local_classifier, LOCAL_CLASSIFIER, LOCAL_CLASSIFIER_MIN_CONFIDENCE
+
+
+# Bump when a prompt template changes so cached answers are invalidated
+ANALYSIS_PROMPT_VERSION = "1"
+TASKS_PROMPT_VERSION = "1"
+
+# Notes above this size take the map-reduce path instead of one big prompt
+LONG_NOTES_TOKENS = int(os.getenv("LONG_NOTES_TOKENS", "4000"))
+LONG_NOTES_PART_TOKENS = int(os.getenv("LONG_NOTES_PART_TOKENS", "2500"))
+# Notes up to this size are analyzed in one call; only longer ones are chunked
+INCREMENTAL_NOTES_TOKENS = int(os.getenv("INCREMENTAL_NOTES_TOKENS", "2000"))
+
+COMBINED_SYSTEM_PROMPT = (
+    "You are an expert HR analyst specializing in 1:1 meeting analysis and in extracting "
+    "action items from meeting notes. Respond only with valid JSON."
+)
 
 
 class AIAnalyzer:
     """Service for analyzing meeting notes using AI (OpenAI or Anthropic)"""
     
-    def __init__(self):
+    def __init__(self, http: Optional[AIHttpClients] = None, db: Optional[Session] = None):
         self.openai_api_key = os.getenv("OPENAI_API_KEY")
         self.anthropic_api_key = os.getenv("ANTHROPIC_API_KEY")
+        self.http = http or ai_http_clients
+        self.db = db  # Enables the persistent analysis cache when given
+        self.last_source: Optional[str] = None  # provider:model (or "rules" / "local") behind the last answer
+
+    @property
+    def from_provider(self) -> bool:
+        """True if the last answer came from an AI provider (not the rules or the local model)"""
+        return self.last_source not in (None, "rules", "local")
+
+    def _cache(self, kind: str, prompt_version: str) -> Optional[AnalysisCache]:
+        return AnalysisCache(self.db, kind, prompt_version) if self.db is not None else None
+
+    @staticmethod
+    def _cache_models(ordered: list, providers: list) -> List[str]:
+        """Provider keys to look up in the cache, routed preference first"""
+        keys = [key for key, _ in ordered]
+        return keys + [key for key, _ in providers if key not in keys]
         
-    async def analyze_notes(self, notes: str) -> AIAnalysisResponse:
+    async def analyze_notes(
+        self,
+        notes: str,
+        use_rules_fallback: bool = True,
+        sink: Optional[StreamSink] = None,
+        require_insights: bool = False
+    ) -> AIAnalysisResponse:
         """
         Analyze meeting notes and extract insights, topics, and sentiment.
-        Falls back to rule-based analysis if no API key is available.
+        Providers are tried fastest-healthy-first; falls back to rule-based
+        analysis if no API key is available or every provider fails (or
+        raises instead when use_rules_fallback is False).
+        AI answers are cached per notes/prompt version/model (rules are not).
+        Very long notes are analyzed with map-reduce (see analyze_long_notes).
+        With a sink the provider answer is streamed into it as it arrives.
+        With LOCAL_CLASSIFIER=prefer a confident local-model answer is returned
+        before any provider call, unless the caller needs provider insights
+        (require_insights) or refuses non-provider answers (use_rules_fallback).
         """
+        local_ok = use_rules_fallback and not require_insights
+        if estimate_tokens(notes) > LONG_NOTES_TOKENS:
+            local = self._analyze_locally(notes) if local_ok else None
+            if local:
+                return local
+            result = await self.analyze_long_notes(notes, use_rules_fallback=use_rules_fallback)
+            return AIAnalysisResponse(**result.model_dump(exclude={"suggested_tasks"}))
+        
+        providers = []
         if self.openai_api_key:
-            return await self._analyze_with_openai(notes)
-        elif self.anthropic_api_key:
-            return await self._analyze_with_anthropic(notes)
-        else:
-            return self._analyze_with_rules(notes)
+            providers.append(("openai:gpt-4o", self._analyze_with_openai))
+        if self.anthropic_api_key:
+            providers.append(("anthropic:claude-3-5-sonnet-20241022", self._analyze_with_anthropic))
+        
+        ordered = provider_router.order(providers, key=lambda p: p[0])
+        cache = self._cache("analysis", ANALYSIS_PROMPT_VERSION)
+        if cache:
+            hit = cache.get(notes, self._cache_models(ordered, providers))
+            if hit:
+                self.last_source = hit[0]
+                return AIAnalysisResponse(**hit[1], cached=True)
+        
+        local = self._analyze_locally(notes) if local_ok else None
+        if local:
+            return local
+        
+        for key, call in ordered:
+            try:
+                result = await timed_call(key, lambda call=call: call(notes, sink))
+            except Exception as e:
+                print(f"[AI Analyzer] {key} failed: {e}")
+                continue
+            if cache:
+                cache.set(notes, key, result.model_dump(exclude={"cached"}))
+            self.last_source = key
+            return result
+        
+        if not use_rules_fallback:
+            raise RuntimeError("No AI provider could analyze the notes")
+        self.last_source = "rules"
+        return self._analyze_with_rules(notes)
+    
+    async def analyze_notes_incremental(
+        self, notes: str, sink: Optional[StreamSink] = None, require_insights: bool = False
+    ) -> AIAnalysisResponse:
+        """
+        Analyze long notes chunk by chunk (see services/note_chunks.py).
+        Each chunk's result is cached by its content hash, so after an edit
+        only the changed chunks go to a provider; the stored and new chunk
+        results are then merged locally. Notes up to INCREMENTAL_NOTES_TOKENS
+        (or that fit in one chunk) take the regular single-call path, which
+        streams into the sink if one is given: for ordinary notes one call is
+        cheaper than a full prompt per chunk. Notes above LONG_NOTES_TOKENS go
+        to analyze_notes as well, which runs map-reduce (see analyze_long_notes).
+        The local-model tier (see analyze_notes) classifies the whole notes first.
+        """
+        tokens = estimate_tokens(notes)
+        chunks = split_notes(notes) if INCREMENTAL_NOTES_TOKENS < tokens <= LONG_NOTES_TOKENS else [notes]
+        if len(chunks) <= 1:
+            return await self.analyze_notes(notes, sink=sink, require_insights=require_insights)
+        
+        local = self._analyze_locally(notes) if not require_insights else None
+        if local:
+            return local
+        
+        providers = []
+        if self.openai_api_key:
+            providers.append(("openai:gpt-4o", self._analyze_with_openai))
+        if self.anthropic_api_key:
+            providers.append(("anthropic:claude-3-5-sonnet-20241022", self._analyze_with_anthropic))
+        
+        ordered = provider_router.order(providers, key=lambda p: p[0])
+        cache = self._cache("analysis_chunk", ANALYSIS_PROMPT_VERSION)
+        results: List[Optional[AIAnalysisResponse]] = [None] * len(chunks)
+        sources: List[str] = [""] * len(chunks)
+        if cache:
+            models = self._cache_models(ordered, providers)
+            for i, chunk in enumerate(chunks):
+                hit = cache.get(chunk, models)
+                if hit:
+                    sources[i], results[i] = hit[0], AIAnalysisResponse(**hit[1])
+        
+        async def analyze_chunk(chunk: str):
+            for key, call in ordered:
+                try:
+                    return key, await timed_call(key, lambda call=call: call(chunk))
+                except Exception as e:
+                    print(f"[AI Analyzer] {key} failed: {e}")
+            return "rules", self._analyze_with_rules(chunk)
+        
+        missing = [i for i, result in enumerate(results) if result is None]
+        fresh = await asyncio.gather(*(analyze_chunk(chunks[i]) for i in missing))
+        for i, (key, result) in zip(missing, fresh):
+            sources[i], results[i] = key, result
+            if cache and key != "rules":
+                cache.set(chunks[i], key, result.model_dump(exclude={"cached"}))
+        
+        print(f"[AI Analyzer] Incremental analysis: {len(missing)}/{len(chunks)} chunks sent to a provider")
+        self.last_source = "rules" if "rules" in sources else sources[0]
+        merged = merge_chunk_analyses(chunks, results)
+        merged.cached = not missing
+        return merged
     
-    async def _analyze_with_openai(self, notes: str) -> AIAnalysisResponse:
-        """Use OpenAI API for analysis"""
+    async def _analyze_with_openai(self, notes: str, sink: Optional[StreamSink] = None) -> AIAnalysisResponse:
+        """Use OpenAI API for analysis (raises on API errors)"""
         prompt = self._build_prompt(notes)
         
-        async with httpx.AsyncClient() as client:
-            response = await client.post(
-                "https://api.openai.com/v1/chat/completions",
-                headers={
-                    "Authorization": f"Bearer {self.openai_api_key}",
-                    "Content-Type": "application/json"
-                },
-                json={
-                    "model": "gpt-4o",
-                    "messages": [
-                        {"role": "system", "content": "You are an expert HR analyst specializing in 1:1 meeting analysis. Respond only with valid JSON."},
-                        {"role": "user", "content": prompt}
-                    ],
-                    "temperature": 0.3,
-                    "max_tokens": 1000
-                },
-                timeout=30.0
+        client = self.http.get("openai")
+        url = "https://api.openai.com/v1/chat/completions"
+        headers = {
+            "Authorization": f"Bearer {self.openai_api_key}",
+            "Content-Type": "application/json"
+        }
+        body = {
+            "model": "gpt-4o",
+            "messages": [
+                {"role": "system", "content": "You are an expert HR analyst specializing in 1:1 meeting analysis. Respond only with valid JSON."},
+                {"role": "user", "content": prompt}
+            ],
+            "temperature": 0.3,
+            "max_tokens": 1000
+        }
+        if sink is not None:
+            content = await stream_completion(
+                client, "openai", url, headers, {**body, "stream": True}, ai_timeout(30.0), sink
             )
-            
-            if response.status_code == 200:
-                data = response.json()
-                content = data["choices"][0]["message"]["content"]
-                return self._parse_ai_response(content)
-            else:
-                return self._analyze_with_rules(notes)
+            return self._parse_ai_response(content)
+        
+        response = await client.post(url, headers=headers, json=body, timeout=ai_timeout(30.0))
+        
+        if response.status_code == 200:
+            data = response.json()
+            content = data["choices"][0]["message"]["content"]
+            return self._parse_ai_response(content)
+        else:
+            raise Exception(f"OpenAI API error (status {response.status_code}): {response.text}")
     
-    async def _analyze_with_anthropic(self, notes: str) -> AIAnalysisResponse:
-        """Use Anthropic API for analysis"""
+    async def _analyze_with_anthropic(self, notes: str, sink: Optional[StreamSink] = None) -> AIAnalysisResponse:
+        """Use Anthropic API for analysis (raises on API errors)"""
         prompt = self._build_prompt(notes)
         
-        async with httpx.AsyncClient() as client:
-            response = await client.post(
-                "https://api.anthropic.com/v1/messages",
-                headers={
-                    "x-api-key": self.anthropic_api_key,
-                    "anthropic-version": "2023-06-01",
-                    "Content-Type": "application/json"
-                },
-                json={
-                    "model": "claude-3-5-sonnet-20241022",
-                    "max_tokens": 1000,
-                    "messages": [
-                        {"role": "user", "content": prompt}
-                    ],
-                    "system": "You are an expert HR analyst specializing in 1:1 meeting analysis. Respond only with valid JSON."
-                },
-                timeout=30.0
+        client = self.http.get("anthropic")
+        url = "https://api.anthropic.com/v1/messages"
+        headers = {
+            "x-api-key": self.anthropic_api_key,
+            "anthropic-version": "2023-06-01",
+            "Content-Type": "application/json"
+        }
+        body = {
+            "model": "claude-3-5-sonnet-20241022",
+            "max_tokens": 1000,
+            "messages": [
+                {"role": "user", "content": prompt}
+            ],
+            "system": "You are an expert HR analyst specializing in 1:1 meeting analysis. Respond only with valid JSON."
+        }
+        if sink is not None:
+            content = await stream_completion(
+                client, "anthropic", url, headers, {**body, "stream": True}, ai_timeout(30.0), sink
             )
-            
-            if response.status_code == 200:
-                data = response.json()
-                content = data["content"][0]["text"]
-                return self._parse_ai_response(content)
-            else:
-                return self._analyze_with_rules(notes)
+            return self._parse_ai_response(content)
+        
+        response = await client.post(url, headers=headers, json=body, timeout=ai_timeout(30.0))
+        
+        if response.status_code == 200:
+            data = response.json()
+            content = data["content"][0]["text"]
+            return self._parse_ai_response(content)
+        else:
+            raise Exception(f"Anthropic API error (status {response.status_code}): {response.text}")
+    
+    def openai_batch_request(self, custom_id: str, notes: str) -> dict:
+        """One line of an OpenAI Batch API input file for analyzing these notes"""
+        return {
+            "custom_id": custom_id,
+            "method": "POST",
+            "url": "/v1/chat/completions",
+            "body": {
+                "model": "gpt-4o",
+                "messages": [
+                    {"role": "system", "content": "You are an expert HR analyst specializing in 1:1 meeting analysis. Respond only with valid JSON."},
+                    {"role": "user", "content": self._build_prompt(notes)}
+                ],
+                "temperature": 0.3,
+                "max_tokens": 1000
+            }
+        }
+
+    def parse_analysis(self, content: str) -> AIAnalysisResponse:
+        """Parse a raw model answer to the analysis prompt (raises ValueError if it is not JSON)"""
+        return self._parse_ai_response(content)
     
     def _build_prompt(self, notes: str) -> str:
         """Build the analysis prompt"""
@@ -107,174 +288,197 @@ Respond in JSON format:
     "action_items_suggested": ["action1", "action2"]
 }}"""
     
+    @staticmethod
+    def _load_json_answer(content: str) -> dict:
+        """
+        The JSON object in a model answer (markdown code fences removed).
+        Raises ValueError when the answer is not a JSON object, so the call
+        counts as failed and nothing is cached.
+        """
+        content = content.strip()
+        if content.startswith("```json"):
+            content = content[7:]
+        if content.startswith("```"):
+            content = content[3:]
+        if content.endswith("```"):
+            content = content[:-3]
+        data = json.loads(content.strip())
+        if not isinstance(data, dict):
+            raise ValueError("Unexpected JSON shape in the model answer")
+        return data
+
     def _parse_ai_response(self, content: str) -> AIAnalysisResponse:
-        """Parse AI response JSON"""
-        try:
-            # Clean up the response (remove markdown code blocks if present)
-            content = content.strip()
-            if content.startswith("```json"):
-                content = content[7:]
-            if content.startswith("```"):
-                content = content[3:]
-            if content.endswith("```"):
-                content = content[:-3]
-            
-            data = json.loads(content.strip())
-            return AIAnalysisResponse(
-                insights=data.get("insights", ""),
-                topics=data.get("topics", []),
-                sentiment=data.get("sentiment", "neutral"),
-                action_items_suggested=data.get("action_items_suggested", [])
-            )
-        except json.JSONDecodeError:
-            return AIAnalysisResponse(
-                insights=content,
-                topics=[],
-                sentiment="neutral",
-                action_items_suggested=[]
-            )
+        """Parse AI response JSON (raises ValueError on an unusable answer)"""
+        data = self._load_json_answer(content)
+        return AIAnalysisResponse(
+            insights=data.get("insights", ""),
+            topics=data.get("topics", []),
+            sentiment=data.get("sentiment", "neutral"),
+            action_items_suggested=data.get("action_items_suggested", [])
+        )
     
-    def _analyze_with_rules(self, notes: str) -> AIAnalysisResponse:
-        """Rule-based fallback analysis when no API key is available"""
-        notes_lower = notes.lower()
-        
-        # Extract topics based on keywords
-        topic_keywords = {
-            "career": ["career", "promotion", "growth", "קידום", "קריירה"],
-            "feedback": ["feedback", "review", "פידבק", "משוב"],
-            "blockers": ["blocker", "stuck", "problem", "issue", "חסימה", "בעיה"],
-            "project": ["project", "deadline", "delivery", "פרויקט", "דדליין"],
-            "personal": ["personal", "family", "health", "אישי", "משפחה", "בריאות"],
-            "learning": ["learning", "course", "training", "למידה", "קורס", "הכשרה"],
-            "team": ["team", "collaboration", "צוות", "שיתוף פעולה"],
-            "workload": ["workload", "overtime", "stress", "עומס", "שעות נוספות", "לחץ"]
-        }
-        
-        topics = []
-        for topic, keywords in topic_keywords.items():
-            if any(kw in notes_lower for kw in keywords):
-                topics.append(topic)
-        
-        # Determine sentiment
-        positive_words = ["great", "excellent", "happy", "good", "success", "מצוין", "טוב", "שמח", "הצלחה"]
-        negative_words = ["problem", "issue", "frustrated", "unhappy", "difficult", "בעיה", "מתוסכל", "קשה"]
-        
-        positive_count = sum(1 for word in positive_words if word in notes_lower)
-        negative_count = sum(1 for word in negative_words if word in notes_lower)
-        
-        if positive_count > negative_count:
-            sentiment = "positive"
-        elif negative_count > positive_count:
-            sentiment = "negative"
-        else:
-            sentiment = "neutral"
-        
-        # Generate insights
-        insights_parts = []
-        if topics:
-            insights_parts.append(f"Main discussion areas: {', '.join(topics)}.")
-        if sentiment == "positive":
-            insights_parts.append("Overall positive tone in the conversation.")
-        elif sentiment == "negative":
-            insights_parts.append("Some concerns or challenges were discussed.")
-        
-        insights = " ".join(insights_parts) if insights_parts else "Standard 1:1 discussion."
-        
-        # Suggest action items based on content
-        action_items = []
-        if "blocker" in notes_lower or "חסימה" in notes_lower:
-            action_items.append("Follow up on blockers mentioned")
-        if "deadline" in notes_lower or "דדליין" in notes_lower:
-            action_items.append("Review project timeline")
-        if "feedback" in notes_lower or "משוב" in notes_lower:
-            action_items.append("Provide requested feedback")
-        
+    def _analyze_locally(self, notes: str) -> Optional[AIAnalysisResponse]:
+        """
+        Local-model topics and sentiment with template insights when
+        LOCAL_CLASSIFIER=prefer and the prediction is confident enough;
+        None means a provider should answer.
+        """
+        if LOCAL_CLASSIFIER != "prefer":
+            return None
+        classifier = local_classifier.get(self.db)
+        if self.db is not None:
+            self.db.commit()  # End the model lookup so the connection isn't held during a provider call
+        if classifier is None:
+            return None
+        prediction = classifier.predict([notes])[0]
+        if prediction.confidence < LOCAL_CLASSIFIER_MIN_CONFIDENCE:
+            return None
+        self.last_source = "local"
         return AIAnalysisResponse(
-            insights=insights,
-            topics=topics if topics else ["general"],
-            sentiment=sentiment,
-            action_items_suggested=action_items
+            insights=rule_engine.summarize(prediction.topics, prediction.sentiment),
+            topics=prediction.topics,
+            sentiment=prediction.sentiment,
+            action_items_suggested=rule_engine.analyze(notes).action_items_suggested
         )
 
+    def _analyze_with_rules(self, notes: str) -> AIAnalysisResponse:
+        """
+        Rule-based fallback analysis when no API key is available. With a
+        trained local model (LOCAL_CLASSIFIER != off) its topics and sentiment
+        replace the keyword matches.
+        """
+        analysis = rule_engine.analyze(notes)
+        classifier = local_classifier.get(self.db)
+        if classifier is None:
+            return analysis
+        prediction = classifier.predict([notes])[0]
+        if not prediction.topics:
+            return analysis
+        return analysis.model_copy(update={
+            "topics": prediction.topics,
+            "sentiment": prediction.sentiment,
+            "insights": rule_engine.summarize(prediction.topics, prediction.sentiment)
+        })
+
     async def extract_tasks_from_notes(
         self, 
         notes: str, 
         person_id: Optional[int] = None,
-        meeting_id: Optional[int] = None
+        meeting_id: Optional[int] = None,
+        sink: Optional[StreamSink] = None
     ) -> ExtractTasksResponse:
         """
         Extract tasks from meeting notes using AI or rule-based approach.
+        Providers are tried fastest-healthy-first, then the rules as a fallback.
+        Cached tasks are keyed by the notes only and re-stamped with the
+        person/meeting ids of the current request.
         """
+        if estimate_tokens(notes) > LONG_NOTES_TOKENS:
+            result = await self.analyze_long_notes(notes, person_id, meeting_id)
+            return ExtractTasksResponse(suggested_tasks=result.suggested_tasks)
+        
+        providers = []
         if self.openai_api_key:
-            return await self._extract_tasks_openai(notes, person_id, meeting_id)
-        elif self.anthropic_api_key:
-            return await self._extract_tasks_anthropic(notes, person_id, meeting_id)
-        else:
-            return self._extract_tasks_rules(notes, person_id, meeting_id)
+            providers.append(("openai:gpt-4o", self._extract_tasks_openai))
+        if self.anthropic_api_key:
+            providers.append(("anthropic:claude-3-5-sonnet-20241022", self._extract_tasks_anthropic))
+        
+        ordered = provider_router.order(providers, key=lambda p: p[0])
+        cache = self._cache("tasks", TASKS_PROMPT_VERSION)
+        if cache:
+            hit = cache.get(notes, self._cache_models(ordered, providers))
+            if hit:
+                tasks = [
+                    TaskCreate(**{**task, "person_id": person_id, "meeting_id": meeting_id})
+                    for task in hit[1]["suggested_tasks"]
+                ]
+                return ExtractTasksResponse(suggested_tasks=tasks, cached=True)
+        
+        for key, call in ordered:
+            try:
+                result = await timed_call(key, lambda call=call: call(notes, person_id, meeting_id, sink))
+            except Exception as e:
+                print(f"[AI Analyzer] {key} failed: {e}")
+                continue
+            if cache:
+                cache.set(notes, key, result.model_dump(exclude={"cached"}))
+            return result
+        
+        return self._extract_tasks_rules(notes, person_id, meeting_id)
 
     async def _extract_tasks_openai(
-        self, notes: str, person_id: Optional[int], meeting_id: Optional[int]
+        self, notes: str, person_id: Optional[int], meeting_id: Optional[int],
+        sink: Optional[StreamSink] = None
     ) -> ExtractTasksResponse:
         """Use OpenAI to extract tasks"""
         prompt = self._build_task_extraction_prompt(notes)
         
-        async with httpx.AsyncClient() as client:
-            response = await client.post(
-                "https://api.openai.com/v1/chat/completions",
-                headers={
-                    "Authorization": f"Bearer {self.openai_api_key}",
-                    "Content-Type": "application/json"
-                },
-                json={
-                    "model": "gpt-4o",
-                    "messages": [
-                        {"role": "system", "content": "You are an expert at extracting action items and tasks from meeting notes. Respond only with valid JSON."},
-                        {"role": "user", "content": prompt}
-                    ],
-                    "temperature": 0.3,
-                    "max_tokens": 1000
-                },
-                timeout=30.0
+        client = self.http.get("openai")
+        url = "https://api.openai.com/v1/chat/completions"
+        headers = {
+            "Authorization": f"Bearer {self.openai_api_key}",
+            "Content-Type": "application/json"
+        }
+        body = {
+            "model": "gpt-4o",
+            "messages": [
+                {"role": "system", "content": "You are an expert at extracting action items and tasks from meeting notes. Respond only with valid JSON."},
+                {"role": "user", "content": prompt}
+            ],
+            "temperature": 0.3,
+            "max_tokens": 1000
+        }
+        if sink is not None:
+            content = await stream_completion(
+                client, "openai", url, headers, {**body, "stream": True}, ai_timeout(30.0), sink
             )
-            
-            if response.status_code == 200:
-                data = response.json()
-                content = data["choices"][0]["message"]["content"]
-                return self._parse_tasks_response(content, person_id, meeting_id)
-            else:
-                return self._extract_tasks_rules(notes, person_id, meeting_id)
+            return self._parse_tasks_response(content, person_id, meeting_id)
+        
+        response = await client.post(url, headers=headers, json=body, timeout=ai_timeout(30.0))
+        
+        if response.status_code == 200:
+            data = response.json()
+            content = data["choices"][0]["message"]["content"]
+            return self._parse_tasks_response(content, person_id, meeting_id)
+        else:
+            raise Exception(f"OpenAI API error (status {response.status_code}): {response.text}")
 
     async def _extract_tasks_anthropic(
-        self, notes: str, person_id: Optional[int], meeting_id: Optional[int]
+        self, notes: str, person_id: Optional[int], meeting_id: Optional[int],
+        sink: Optional[StreamSink] = None
     ) -> ExtractTasksResponse:
         """Use Anthropic to extract tasks"""
         prompt = self._build_task_extraction_prompt(notes)
         
-        async with httpx.AsyncClient() as client:
-            response = await client.post(
-                "https://api.anthropic.com/v1/messages",
-                headers={
-                    "x-api-key": self.anthropic_api_key,
-                    "anthropic-version": "2023-06-01",
-                    "Content-Type": "application/json"
-                },
-                json={
-                    "model": "claude-3-5-sonnet-20241022",
-                    "max_tokens": 1000,
-                    "messages": [
-                        {"role": "user", "content": prompt}
-                    ],
-                    "system": "You are an expert at extracting action items and tasks from meeting notes. Respond only with valid JSON."
-                },
-                timeout=30.0
+        client = self.http.get("anthropic")
+        url = "https://api.anthropic.com/v1/messages"
+        headers = {
+            "x-api-key": self.anthropic_api_key,
+            "anthropic-version": "2023-06-01",
+            "Content-Type": "application/json"
+        }
+        body = {
+            "model": "claude-3-5-sonnet-20241022",
+            "max_tokens": 1000,
+            "messages": [
+                {"role": "user", "content": prompt}
+            ],
+            "system": "You are an expert at extracting action items and tasks from meeting notes. Respond only with valid JSON."
+        }
+        if sink is not None:
+            content = await stream_completion(
+                client, "anthropic", url, headers, {**body, "stream": True}, ai_timeout(30.0), sink
             )
-            
-            if response.status_code == 200:
-                data = response.json()
-                content = data["content"][0]["text"]
-                return self._parse_tasks_response(content, person_id, meeting_id)
-            else:
-                return self._extract_tasks_rules(notes, person_id, meeting_id)
+            return self._parse_tasks_response(content, person_id, meeting_id)
+        
+        response = await client.post(url, headers=headers, json=body, timeout=ai_timeout(30.0))
+        
+        if response.status_code == 200:
+            data = response.json()
+            content = data["content"][0]["text"]
+            return self._parse_tasks_response(content, person_id, meeting_id)
+        else:
+            raise Exception(f"Anthropic API error (status {response.status_code}): {response.text}")
 
     def _build_task_extraction_prompt(self, notes: str) -> str:
         """Build prompt for task extraction"""
@@ -307,20 +511,10 @@ Only include clear action items. If no tasks are found, return an empty array.""
     def _parse_tasks_response(
         self, content: str, person_id: Optional[int], meeting_id: Optional[int]
     ) -> ExtractTasksResponse:
-        """Parse AI response for tasks"""
+        """Parse AI response for tasks (raises ValueError on an unusable answer)"""
+        data = self._load_json_answer(content)
+        tasks = []
         try:
-            # Clean up response
-            content = content.strip()
-            if content.startswith("```json"):
-                content = content[7:]
-            if content.startswith("```"):
-                content = content[3:]
-            if content.endswith("```"):
-                content = content[:-3]
-            
-            data = json.loads(content.strip())
-            tasks = []
-            
             for task_data in data.get("tasks", []):
                 task = TaskCreate(
                     title=task_data.get("title", ""),
@@ -332,54 +526,280 @@ Only include clear action items. If no tasks are found, return an empty array.""
                 )
                 if task.title:
                     tasks.append(task)
-            
-            return ExtractTasksResponse(suggested_tasks=tasks)
-        except json.JSONDecodeError:
-            return ExtractTasksResponse(suggested_tasks=[])
+        except (AttributeError, TypeError) as e:
+            raise ValueError(f"Unexpected task in the model answer: {e}")
+        
+        return ExtractTasksResponse(suggested_tasks=tasks)
 
     def _extract_tasks_rules(
         self, notes: str, person_id: Optional[int], meeting_id: Optional[int]
     ) -> ExtractTasksResponse:
         """Rule-based task extraction fallback"""
-        tasks = []
-        lines = notes.split('\n')
-        
-        # Patterns that indicate action items
-        action_patterns = [
-            r'^\s*[-•*]\s*(?:TODO|לעשות|משימה|action item)[:：]?\s*(.+)',
-            r'^\s*[-•*]\s*צריך\s+(.+)',
-            r'^\s*[-•*]\s*need to\s+(.+)',
-            r'^\s*[-•*]\s*should\s+(.+)',
-            r'^\s*[-•*]\s*will\s+(.+)',
-            r'(?:TODO|לעשות|משימה)[:：]\s*(.+)',
-        ]
-        
-        for line in lines:
-            line = line.strip()
-            if not line:
+        return rule_engine.extract_tasks(notes, person_id, meeting_id)
+
+    async def analyze_meeting(
+        self,
+        notes: str,
+        person_id: Optional[int] = None,
+        meeting_id: Optional[int] = None
+    ) -> MeetingAnalysisResponse:
+        """
+        Analysis and task extraction in one provider call.
+        The answer is split into the analysis and tasks caches, so the
+        separate analyze / extract-tasks paths reuse it, and a hit in both
+        caches skips the call entirely.
+        """
+        if estimate_tokens(notes) > LONG_NOTES_TOKENS:
+            return await self.analyze_long_notes(notes, person_id, meeting_id)
+        
+        providers = []
+        if self.openai_api_key:
+            providers.append(("openai:gpt-4o", self._complete_openai))
+        if self.anthropic_api_key:
+            providers.append(("anthropic:claude-3-5-sonnet-20241022", self._complete_anthropic))
+        
+        ordered = provider_router.order(providers, key=lambda p: p[0])
+        analysis_cache = self._cache("analysis", ANALYSIS_PROMPT_VERSION)
+        tasks_cache = self._cache("tasks", TASKS_PROMPT_VERSION)
+        if analysis_cache and tasks_cache:
+            models = self._cache_models(ordered, providers)
+            analysis_hit = analysis_cache.get(notes, models)
+            tasks_hit = tasks_cache.get(notes, models) if analysis_hit else None
+            if analysis_hit and tasks_hit:
+                tasks = [
+                    TaskCreate(**{**task, "person_id": person_id, "meeting_id": meeting_id})
+                    for task in tasks_hit[1]["suggested_tasks"]
+                ]
+                self.last_source = analysis_hit[0]
+                return MeetingAnalysisResponse(**analysis_hit[1], suggested_tasks=tasks, cached=True)
+        
+        prompt = self._build_combined_prompt(notes)
+        for key, call in ordered:
+            try:
+                content = await timed_call(key, lambda call=call: call(COMBINED_SYSTEM_PROMPT, prompt, 1500))
+                analysis = self._parse_ai_response(content)
+                tasks = self._parse_tasks_response(content, person_id, meeting_id)
+            except Exception as e:
+                print(f"[AI Analyzer] {key} failed: {e}")
                 continue
-            
-            for pattern in action_patterns:
-                match = re.search(pattern, line, re.IGNORECASE)
-                if match:
-                    title = match.group(1).strip()
-                    if len(title) > 5:  # Filter very short matches
-                        # Determine priority based on keywords
-                        priority = "medium"
-                        if any(word in line.lower() for word in ["urgent", "דחוף", "asap", "critical"]):
-                            priority = "high"
-                        elif any(word in line.lower() for word in ["when possible", "כשיהיה זמן", "low priority"]):
-                            priority = "low"
-                        
-                        task = TaskCreate(
-                            title=title[:200],  # Limit length
-                            description=None,
-                            task_type="from_meeting",
-                            priority=priority,
-                            person_id=person_id,
-                            meeting_id=meeting_id
-                        )
-                        tasks.append(task)
-                    break
+            if analysis_cache and tasks_cache:
+                analysis_cache.set(notes, key, analysis.model_dump(exclude={"cached"}))
+                tasks_cache.set(notes, key, tasks.model_dump(exclude={"cached"}))
+            self.last_source = key
+            return MeetingAnalysisResponse(**analysis.model_dump(), suggested_tasks=tasks.suggested_tasks)
         
-        return ExtractTasksResponse(suggested_tasks=tasks)
+        self.last_source = "rules"
+        analysis = self._analyze_with_rules(notes)
+        tasks = self._extract_tasks_rules(notes, person_id, meeting_id)
+        return MeetingAnalysisResponse(**analysis.model_dump(), suggested_tasks=tasks.suggested_tasks)
+
+    async def analyze_long_notes(
+        self,
+        notes: str,
+        person_id: Optional[int] = None,
+        meeting_id: Optional[int] = None,
+        use_rules_fallback: bool = True
+    ) -> MeetingAnalysisResponse:
+        """
+        Map-reduce analysis for notes too long for one prompt.
+        Map: the notes are split at paragraph boundaries into parts of at
+        most LONG_NOTES_PART_TOKENS and every part gets the combined
+        analysis + tasks prompt concurrently. Reduce: one short call merges
+        the partial results (not the notes) into the final answer. Wall-clock
+        time follows the slowest part instead of the whole document.
+        The final result fills the analysis and tasks caches like analyze_meeting.
+        """
+        providers = []
+        if self.openai_api_key:
+            providers.append(("openai:gpt-4o", self._complete_openai))
+        if self.anthropic_api_key:
+            providers.append(("anthropic:claude-3-5-sonnet-20241022", self._complete_anthropic))
+        ordered = provider_router.order(providers, key=lambda p: p[0])
+        
+        analysis_cache = self._cache("analysis", ANALYSIS_PROMPT_VERSION)
+        tasks_cache = self._cache("tasks", TASKS_PROMPT_VERSION)
+        if analysis_cache and tasks_cache:
+            models = self._cache_models(ordered, providers)
+            analysis_hit = analysis_cache.get(notes, models)
+            tasks_hit = tasks_cache.get(notes, models) if analysis_hit else None
+            if analysis_hit and tasks_hit:
+                tasks = [
+                    TaskCreate(**{**task, "person_id": person_id, "meeting_id": meeting_id})
+                    for task in tasks_hit[1]["suggested_tasks"]
+                ]
+                self.last_source = analysis_hit[0]
+                return MeetingAnalysisResponse(**analysis_hit[1], suggested_tasks=tasks, cached=True)
+        
+        async def complete(prompt: str, max_tokens: int):
+            """(provider key, analysis, tasks) of the first answer that parses, or Nones"""
+            for key, call in ordered:
+                try:
+                    content = await timed_call(key, lambda call=call: call(COMBINED_SYSTEM_PROMPT, prompt, max_tokens))
+                    analysis = self._parse_ai_response(content)
+                    tasks = self._parse_tasks_response(content, person_id, meeting_id).suggested_tasks
+                    return key, analysis, tasks
+                except Exception as e:
+                    print(f"[AI Analyzer] {key} failed: {e}")
+            return None, None, None
+        
+        parts = split_paragraphs(notes, LONG_NOTES_PART_TOKENS)
+        print(f"[AI Analyzer] Long notes: {estimate_tokens(notes)} tokens in {len(parts)} parts")
+        answers = await asyncio.gather(*(complete(self._build_combined_prompt(part), 1000) for part in parts))
+        
+        analyses: List[AIAnalysisResponse] = []
+        part_tasks: List[TaskCreate] = []
+        sources = set()
+        for part, (key, analysis, tasks) in zip(parts, answers):
+            if analysis is None:
+                if not use_rules_fallback:
+                    raise RuntimeError("No AI provider could analyze part of the notes")
+                sources.add("rules")
+                analyses.append(self._analyze_with_rules(part))
+                part_tasks.extend(self._extract_tasks_rules(part, person_id, meeting_id).suggested_tasks)
+            else:
+                sources.add(key)
+                analyses.append(analysis)
+                part_tasks.extend(tasks)
+        
+        key, merged, tasks = None, None, None
+        if sources != {"rules"}:
+            key, merged, tasks = await complete(self._build_reduce_prompt(analyses, part_tasks), 1500)
+        
+        if merged is None:
+            # Reduce locally when the final call isn't possible
+            merged = merge_chunk_analyses(parts, analyses)
+            tasks, seen = [], set()
+            for task in part_tasks:
+                if task.title.lower() not in seen:
+                    seen.add(task.title.lower())
+                    tasks.append(task)
+        
+        self.last_source = "rules" if "rules" in sources else (key or sorted(sources)[0])
+        if self.last_source != "rules" and analysis_cache and tasks_cache:
+            analysis_cache.set(notes, self.last_source, merged.model_dump(exclude={"cached"}))
+            tasks_cache.set(notes, self.last_source, ExtractTasksResponse(suggested_tasks=tasks).model_dump(exclude={"cached"}))
+        return MeetingAnalysisResponse(**merged.model_dump(), suggested_tasks=tasks)
+
+    def _build_reduce_prompt(self, analyses: List[AIAnalysisResponse], tasks: List[TaskCreate]) -> str:
+        """Prompt that merges partial analyses of consecutive parts of one meeting"""
+        partials = json.dumps({
+            "parts": [
+                {
+                    "insights": analysis.insights,
+                    "topics": analysis.topics,
+                    "sentiment": analysis.sentiment,
+                    "action_items_suggested": analysis.action_items_suggested
+                }
+                for analysis in analyses
+            ],
+            "tasks": [
+                {"title": task.title, "description": task.description, "priority": task.priority}
+                for task in tasks
+            ]
+        }, ensure_ascii=False)
+        return f"""The following are partial analyses of consecutive parts of one long 1:1 meeting notes document,
+plus the tasks found in each part. Combine them into a single analysis of the whole meeting:
+merge the insights into one brief summary, keep the most important topics, decide the overall
+sentiment, and return the tasks with duplicates merged.
+
+Partial results:
+---
+{partials}
+---
+
+Respond in JSON format:
+{{
+    "insights": "Brief summary of key insights and observations",
+    "topics": ["topic1", "topic2", "topic3"],
+    "sentiment": "positive|neutral|negative",
+    "action_items_suggested": ["action1", "action2"],
+    "tasks": [
+        {{
+            "title": "Task title",
+            "description": "Optional description",
+            "priority": "medium"
+        }}
+    ]
+}}"""
+
+    async def _complete_openai(self, system: str, prompt: str, max_tokens: int) -> str:
+        """Single OpenAI chat completion returning the raw message text"""
+        client = self.http.get("openai")
+        response = await client.post(
+            "https://api.openai.com/v1/chat/completions",
+            headers={
+                "Authorization": f"Bearer {self.openai_api_key}",
+                "Content-Type": "application/json"
+            },
+            json={
+                "model": "gpt-4o",
+                "messages": [
+                    {"role": "system", "content": system},
+                    {"role": "user", "content": prompt}
+                ],
+                "temperature": 0.3,
+                "max_tokens": max_tokens
+            },
+            timeout=ai_timeout(45.0)
+        )
+        
+        if response.status_code != 200:
+            raise Exception(f"OpenAI API error (status {response.status_code}): {response.text}")
+        return response.json()["choices"][0]["message"]["content"]
+
+    async def _complete_anthropic(self, system: str, prompt: str, max_tokens: int) -> str:
+        """Single Anthropic message returning the raw text"""
+        client = self.http.get("anthropic")
+        response = await client.post(
+            "https://api.anthropic.com/v1/messages",
+            headers={
+                "x-api-key": self.anthropic_api_key,
+                "anthropic-version": "2023-06-01",
+                "Content-Type": "application/json"
+            },
+            json={
+                "model": "claude-3-5-sonnet-20241022",
+                "max_tokens": max_tokens,
+                "messages": [
+                    {"role": "user", "content": prompt}
+                ],
+                "system": system
+            },
+            timeout=ai_timeout(45.0)
+        )
+        
+        if response.status_code != 200:
+            raise Exception(f"Anthropic API error (status {response.status_code}): {response.text}")
+        return response.json()["content"][0]["text"]
+
+    def _build_combined_prompt(self, notes: str) -> str:
+        """Build the prompt for combined analysis + task extraction"""
+        return f"""Analyze the following 1:1 meeting notes and provide:
+1. Key insights and observations
+2. Main topics discussed (list of topic names)
+3. Overall sentiment (positive, neutral, or negative)
+4. Suggested action items based on the discussion
+5. Clear tasks stated in the notes, each with a title, optional description
+   and priority (low, medium, or high based on urgency)
+
+Meeting Notes:
+---
+{notes}
+---
+
+Respond in JSON format:
+{{
+    "insights": "Brief summary of key insights and observations",
+    "topics": ["topic1", "topic2", "topic3"],
+    "sentiment": "positive|neutral|negative",
+    "action_items_suggested": ["action1", "action2"],
+    "tasks": [
+        {{
+            "title": "Task title",
+            "description": "Optional description",
+            "priority": "medium"
+        }}
+    ]
+}}
+
+Only include clear action items as tasks. If no tasks are found, return an empty array."""
@@ -0,0 +1,221 @@
+import json
+import asyncio
+from typing import Any, AsyncIterator, Awaitable, Callable, Dict, List, Optional, Tuple
+
+import httpx
+from fastapi import HTTPException
+from fastapi.responses import StreamingResponse
+
+
+class JSONItemParser:
+    """
+    Incremental parser for a JSON object that arrives in pieces.
+    feed() returns (key, value) for every value completed so far that belongs
+    to one of `keys` at the top level: each element of an array (objects and
+    strings) and plain string values. Text before the first "{" (markdown
+    fences, preambles) is ignored.
+    """
+
+    def __init__(self, keys):
+        self.keys = set(keys)
+        self.text = ""
+        self._pos = 0
+        self._depth = 0
+        self._in_string = False
+        self._escape = False
+        self._string_start = 0
+        self._last_string: Optional[str] = None
+        self._key: Optional[str] = None  # Current top-level key
+        self._in_array = False  # Inside the array value of a tracked key
+        self._item_start: Optional[int] = None
+
+    def feed(self, text: str) -> List[Tuple[str, Any]]:
+        self.text += text
+        items: List[Tuple[str, Any]] = []
+        data = self.text
+        while self._pos < len(data):
+            ch = data[self._pos]
+            if self._in_string:
+                if self._escape:
+                    self._escape = False
+                elif ch == "\\":
+                    self._escape = True
+                elif ch == '"':
+                    self._in_string = False
+                    raw = data[self._string_start:self._pos + 1]
+                    if self._depth == 1 or (self._in_array and self._depth == 2):
+                        try:
+                            self._last_string = json.loads(raw)
+                        except ValueError:
+                            self._last_string = None
+                        if self._in_array and self._last_string is not None:
+                            items.append((self._key, self._last_string))
+                        elif self._key is not None and self._key in self.keys and self._last_string is not None:
+                            items.append((self._key, self._last_string))
+            elif ch == '"':
+                self._in_string = True
+                self._string_start = self._pos
+            elif ch in "{[":
+                self._depth += 1
+                if ch == "[" and self._depth == 2 and self._key in self.keys:
+                    self._in_array = True
+                elif ch == "{" and self._in_array and self._depth == 3:
+                    self._item_start = self._pos
+            elif ch in "}]":
+                if ch == "}" and self._in_array and self._depth == 3 and self._item_start is not None:
+                    try:
+                        items.append((self._key, json.loads(data[self._item_start:self._pos + 1])))
+                    except ValueError:
+                        pass
+                    self._item_start = None
+                elif ch == "]" and self._depth == 2:
+                    self._in_array = False
+                self._depth = max(0, self._depth - 1)
+            elif self._depth == 1:
+                if ch == ":":
+                    self._key = self._last_string
+                elif ch == ",":
+                    self._key = None
+            self._pos += 1
+        return items
+
+
+class StreamSink:
+    """
+    Receives the text deltas of a streamed provider answer and turns the
+    completed JSON values into (event, data) pairs on a queue.
+    `events` maps tracked JSON keys to event names; `transform` may reshape
+    or drop (by returning None) an item before it is sent, and items with an
+    already seen `dedupe_key` are dropped. A new provider attempt calls
+    begin(), which emits a "reset" event if the previous attempt had already
+    produced items.
+    """
+
+    def __init__(
+        self,
+        events: Dict[str, str],
+        transform: Optional[Callable[[str, Any], Any]] = None,
+        dedupe_key: Optional[Callable[[Any], Any]] = None
+    ):
+        self.events = events
+        self.transform = transform
+        self.dedupe_key = dedupe_key
+        self.queue: "asyncio.Queue[Tuple[str, Any]]" = asyncio.Queue()
+        self.emitted = 0
+        self._seen = set()
+        self._parser = JSONItemParser(events)
+
+    def begin(self) -> None:
+        if self.emitted:
+            self.queue.put_nowait(("reset", {}))
+            self.emitted = 0
+        self._seen = set()
+        self._parser = JSONItemParser(self.events)
+
+    def feed(self, text: str) -> None:
+        for key, value in self._parser.feed(text):
+            if self.transform is not None:
+                value = self.transform(key, value)
+                if value is None:
+                    continue
+            if self.dedupe_key is not None:
+                seen_key = self.dedupe_key(value)
+                if seen_key in self._seen:
+                    continue
+                self._seen.add(seen_key)
+            self.emitted += 1
+            self.queue.put_nowait((self.events[key], value))
+
+
+def _delta_text(flavor: str, event: dict) -> Optional[str]:
+    if flavor == "anthropic":
+        if event.get("type") == "error":
+            raise Exception(f"Anthropic stream error: {event.get('error')}")
+        if event.get("type") == "content_block_delta":
+            return event.get("delta", {}).get("text")
+        return None
+    if flavor == "gemini":
+        candidates = event.get("candidates") or [{}]
+        parts = candidates[0].get("content", {}).get("parts") or [{}]
+        return parts[0].get("text")
+    # OpenAI and Azure OpenAI chat completions
+    choices = event.get("choices") or [{}]
+    return (choices[0].get("delta") or {}).get("content")
+
+
+async def stream_completion(
+    client: httpx.AsyncClient,
+    flavor: str,
+    url: str,
+    headers: dict,
+    body: dict,
+    timeout: httpx.Timeout,
+    sink: StreamSink
+) -> str:
+    """
+    POST a provider request in streaming mode (`flavor`: openai, azure,
+    anthropic or gemini), feed every text delta to the sink and return the
+    whole answer text. Raises on a non-200 status like the blocking calls.
+    """
+    parts: List[str] = []
+    async with client.stream("POST", url, headers=headers, json=body, timeout=timeout) as response:
+        if response.status_code != 200:
+            await response.aread()
+            raise Exception(f"{flavor} API error (status {response.status_code}): {response.text}")
+        sink.begin()
+        async for line in response.aiter_lines():
+            if not line.startswith("data:"):
+                continue
+            data = line[5:].strip()
+            if not data or data == "[DONE]":
+                continue
+            text = _delta_text(flavor, json.loads(data))
+            if text:
+                parts.append(text)
+                sink.feed(text)
+    return "".join(parts)
+
+
+def sse_event(event: str, data: Any) -> str:
+    """Format one server-sent event"""
+    return f"event: {event}\ndata: {json.dumps(data, ensure_ascii=False)}\n\n"
+
+
+async def _events(sink: StreamSink, work: Awaitable) -> AsyncIterator[str]:
+    task = asyncio.ensure_future(work)
+    try:
+        while True:
+            getter = asyncio.ensure_future(sink.queue.get())
+            done, _ = await asyncio.wait({getter, task}, return_when=asyncio.FIRST_COMPLETED)
+            if getter in done:
+                yield sse_event(*getter.result())
+                continue
+            getter.cancel()
+            break
+
+        while not sink.queue.empty():
+            yield sse_event(*sink.queue.get_nowait())
+
+        error = task.exception()
+        if error is None:
+            result = task.result()
+            yield sse_event("result", result.model_dump(mode="json") if hasattr(result, "model_dump") else result)
+        elif isinstance(error, HTTPException):
+            yield sse_event("error", {"status_code": error.status_code, "detail": error.detail})
+        else:
+            yield sse_event("error", {"status_code": 500, "detail": str(error)})
+    finally:
+        task.cancel()  # Client went away: stop the provider call
+
+
+def sse_response(sink: StreamSink, work: Awaitable) -> StreamingResponse:
+    """
+    Stream `work` as server-sent events: the sink's item events as they are
+    parsed, then one "result" event with the full response (the same body the
+    blocking endpoint returns) or an "error" event.
+    """
+    return StreamingResponse(
+        _events(sink, work),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"}
+    )
@@ -0,0 +1,121 @@
+import os
+import re
+import json
+import hashlib
+import unicodedata
+from datetime import datetime
+from typing import List, Optional, Tuple
+
+from sqlalchemy.orm import Session
+
+from models import AnalysisCacheEntry
+
+
+def normalize_notes(notes: str) -> str:
+    """
+    Normalize meeting notes for cache keying: unicode NFC, unified line
+    endings, trailing whitespace and blank-line runs collapsed. Changes that
+    can't affect the model's answer therefore still hit the cache.
+    """
+    text = unicodedata.normalize("NFC", notes).replace("\r\n", "\n").replace("\r", "\n")
+    lines = [line.rstrip() for line in text.split("\n")]
+    return re.sub(r"\n{3,}", "\n\n", "\n".join(lines)).strip()
+
+
+class AnalysisCache:
+    """
+    Persistent cache for AI analysis / task extraction of meeting notes.
+    The key is a hash of the normalized notes, the prompt template version and
+    the provider model. Storing a result drops entries of the same kind written
+    with another prompt version, so bumping the version invalidates the cache.
+    The least recently used entries are evicted once the table grows too large.
+    """
+
+    def __init__(self, db: Session, kind: str, prompt_version: str):
+        self.db = db
+        self.kind = kind
+        self.prompt_version = prompt_version
+        self.max_entries = int(os.getenv("ANALYSIS_CACHE_MAX_ENTRIES", "2000"))
+
+    def make_key(self, notes: str, model: str) -> str:
+        """Build the cache key for notes analyzed by a given provider:model"""
+        digest = hashlib.sha256()
+        for part in (self.kind, self.prompt_version, model, normalize_notes(notes)):
+            digest.update(part.encode())
+            digest.update(b"\0")
+        return digest.hexdigest()
+
+    def get(self, notes: str, models: List[str]) -> Optional[Tuple[str, dict]]:
+        """
+        Return (model, result) for the first model in `models` with a cached
+        result for these notes, or None. One query covers every candidate.
+        """
+        keys = {self.make_key(notes, model): model for model in models}
+        if not keys:
+            return None
+        entries = self.db.query(AnalysisCacheEntry).filter(
+            AnalysisCacheEntry.cache_key.in_(list(keys))
+        ).all()
+        if not entries:
+            self.db.commit()  # End the read so the connection isn't held during the provider call
+            return None
+
+        by_model = {keys[entry.cache_key]: entry for entry in entries}
+        model = next(m for m in models if m in by_model)
+        entry = by_model[model]
+        entry.last_used_at = datetime.utcnow()
+        entry.hit_count = (entry.hit_count or 0) + 1
+        self.db.commit()
+        return model, json.loads(entry.result)
+
+    def set(self, notes: str, model: str, result: dict) -> None:
+        """
+        Store a result, dropping stale prompt versions and LRU overflow.
+        Best effort: a failed write (e.g. two analyses of the same notes racing
+        on the same cache_key) is rolled back and logged, never raised, so it
+        can't turn a successful (already paid for) analysis into an error.
+        """
+        try:
+            self._store(notes, model, result)
+        except Exception as e:
+            self.db.rollback()
+            print(f"[Analysis Cache] Failed to store {self.kind} result: {e}")
+
+    def _store(self, notes: str, model: str, result: dict) -> None:
+        now = datetime.utcnow()
+        key = self.make_key(notes, model)
+        entry = self.db.query(AnalysisCacheEntry).filter(
+            AnalysisCacheEntry.cache_key == key
+        ).first()
+        if entry:
+            entry.result = json.dumps(result, ensure_ascii=False)
+            entry.created_at = now
+            entry.last_used_at = now
+        else:
+            self.db.add(AnalysisCacheEntry(
+                cache_key=key,
+                kind=self.kind,
+                prompt_version=self.prompt_version,
+                model=model,
+                result=json.dumps(result, ensure_ascii=False),
+                created_at=now,
+                last_used_at=now
+            ))
+        self.db.flush()
+        self._evict()
+        self.db.commit()
+
+    def _evict(self) -> None:
+        """Drop entries from older prompt versions, then the LRU overflow"""
+        self.db.query(AnalysisCacheEntry).filter(
+            AnalysisCacheEntry.kind == self.kind,
+            AnalysisCacheEntry.prompt_version != self.prompt_version
+        ).delete(synchronize_session=False)
+
+        overflow = self.db.query(AnalysisCacheEntry.id).order_by(
+            AnalysisCacheEntry.last_used_at.desc()
+        ).offset(self.max_entries).all()
+        if overflow:
+            self.db.query(AnalysisCacheEntry).filter(
+                AnalysisCacheEntry.id.in_([row[0] for row in overflow])
+            ).delete(synchronize_session=False)
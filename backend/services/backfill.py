@@ -0,0 +1,253 @@
+import os
+import json
+import asyncio
+from datetime import datetime
+from typing import List, Optional, Tuple
+
+from sqlalchemy import or_, update
+from sqlalchemy.orm import Session
+
+from database import SessionLocal
+from models import Meeting, BackfillRun
+from schemas import AIAnalysisResponse
+from services.ai_analyzer import AIAnalyzer, ANALYSIS_PROMPT_VERSION
+from services.http_client import AIHttpClients, ai_timeout
+
+
+BACKFILL_PAGE_SIZE = int(os.getenv("BACKFILL_PAGE_SIZE", "200"))
+BACKFILL_CONCURRENCY = int(os.getenv("BACKFILL_CONCURRENCY", "4"))
+BACKFILL_BATCH_SIZE = int(os.getenv("BACKFILL_BATCH_SIZE", "1000"))  # Meetings per provider batch
+BACKFILL_BATCH_POLL_SECONDS = float(os.getenv("BACKFILL_BATCH_POLL_SECONDS", "60"))
+
+BACKFILL_MODES = ("online", "batch")
+
+OPENAI_API = "https://api.openai.com/v1"
+
+
+def _candidates(db: Session, run: BackfillRun, after_id: int):
+    query = db.query(Meeting.id, Meeting.notes).filter(
+        Meeting.id > after_id,
+        Meeting.notes.isnot(None),
+        Meeting.notes != ""
+    )
+    if run.only_stale:
+        query = query.filter(or_(
+            Meeting.ai_analysis_version.is_(None),
+            Meeting.ai_analysis_version != ANALYSIS_PROMPT_VERSION
+        ))
+    return query
+
+
+def create_run(db: Session, mode: str = "online", only_stale: bool = True) -> BackfillRun:
+    """Create a backfill run (raises ValueError for an unusable mode)"""
+    if mode not in BACKFILL_MODES:
+        raise ValueError(f"Unknown backfill mode: {mode}")
+    if mode == "batch" and not os.getenv("OPENAI_API_KEY"):
+        raise ValueError("Batch mode needs OPENAI_API_KEY")
+
+    run = BackfillRun(mode=mode, only_stale=only_stale, status="queued", last_meeting_id=0)
+    run.total = _candidates(db, run, 0).count()
+    db.add(run)
+    db.commit()
+    db.refresh(run)
+    return run
+
+
+def _load_run(run_id: int) -> BackfillRun:
+    with SessionLocal() as db:
+        run = db.query(BackfillRun).filter(BackfillRun.id == run_id).first()
+        if not run:
+            raise ValueError(f"Backfill run {run_id} not found")
+        db.expunge(run)
+        return run
+
+
+def _set_run(run_id: int, **values) -> None:
+    with SessionLocal() as db:
+        db.query(BackfillRun).filter(BackfillRun.id == run_id).update(values, synchronize_session=False)
+        db.commit()
+
+
+def _read_page(run: BackfillRun, after_id: int, limit: int) -> List[Tuple[int, str]]:
+    """
+    Next page of meetings after the checkpoint (keyset pagination by id).
+    The page is streamed through a server-side cursor and the connection is
+    returned before any provider call is made.
+    """
+    with SessionLocal() as db:
+        query = _candidates(db, run, after_id).order_by(Meeting.id).limit(limit)
+        return [
+            (meeting_id, notes)
+            for meeting_id, notes in query.execution_options(stream_results=True, yield_per=100)
+        ]
+
+
+def _write_results(
+    run_id: int,
+    results: List[Tuple[int, AIAnalysisResponse]],
+    last_meeting_id: int,
+    failed: int
+) -> None:
+    """Batched UPDATE of the analyzed meetings plus the checkpoint, in one transaction"""
+    with SessionLocal() as db:
+        if results:
+            db.execute(update(Meeting), [
+                {
+                    "id": meeting_id,
+                    "ai_insights": analysis.insights,
+                    "ai_topics": json.dumps(analysis.topics),
+                    "ai_sentiment": analysis.sentiment,
+                    "ai_analysis_version": ANALYSIS_PROMPT_VERSION,
+                }
+                for meeting_id, analysis in results
+            ])
+        db.query(BackfillRun).filter(BackfillRun.id == run_id).update({
+            BackfillRun.last_meeting_id: last_meeting_id,
+            BackfillRun.processed: BackfillRun.processed + len(results),
+            BackfillRun.failed: BackfillRun.failed + failed,
+            BackfillRun.provider_batch_id: None,
+            BackfillRun.batch_last_meeting_id: None,
+        }, synchronize_session=False)
+        db.commit()
+
+
+async def _run_online(run: BackfillRun, http: AIHttpClients) -> None:
+    """Direct provider calls, BACKFILL_CONCURRENCY at a time, one page per checkpoint"""
+    analyzer = AIAnalyzer(http)  # No cache: its session can't be shared by concurrent calls
+    semaphore = asyncio.Semaphore(BACKFILL_CONCURRENCY)
+
+    async def analyze(meeting_id: int, notes: str) -> Tuple[int, Optional[AIAnalysisResponse]]:
+        async with semaphore:
+            try:
+                return meeting_id, await analyzer.analyze_notes(notes, use_rules_fallback=False)
+            except Exception as e:
+                print(f"[Backfill] Meeting {meeting_id} failed: {e}")
+                return meeting_id, None
+
+    last_id = run.last_meeting_id or 0
+    while True:
+        page = _read_page(run, last_id, BACKFILL_PAGE_SIZE)
+        if not page:
+            return
+        outcomes = await asyncio.gather(*(analyze(meeting_id, notes) for meeting_id, notes in page))
+        results = [(meeting_id, analysis) for meeting_id, analysis in outcomes if analysis is not None]
+        last_id = page[-1][0]
+        _write_results(run.id, results, last_id, len(page) - len(results))
+        print(f"[Backfill] Run {run.id}: analyzed up to meeting {last_id}")
+
+
+async def _run_batch(run: BackfillRun, http: AIHttpClients) -> None:
+    """
+    OpenAI Batch API: upload BACKFILL_BATCH_SIZE requests as one JSONL batch,
+    checkpoint the batch id, poll until it finishes and apply the results.
+    A resumed run picks up its in-flight batch instead of submitting again.
+    """
+    analyzer = AIAnalyzer(http)
+    client = http.get("openai-batch")
+    headers = {"Authorization": f"Bearer {os.getenv('OPENAI_API_KEY')}"}
+
+    last_id = run.last_meeting_id or 0
+    batch_id, batch_last_id = run.provider_batch_id, run.batch_last_meeting_id
+    while True:
+        if not batch_id:
+            page = _read_page(run, last_id, BACKFILL_BATCH_SIZE)
+            if not page:
+                return
+            lines = "\n".join(
+                json.dumps(analyzer.openai_batch_request(f"meeting-{meeting_id}", notes), ensure_ascii=False)
+                for meeting_id, notes in page
+            )
+            upload = await client.post(
+                f"{OPENAI_API}/files",
+                headers=headers,
+                data={"purpose": "batch"},
+                files={"file": ("backfill.jsonl", lines.encode(), "application/jsonl")},
+                timeout=ai_timeout(120.0)
+            )
+            if upload.status_code != 200:
+                raise Exception(f"OpenAI file upload error (status {upload.status_code}): {upload.text}")
+            created = await client.post(
+                f"{OPENAI_API}/batches",
+                headers=headers,
+                json={
+                    "input_file_id": upload.json()["id"],
+                    "endpoint": "/v1/chat/completions",
+                    "completion_window": "24h"
+                },
+                timeout=ai_timeout(60.0)
+            )
+            if created.status_code != 200:
+                raise Exception(f"OpenAI batch error (status {created.status_code}): {created.text}")
+            batch_id, batch_last_id = created.json()["id"], page[-1][0]
+            _set_run(run.id, provider_batch_id=batch_id, batch_last_meeting_id=batch_last_id)
+            print(f"[Backfill] Run {run.id}: submitted batch {batch_id} ({len(page)} meetings)")
+
+        results, total = await _collect_batch(client, headers, batch_id, analyzer)
+        _write_results(run.id, results, batch_last_id, max(0, total - len(results)))
+        print(f"[Backfill] Run {run.id}: batch {batch_id} applied, up to meeting {batch_last_id}")
+        last_id, batch_id, batch_last_id = batch_last_id, None, None
+
+
+async def _collect_batch(
+    client, headers: dict, batch_id: str, analyzer: AIAnalyzer
+) -> Tuple[List[Tuple[int, AIAnalysisResponse]], int]:
+    """Poll a provider batch until it finishes; return the parsed results and the request count"""
+    while True:
+        response = await client.get(f"{OPENAI_API}/batches/{batch_id}", headers=headers, timeout=ai_timeout(60.0))
+        if response.status_code != 200:
+            raise Exception(f"OpenAI batch status error (status {response.status_code}): {response.text}")
+        batch = response.json()
+        if batch["status"] in ("completed", "expired", "cancelled", "failed"):
+            break
+        await asyncio.sleep(BACKFILL_BATCH_POLL_SECONDS)
+
+    total = (batch.get("request_counts") or {}).get("total", 0)
+    if not batch.get("output_file_id"):
+        if batch["status"] == "failed":
+            raise Exception(f"OpenAI batch {batch_id} failed: {batch.get('errors')}")
+        return [], total
+
+    output = await client.get(
+        f"{OPENAI_API}/files/{batch['output_file_id']}/content", headers=headers, timeout=ai_timeout(120.0)
+    )
+    if output.status_code != 200:
+        raise Exception(f"OpenAI batch output error (status {output.status_code}): {output.text}")
+
+    results = []
+    for line in output.text.splitlines():
+        if not line.strip():
+            continue
+        item = json.loads(line)
+        response = item.get("response") or {}
+        if response.get("status_code") != 200:
+            continue
+        meeting_id = int(item["custom_id"].split("-", 1)[1])
+        content = response["body"]["choices"][0]["message"]["content"]
+        try:
+            results.append((meeting_id, analyzer.parse_analysis(content)))
+        except ValueError as e:
+            print(f"[Backfill] Meeting {meeting_id} failed: {e}")
+    return results, total
+
+
+async def run_backfill(run_id: int, http: AIHttpClients) -> dict:
+    """Run (or resume) a backfill from its checkpoint; returns the final counters"""
+    run = _load_run(run_id)
+    if run.status == "completed":
+        return {"run_id": run_id, "status": "completed"}
+
+    _set_run(run_id, status="running", error=None)
+    try:
+        if run.mode == "batch":
+            await _run_batch(run, http)
+        else:
+            await _run_online(run, http)
+    except asyncio.CancelledError:
+        raise  # Stays "running"; the job is requeued and resumes from the checkpoint
+    except Exception as e:
+        _set_run(run_id, status="failed", error=str(e), finished_at=datetime.utcnow())
+        raise
+
+    _set_run(run_id, status="completed", finished_at=datetime.utcnow())
+    run = _load_run(run_id)
+    return {"run_id": run_id, "status": run.status, "processed": run.processed, "failed": run.failed}
@@ -0,0 +1,281 @@
+"""
+Local OCR tier for calendar screenshots.
+
+Runs Tesseract on the screenshot (no network) and rebuilds the day grid:
+hour labels in the left gutter give a y -> time mapping, and every text
+block to the right of the gutter becomes a meeting. Times printed inside a
+block ("9:00 - 9:30", "2pm-3pm") win over the grid position. Each result
+carries a confidence so the caller can decide whether to trust it, send only
+the OCR text to a model, or fall back to the vision model.
+
+pytesseract and the tesseract binary are optional: without them
+local_ocr_available() is False and the tier is skipped.
+"""
+import io
+import os
+import re
+import asyncio
+from typing import Dict, List, Optional, Tuple
+
+from PIL import Image, ImageOps
+from pydantic import BaseModel
+
+try:
+    import pytesseract
+except ImportError:  # Optional dependency
+    pytesseract = None
+
+
+# off: never run OCR; grid: use the OCR grid when confident, else the vision model;
+# text: like grid, but low-confidence screenshots send only the OCR text to a model
+SCREENSHOT_LOCAL_OCR = os.getenv("SCREENSHOT_LOCAL_OCR", "off").lower()
+SCREENSHOT_OCR_MIN_CONFIDENCE = float(os.getenv("SCREENSHOT_OCR_MIN_CONFIDENCE", "0.8"))
+SCREENSHOT_OCR_LANGS = os.getenv("SCREENSHOT_OCR_LANGS", "eng+heb")
+
+# Screenshots narrower than this are upscaled before OCR (small UI text reads badly)
+OCR_MIN_WIDTH = 1600
+
+# Meetings placed only by their position on the grid are trusted less than printed times
+GRID_ONLY_CONFIDENCE = 0.7
+SLOT_MINUTES = 15
+
+TIME = r"(\d{1,2})(?:[:.](\d{2}))?\s*([ap]\.?m\.?)?"
+TIME_RE = re.compile(TIME, re.IGNORECASE)
+TIME_RANGE_RE = re.compile(TIME + r"\s*[-–—]\s*" + TIME, re.IGNORECASE)
+HOUR_LABEL_RE = re.compile(r"^\d{1,2}(?:[:.]00)?\s*(?:[ap]\.?m\.?)?$", re.IGNORECASE)
+
+
+class OcrLine(BaseModel):
+    text: str
+    left: int
+    top: int
+    right: int
+    bottom: int
+    block: int
+    confidence: float  # 0..1, mean over the words
+
+
+class OcrResult(BaseModel):
+    meetings: List[dict]  # ExtractedMeeting fields
+    confidence: float
+    layout_text: str  # Positioned OCR lines, for a text-only model prompt
+
+
+_available: Optional[bool] = None
+
+
+def local_ocr_available() -> bool:
+    """True if pytesseract is installed and the tesseract binary runs"""
+    global _available
+    if _available is None:
+        if pytesseract is None:
+            _available = False
+        else:
+            try:
+                pytesseract.get_tesseract_version()
+                _available = True
+            except Exception as e:
+                print(f"[Calendar OCR] Tesseract not available: {e}")
+                _available = False
+    return _available
+
+
+def _to_minutes(hour: str, minute: Optional[str], meridiem: Optional[str]) -> Optional[int]:
+    h, m = int(hour), int(minute or 0)
+    if meridiem:
+        meridiem = meridiem.lower().replace(".", "")
+        if h == 12:
+            h = 0
+        if meridiem == "pm":
+            h += 12
+    if h > 23 or m > 59:
+        return None
+    return h * 60 + m
+
+
+def _format(minutes: int) -> str:
+    minutes = max(0, min(minutes, 24 * 60 - 1))
+    return f"{minutes // 60:02d}:{minutes % 60:02d}"
+
+
+def parse_time_range(text: str) -> Optional[Tuple[int, int]]:
+    """(start, end) in minutes for a printed range like "9:00 - 10:30" or "2-3pm" """
+    match = TIME_RANGE_RE.search(text)
+    if not match:
+        return None
+    h1, m1, p1, h2, m2, p2 = match.groups()
+    start = _to_minutes(h1, m1, p1 or p2)  # "2-3pm": the start inherits the end's am/pm
+    end = _to_minutes(h2, m2, p2)
+    if start is None or end is None:
+        return None
+    if end <= start and not (p1 or p2) and end + 12 * 60 > start:
+        end += 12 * 60  # "11:30 - 1:00" on a 12-hour grid
+    if end <= start:
+        return None
+    return start, end
+
+
+def _ocr_lines(image_bytes: bytes) -> Tuple[List[OcrLine], int]:
+    img = Image.open(io.BytesIO(image_bytes))
+    img = ImageOps.grayscale(img)
+    scale = 1.0
+    if img.width < OCR_MIN_WIDTH:
+        scale = OCR_MIN_WIDTH / img.width
+        img = img.resize((OCR_MIN_WIDTH, round(img.height * scale)), Image.LANCZOS)
+
+    data = pytesseract.image_to_data(img, lang=SCREENSHOT_OCR_LANGS, output_type=pytesseract.Output.DICT)
+    grouped: Dict[tuple, List[int]] = {}
+    for i, text in enumerate(data["text"]):
+        if text.strip() and float(data["conf"][i]) >= 0:
+            key = (data["block_num"][i], data["par_num"][i], data["line_num"][i])
+            grouped.setdefault(key, []).append(i)
+
+    lines = []
+    for (block, _, _), idx in grouped.items():
+        lines.append(OcrLine(
+            text=" ".join(data["text"][i].strip() for i in idx),
+            left=round(min(data["left"][i] for i in idx) / scale),
+            top=round(min(data["top"][i] for i in idx) / scale),
+            right=round(max(data["left"][i] + data["width"][i] for i in idx) / scale),
+            bottom=round(max(data["top"][i] + data["height"][i] for i in idx) / scale),
+            block=block,
+            confidence=sum(float(data["conf"][i]) for i in idx) / len(idx) / 100.0
+        ))
+    return lines, round(img.width / scale)
+
+
+def _fit_axis(labels: List[Tuple[float, int]]) -> Optional[Tuple[float, float]]:
+    """Least-squares y -> minutes mapping from the hour labels"""
+    if len(labels) < 2:
+        return None
+    n = len(labels)
+    mean_y = sum(y for y, _ in labels) / n
+    mean_m = sum(m for _, m in labels) / n
+    var = sum((y - mean_y) ** 2 for y, _ in labels)
+    if var == 0:
+        return None
+    slope = sum((y - mean_y) * (m - mean_m) for y, m in labels) / var
+    if slope <= 0:
+        return None
+    return slope, mean_m - slope * mean_y
+
+
+def _snap(minutes: float) -> int:
+    return int(round(minutes / SLOT_MINUTES) * SLOT_MINUTES)
+
+
+def _split_events(block_lines: List[OcrLine]) -> List[List[OcrLine]]:
+    """
+    Tesseract may merge adjacent calendar entries into one block: start a
+    new event at a second printed time range or at a vertical gap larger
+    than a line height.
+    """
+    events: List[List[OcrLine]] = []
+    for line in sorted(block_lines, key=lambda line: line.top):
+        if events:
+            current = events[-1]
+            height = max(1, current[-1].bottom - current[-1].top)
+            has_range = any(parse_time_range(other.text) for other in current)
+            if line.top - current[-1].bottom <= height and not (has_range and parse_time_range(line.text)):
+                current.append(line)
+                continue
+        events.append([line])
+    return events
+
+
+def reconstruct_meetings(lines: List[OcrLine], width: int) -> OcrResult:
+    """Turn positioned OCR lines into meetings plus an overall confidence"""
+    # Hour labels: short time-only lines in the left part of the screenshot
+    labels, gutter_right = [], 0
+    for line in lines:
+        if line.left < width * 0.2 and HOUR_LABEL_RE.match(line.text.strip()):
+            match = TIME_RE.match(line.text.strip())
+            minutes = _to_minutes(*match.groups())
+            if minutes is not None:
+                labels.append(((line.top + line.bottom) / 2, minutes, line))
+                gutter_right = max(gutter_right, line.right)
+
+    # 12-hour labels without am/pm ("1", "2" after "12") continue past noon
+    labels.sort(key=lambda item: item[0])
+    fixed: List[Tuple[float, int]] = []
+    for y, minutes, line in labels:
+        if fixed and minutes <= fixed[-1][1] and minutes + 12 * 60 > fixed[-1][1]:
+            minutes += 12 * 60
+        fixed.append((y, minutes))
+    axis = _fit_axis(fixed)
+    axis_top = fixed[0][0] - 30 if fixed else 0
+
+    blocks: Dict[int, List[OcrLine]] = {}
+    for line in lines:
+        if line.right <= gutter_right or HOUR_LABEL_RE.match(line.text.strip()):
+            continue
+        blocks.setdefault(line.block, []).append(line)
+
+    meetings = []
+    confidences = []
+    for block_lines in blocks.values():
+        for event_lines in _split_events(block_lines):
+            time_range = None
+            text_lines = []
+            for line in event_lines:
+                found = parse_time_range(line.text) if time_range is None else None
+                if found:
+                    time_range = found
+                    rest = TIME_RANGE_RE.sub("", line.text).strip(" ,|-–")
+                    if rest:
+                        text_lines.append(rest)
+                else:
+                    text_lines.append(line.text)
+            if not text_lines:
+                continue
+
+            confidence = sum(line.confidence for line in event_lines) / len(event_lines)
+            if time_range is None:
+                top = event_lines[0].top
+                bottom = max(line.bottom for line in event_lines)
+                if axis is None or top < axis_top:
+                    continue  # Header text (day names, dates) above the grid
+                slope, offset = axis
+                start = _snap(slope * top + offset)
+                end = max(start + SLOT_MINUTES, _snap(slope * bottom + offset))
+                time_range = (start, end)
+                confidence *= GRID_ONLY_CONFIDENCE
+
+            meetings.append({
+                "title": text_lines[0],
+                "start_time": _format(time_range[0]),
+                "end_time": _format(time_range[1]),
+                "location": text_lines[1] if len(text_lines) > 1 else None,
+                "attendees": None
+            })
+            confidences.append(confidence)
+
+    meetings.sort(key=lambda meeting: meeting["start_time"])
+    layout_text = "\n".join(
+        f"[x={line.left} y={line.top} w={line.right - line.left} h={line.bottom - line.top}] {line.text}"
+        for line in sorted(lines, key=lambda line: (line.top, line.left))
+    )
+    return OcrResult(
+        meetings=meetings,
+        confidence=round(min(confidences), 3) if confidences else 0.0,
+        layout_text=layout_text
+    )
+
+
+def run_local_ocr(image_bytes: bytes) -> OcrResult:
+    lines, width = _ocr_lines(image_bytes)
+    return reconstruct_meetings(lines, width)
+
+
+async def run_local_ocr_async(image_bytes: bytes) -> Optional[OcrResult]:
+    """
+    OCR + grid reconstruction in a worker thread.
+    Returns None when the tier is unavailable or the image can't be read.
+    """
+    if not local_ocr_available():
+        return None
+    try:
+        return await asyncio.to_thread(run_local_ocr, image_bytes)
+    except Exception as e:
+        print(f"[Calendar OCR] Skipped: {e}")
+        return None
@@ -0,0 +1,139 @@
+import os
+import json
+import base64
+import hashlib
+from datetime import datetime, timedelta
+from typing import Optional
+
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import Session
+
+from models import ExtractionCacheEntry
+
+
+# Bump when the screenshot extraction prompts change so cached results are not reused
+SCREENSHOT_PROMPT_VERSION = "1"
+
+
+def decode_image(image: str) -> bytes:
+    """Decode a base64 image (plain or data URL) into raw bytes"""
+    if image.startswith('data:'):
+        image = image.split(',', 1)[1]
+    return base64.b64decode(image)
+
+
+class ExtractionCache:
+    """
+    Persistent cache for screenshot extraction results.
+    Entries are content-addressed: the key is a hash of the decoded image bytes
+    together with everything else that affects the answer (date/context,
+    prompt version and provider model). Old entries expire after a TTL and the
+    least recently used ones are evicted once the table grows past its limit.
+    """
+
+    def __init__(self, db: Session, kind: str):
+        self.db = db
+        self.kind = kind
+        self.ttl = timedelta(hours=float(os.getenv("EXTRACTION_CACHE_TTL_HOURS", "168")))
+        self.max_entries = int(os.getenv("EXTRACTION_CACHE_MAX_ENTRIES", "500"))
+
+    def make_key(self, image_bytes: bytes, *parts: Optional[str]) -> str:
+        """Build the cache key for an image and its extraction parameters"""
+        digest = hashlib.sha256()
+        digest.update(self.kind.encode())
+        digest.update(b"\0")
+        digest.update(hashlib.sha256(image_bytes).digest())
+        for part in parts:
+            digest.update(b"\0")
+            digest.update((part or "").encode())
+        return digest.hexdigest()
+
+    def get(self, key: str) -> Optional[dict]:
+        """Return the cached result for a key, or None if missing/expired"""
+        entry = self.db.query(ExtractionCacheEntry).filter(
+            ExtractionCacheEntry.cache_key == key
+        ).first()
+        if not entry:
+            self.db.commit()  # End the read so the connection isn't held during the provider call
+            return None
+
+        now = datetime.utcnow()
+        if entry.created_at and entry.created_at < now - self.ttl:
+            self.db.delete(entry)
+            self.db.commit()
+            return None
+
+        entry.last_used_at = now
+        entry.hit_count = (entry.hit_count or 0) + 1
+        self.db.commit()
+        return json.loads(entry.result)
+
+    def set(self, key: str, result: dict) -> None:
+        """
+        Store a result and evict expired / least recently used entries.
+        Best effort: a failed write (e.g. two requests racing on the same
+        cache_key) is rolled back and logged, never raised, so it can't turn a
+        successful extraction into an error.
+        """
+        try:
+            self._store(key, result)
+        except Exception as e:
+            self.db.rollback()
+            print(f"[Extraction Cache] Failed to store {self.kind} result: {e}")
+
+    def _store(self, key: str, result: dict) -> None:
+        now = datetime.utcnow()
+        entry = self.db.query(ExtractionCacheEntry).filter(
+            ExtractionCacheEntry.cache_key == key
+        ).first()
+        if entry:
+            entry.result = json.dumps(result, ensure_ascii=False)
+            entry.created_at = now
+            entry.last_used_at = now
+        else:
+            self.db.add(ExtractionCacheEntry(
+                cache_key=key,
+                kind=self.kind,
+                result=json.dumps(result, ensure_ascii=False),
+                created_at=now,
+                last_used_at=now
+            ))
+        self.db.flush()
+        self._evict(now)
+        self.db.commit()
+
+    def _evict(self, now: datetime) -> None:
+        """Drop expired entries, then the least recently used beyond max_entries"""
+        self.db.query(ExtractionCacheEntry).filter(
+            ExtractionCacheEntry.created_at < now - self.ttl
+        ).delete(synchronize_session=False)
+
+        overflow = self.db.query(ExtractionCacheEntry.id).order_by(
+            ExtractionCacheEntry.last_used_at.desc()
+        ).offset(self.max_entries).all()
+        if overflow:
+            self.db.query(ExtractionCacheEntry).filter(
+                ExtractionCacheEntry.id.in_([row[0] for row in overflow])
+            ).delete(synchronize_session=False)
+
+
+class AsyncExtractionCache:
+    """
+    ExtractionCache for async handlers on an AsyncSession. Lookups and
+    writes run the synchronous cache on the session's connection through
+    run_sync, so they never block the event loop.
+    """
+
+    def __init__(self, db: AsyncSession, kind: str):
+        self.db = db
+        self.kind = kind
+        self._keys = ExtractionCache(None, kind)
+
+    def make_key(self, image_bytes: bytes, *parts: Optional[str]) -> str:
+        return self._keys.make_key(image_bytes, *parts)
+
+    async def get(self, key: str) -> Optional[dict]:
+        return await self.db.run_sync(lambda session: ExtractionCache(session, self.kind).get(key))
+
+    async def set(self, key: str, result: dict) -> None:
+        await self.db.run_sync(lambda session: ExtractionCache(session, self.kind).set(key, result))
@@ -0,0 +1,132 @@
+import time
+import asyncio
+from collections import deque
+from typing import Awaitable, Callable, Dict, List, Tuple, TypeVar
+
+from services.provider_router import provider_router
+
+T = TypeVar("T")
+
+
+class ProviderLatencyStats:
+    """Rolling latency/error statistics per AI provider (in-process)"""
+
+    def __init__(self, window: int = 200):
+        self.window = window
+        self._samples: Dict[str, deque] = {}
+        self._calls: Dict[str, int] = {}
+        self._errors: Dict[str, int] = {}
+        self._cancelled: Dict[str, int] = {}
+        self._wins: Dict[str, int] = {}
+
+    def record(self, provider: str, seconds: float, ok: bool) -> None:
+        self._calls[provider] = self._calls.get(provider, 0) + 1
+        if ok:
+            self._samples.setdefault(provider, deque(maxlen=self.window)).append(seconds)
+        else:
+            self._errors[provider] = self._errors.get(provider, 0) + 1
+
+    def record_cancelled(self, provider: str) -> None:
+        self._cancelled[provider] = self._cancelled.get(provider, 0) + 1
+
+    def record_win(self, provider: str) -> None:
+        self._wins[provider] = self._wins.get(provider, 0) + 1
+
+    def snapshot(self) -> dict:
+        result = {}
+        for provider in self._calls.keys() | self._cancelled.keys():
+            samples = sorted(self._samples.get(provider, []))
+            result[provider] = {
+                "calls": self._calls.get(provider, 0),
+                "errors": self._errors.get(provider, 0),
+                "cancelled": self._cancelled.get(provider, 0),
+                "hedge_wins": self._wins.get(provider, 0),
+                "p50_seconds": round(samples[len(samples) // 2], 3) if samples else None,
+                "p95_seconds": round(samples[min(len(samples) - 1, int(len(samples) * 0.95))], 3) if samples else None,
+            }
+        return result
+
+
+provider_latency = ProviderLatencyStats()
+
+
+async def timed_call(provider: str, call: Callable[[], Awaitable[T]]) -> T:
+    """Await a provider call and record its latency (stats + routing health)"""
+    started = time.monotonic()
+    try:
+        result = await call()
+    except asyncio.CancelledError:
+        provider_latency.record_cancelled(provider)
+        raise
+    except Exception:
+        elapsed = time.monotonic() - started
+        provider_latency.record(provider, elapsed, ok=False)
+        provider_router.record(provider, elapsed, ok=False)
+        raise
+    elapsed = time.monotonic() - started
+    provider_latency.record(provider, elapsed, ok=True)
+    provider_router.record(provider, elapsed, ok=True)
+    return result
+
+
+async def fallback_call(attempts: List[Tuple[str, Callable[[], Awaitable[T]]]]) -> Tuple[str, T]:
+    """
+    Try provider calls one after another, in order, until one returns
+    without raising. Returns (winning provider key, result) like hedged_call.
+    Raises the last error if every attempt fails.
+    """
+    last_error: Exception = RuntimeError("No providers to call")
+    for provider, call in attempts:
+        try:
+            return provider, await timed_call(provider, call)
+        except Exception as e:
+            last_error = e
+            print(f"[Fallback] {provider} failed: {e}")
+    raise last_error
+
+
+async def hedged_call(attempts: List[Tuple[str, Callable[[], Awaitable[T]]]], hedge_after: float) -> Tuple[str, T]:
+    """
+    Race provider calls: start the first attempt, and if it has not succeeded
+    within `hedge_after` seconds (or it fails) start the next one. The first
+    attempt to return without raising wins and the others are cancelled.
+    Returns (winning provider key, result), so callers can attribute the
+    answer (e.g. cache it under the model that produced it).
+    Raises the last error if every attempt fails.
+    """
+    remaining = list(attempts)
+    running: Dict[asyncio.Task, str] = {}
+    last_error: Exception = RuntimeError("No providers to call")
+
+    def launch() -> None:
+        provider, call = remaining.pop(0)
+        running[asyncio.ensure_future(timed_call(provider, call))] = provider
+
+    launch()
+    try:
+        while running:
+            done, _ = await asyncio.wait(
+                running.keys(),
+                timeout=hedge_after if remaining else None,
+                return_when=asyncio.FIRST_COMPLETED
+            )
+            if not done:
+                print(f"[Hedge] No answer after {hedge_after}s, starting {remaining[0][0]}")
+                launch()
+                continue
+
+            for task in done:
+                provider = running.pop(task)
+                if task.exception() is None:
+                    if len(attempts) > 1:
+                        provider_latency.record_win(provider)
+                    return provider, task.result()
+                last_error = task.exception()
+                print(f"[Hedge] {provider} failed: {last_error}")
+
+            if remaining and not running:
+                launch()
+        raise last_error
+    finally:
+        for task in running:
+            task.cancel()
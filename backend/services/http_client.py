@@ -0,0 +1,66 @@
+import os
+from typing import Dict, Optional
+
+import httpx
+
+from services.rate_limiter import RateLimitedTransport, rate_limiter
+
+
+# Connection pool / timeout settings shared by every AI provider client
+AI_HTTP_MAX_CONNECTIONS = int(os.getenv("AI_HTTP_MAX_CONNECTIONS", "20"))
+AI_HTTP_MAX_KEEPALIVE = int(os.getenv("AI_HTTP_MAX_KEEPALIVE", "10"))
+AI_HTTP_KEEPALIVE_EXPIRY = float(os.getenv("AI_HTTP_KEEPALIVE_EXPIRY", "60"))
+AI_HTTP_CONNECT_TIMEOUT = float(os.getenv("AI_HTTP_CONNECT_TIMEOUT", "10"))
+AI_HTTP_READ_TIMEOUT = float(os.getenv("AI_HTTP_READ_TIMEOUT", "90"))
+AI_HTTP2 = os.getenv("AI_HTTP2", "1") == "1"
+
+
+def ai_timeout(read: float) -> httpx.Timeout:
+    """Per-call timeout: the call's own read budget with the shared connect timeout"""
+    return httpx.Timeout(read, connect=AI_HTTP_CONNECT_TIMEOUT)
+
+
+class AIHttpClients:
+    """
+    One pooled, keep-alive httpx.AsyncClient per AI provider.
+    Clients are created on first use and closed together on app shutdown,
+    so repeated calls reuse TCP/TLS connections instead of handshaking each time.
+    Every request goes through the provider's rate limiter (services/rate_limiter.py).
+    Pass a `transport` (e.g. httpx.MockTransport) to route every call to a stub.
+    """
+
+    def __init__(self, transport: Optional[httpx.AsyncBaseTransport] = None):
+        self.transport = transport
+        self._clients: Dict[str, httpx.AsyncClient] = {}
+
+    def get(self, provider: str) -> httpx.AsyncClient:
+        client = self._clients.get(provider)
+        if client is None or client.is_closed:
+            transport = self.transport or httpx.AsyncHTTPTransport(
+                http2=AI_HTTP2,
+                limits=httpx.Limits(
+                    max_connections=AI_HTTP_MAX_CONNECTIONS,
+                    max_keepalive_connections=AI_HTTP_MAX_KEEPALIVE,
+                    keepalive_expiry=AI_HTTP_KEEPALIVE_EXPIRY
+                )
+            )
+            client = httpx.AsyncClient(
+                transport=RateLimitedTransport(transport, rate_limiter.for_provider(provider)),
+                timeout=httpx.Timeout(AI_HTTP_READ_TIMEOUT, connect=AI_HTTP_CONNECT_TIMEOUT)
+            )
+            self._clients[provider] = client
+        return client
+
+    async def aclose(self) -> None:
+        for client in self._clients.values():
+            await client.aclose()
+        self._clients.clear()
+
+
+# Process-wide clients; closed from the FastAPI lifespan hook in main.py
+ai_http_clients = AIHttpClients()
+
+
+def get_ai_http() -> AIHttpClients:
+    """Dependency returning the shared AI HTTP clients (override in tests)"""
+    return ai_http_clients
@@ -0,0 +1,139 @@
+import io
+import math
+import asyncio
+from typing import Optional
+
+from PIL import Image, ImageChops
+from pydantic import BaseModel
+
+
+# Largest image each provider actually looks at - anything bigger is downscaled
+# on their side anyway, so we only pay for the upload and the extra latency.
+PROVIDER_LIMITS = {
+    "openai": {"max_long_edge": 2048, "max_short_edge": 768},
+    "azure": {"max_long_edge": 2048, "max_short_edge": 768},
+    "anthropic": {"max_long_edge": 1568, "max_short_edge": None},
+    "gemini": {"max_long_edge": 3072, "max_short_edge": None},
+}
+
+# Pixels that differ from the border colour by less than this are treated as border
+BORDER_TOLERANCE = 12
+
+
+class ImagePreprocessStats(BaseModel):
+    original_bytes: int
+    final_bytes: int
+    original_size: str  # WxH
+    final_size: str  # WxH
+    mime_type: str
+    estimated_tokens_before: int
+    estimated_tokens_after: int
+
+
+class PreparedImage(BaseModel):
+    data: bytes
+    mime_type: str
+    stats: ImagePreprocessStats
+
+
+def estimate_image_tokens(provider: str, width: int, height: int) -> int:
+    """Rough image token cost as billed by each provider"""
+    if provider in ("openai", "azure"):
+        # High detail: fit in 2048x2048, short side to 768, then 170 tokens per 512px tile
+        scale = min(1.0, 2048 / max(width, height))
+        w, h = width * scale, height * scale
+        scale = min(1.0, 768 / min(w, h))
+        w, h = w * scale, h * scale
+        return 85 + 170 * math.ceil(w / 512) * math.ceil(h / 512)
+    if provider == "anthropic":
+        scale = min(1.0, 1568 / max(width, height))
+        return int((width * scale) * (height * scale) / 750)
+    if provider == "gemini":
+        return 258
+    return 0
+
+
+def _crop_uniform_border(img: Image.Image) -> Image.Image:
+    """Trim borders that have the same colour as the top-left pixel"""
+    rgb = img.convert("RGB")
+    background = Image.new("RGB", rgb.size, rgb.getpixel((0, 0)))
+    diff = ImageChops.difference(rgb, background).convert("L")
+    mask = diff.point(lambda v: 255 if v > BORDER_TOLERANCE else 0)
+    bbox = mask.getbbox()
+    if bbox and bbox != (0, 0, img.width, img.height):
+        return img.crop(bbox)
+    return img
+
+
+def _fit_to_provider(img: Image.Image, provider: str) -> Image.Image:
+    """Downscale to the resolution the provider will use"""
+    limits = PROVIDER_LIMITS.get(provider)
+    if not limits:
+        return img
+
+    scale = min(1.0, limits["max_long_edge"] / max(img.size))
+    if limits["max_short_edge"]:
+        scale = min(scale, limits["max_short_edge"] / min(img.size))
+    if scale >= 1.0:
+        return img
+
+    size = (max(1, round(img.width * scale)), max(1, round(img.height * scale)))
+    return img.resize(size, Image.LANCZOS)
+
+
+def _encode(img: Image.Image) -> tuple:
+    """Encode as both PNG and WebP and keep whichever is smaller"""
+    if img.mode not in ("RGB", "RGBA", "L"):
+        img = img.convert("RGBA" if "A" in img.getbands() else "RGB")
+
+    png = io.BytesIO()
+    img.save(png, format="PNG", optimize=True)
+
+    webp = io.BytesIO()
+    img.save(webp, format="WEBP", quality=90, method=4)
+
+    if webp.tell() < png.tell():
+        return webp.getvalue(), "image/webp"
+    return png.getvalue(), "image/png"
+
+
+def prepare_image(image_bytes: bytes, provider: str) -> PreparedImage:
+    """
+    Decode, auto-crop, downscale and re-encode a screenshot for a vision provider.
+    Falls back to the original bytes if they are already the smallest option.
+    """
+    img = Image.open(io.BytesIO(image_bytes))
+    img.load()
+    original_format = (img.format or "PNG").lower()
+    original_size = img.size
+
+    processed = _fit_to_provider(_crop_uniform_border(img), provider)
+    data, mime_type = _encode(processed)
+
+    if len(data) >= len(image_bytes) and processed.size == original_size:
+        data = image_bytes
+        mime_type = Image.MIME.get(original_format.upper(), f"image/{original_format}")
+
+    stats = ImagePreprocessStats(
+        original_bytes=len(image_bytes),
+        final_bytes=len(data),
+        original_size=f"{original_size[0]}x{original_size[1]}",
+        final_size=f"{processed.width}x{processed.height}",
+        mime_type=mime_type,
+        estimated_tokens_before=estimate_image_tokens(provider, *original_size),
+        estimated_tokens_after=estimate_image_tokens(provider, *processed.size)
+    )
+    return PreparedImage(data=data, mime_type=mime_type, stats=stats)
+
+
+async def prepare_image_async(image_bytes: bytes, provider: str) -> Optional[PreparedImage]:
+    """
+    Run prepare_image in a worker thread so the event loop is not blocked.
+    Returns None if the bytes are not an image Pillow can read, or are too
+    many pixels to decode safely (the provider then gets the original bytes).
+    """
+    try:
+        return await asyncio.to_thread(prepare_image, image_bytes, provider)
+    except (OSError, ValueError, Image.DecompressionBombError) as e:
+        print(f"[Image Preprocess] Skipped: {e}")
+        return None
@@ -0,0 +1,187 @@
+import os
+import json
+import uuid
+import asyncio
+from datetime import datetime, timedelta
+from typing import Awaitable, Callable, Dict, List, Optional
+
+from fastapi import HTTPException
+from sqlalchemy.orm import Session
+
+from database import SessionLocal
+from models import Job
+
+
+JobHandler = Callable[[dict], Awaitable[dict]]
+
+# How many jobs run at the same time in this process
+JOB_CONCURRENCY = int(os.getenv("JOB_CONCURRENCY", "4"))
+
+# Finished jobs older than this are pruned on startup
+JOB_RETENTION_HOURS = float(os.getenv("JOB_RETENTION_HOURS", "72"))
+
+
+class JobQueue:
+    """
+    In-process async job runner backed by the `jobs` table.
+    Endpoints enqueue a job and return its id right away; a fixed number of
+    worker tasks run the registered handler for each job. Handlers open their
+    own DB sessions and end every read before awaiting a provider, so no
+    pooled connection is held during the call. Jobs that were queued or
+    running when the process stopped are picked up again on the next start.
+    """
+
+    def __init__(self, concurrency: int = JOB_CONCURRENCY):
+        self.concurrency = concurrency
+        self._handlers: Dict[str, JobHandler] = {}
+        self._queue: Optional["asyncio.Queue[str]"] = None  # Created by start(), on the serving loop
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+        self._workers: List[asyncio.Task] = []
+
+    def register(self, kind: str, handler: JobHandler) -> None:
+        """Register the coroutine that runs jobs of a given kind"""
+        self._handlers[kind] = handler
+
+    def enqueue(self, db: Session, kind: str, payload: dict) -> Job:
+        """
+        Persist a new job and schedule it. Safe to call from sync endpoints,
+        which run in the threadpool: asyncio.Queue isn't thread-safe, so the
+        job id is handed to the serving loop.
+        """
+        if kind not in self._handlers:
+            raise ValueError(f"Unknown job kind: {kind}")
+        job = Job(
+            id=uuid.uuid4().hex,
+            kind=kind,
+            status="queued",
+            payload=json.dumps(payload, ensure_ascii=False),
+            created_at=datetime.utcnow()
+        )
+        db.add(job)
+        db.commit()
+        queue, loop = self._queue, self._loop
+        if queue is not None:  # Otherwise it is picked up by the next start()
+            if self._on_loop():
+                queue.put_nowait(job.id)
+            else:
+                try:
+                    loop.call_soon_threadsafe(queue.put_nowait, job.id)
+                except RuntimeError:
+                    pass  # Loop closed while shutting down; the job stays queued for the next start()
+        return job
+
+    async def start(self) -> None:
+        """Requeue unfinished jobs from a previous run and start the workers"""
+        with SessionLocal() as db:
+            db.query(Job).filter(
+                Job.status.in_(["succeeded", "failed"]),
+                Job.finished_at < datetime.utcnow() - timedelta(hours=JOB_RETENTION_HOURS)
+            ).delete(synchronize_session=False)
+            db.query(Job).filter(Job.status == "running").update(
+                {Job.status: "queued"}, synchronize_session=False
+            )
+            db.commit()
+            pending = db.query(Job.id).filter(Job.status == "queued").order_by(Job.created_at).all()
+
+        self._loop = asyncio.get_running_loop()
+        self._queue = asyncio.Queue()
+        for (job_id,) in pending:
+            self._queue.put_nowait(job_id)
+        if pending:
+            print(f"[Jobs] Resuming {len(pending)} unfinished job(s)")
+
+        self._workers = [asyncio.create_task(self._worker()) for _ in range(self.concurrency)]
+
+    async def stop(self) -> None:
+        """Cancel the workers; interrupted jobs go back to queued"""
+        for worker in self._workers:
+            worker.cancel()
+        await asyncio.gather(*self._workers, return_exceptions=True)
+        self._workers = []
+        self._queue = None
+        self._loop = None
+
+    def _on_loop(self) -> bool:
+        try:
+            return asyncio.get_running_loop() is self._loop
+        except RuntimeError:
+            return False
+
+    async def _worker(self) -> None:
+        while True:
+            job_id = await self._queue.get()
+            try:
+                await self._run(job_id)
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                print(f"[Jobs] Job {job_id} crashed the worker: {e}")
+            finally:
+                self._queue.task_done()
+
+    async def _run(self, job_id: str) -> None:
+        # Claim the job atomically so it never runs twice
+        with SessionLocal() as db:
+            claimed = db.query(Job).filter(Job.id == job_id, Job.status == "queued").update(
+                {Job.status: "running", Job.started_at: datetime.utcnow(), Job.attempts: Job.attempts + 1},
+                synchronize_session=False
+            )
+            db.commit()
+            if not claimed:
+                return
+            job = db.query(Job).filter(Job.id == job_id).first()
+            kind, payload = job.kind, json.loads(job.payload)
+
+        result: Optional[dict] = None
+        error: Optional[str] = None
+        try:
+            handler = self._handlers.get(kind)
+            if handler is None:
+                raise ValueError(f"No handler registered for job kind: {kind}")
+            result = await handler(payload)
+        except asyncio.CancelledError:
+            self._finish(job_id, "queued", None, None)
+            raise
+        except HTTPException as e:
+            error = str(e.detail)
+        except Exception as e:
+            error = str(e) or e.__class__.__name__
+
+        if error is not None:
+            print(f"[Jobs] {kind} job {job_id} failed: {error}")
+            self._finish(job_id, "failed", None, error)
+        else:
+            self._finish(job_id, "succeeded", result, None)
+
+    @staticmethod
+    def _finish(job_id: str, status: str, result: Optional[dict], error: Optional[str]) -> None:
+        with SessionLocal() as db:
+            db.query(Job).filter(Job.id == job_id).update({
+                Job.status: status,
+                Job.result: json.dumps(result, ensure_ascii=False) if result is not None else None,
+                Job.error: error,
+                Job.finished_at: datetime.utcnow() if status != "queued" else None
+            }, synchronize_session=False)
+            db.commit()
+
+    def queue_depth(self) -> int:
+        return self._queue.qsize() if self._queue is not None else 0
+
+
+def job_to_dict(job: Job) -> dict:
+    """Serialize a Job row for JobResponse"""
+    return {
+        "id": job.id,
+        "kind": job.kind,
+        "status": job.status,
+        "result": json.loads(job.result) if job.result else None,
+        "error": job.error,
+        "attempts": job.attempts or 0,
+        "created_at": job.created_at,
+        "started_at": job.started_at,
+        "finished_at": job.finished_at,
+    }
+
+
+# Process-wide queue; started and stopped from the FastAPI lifespan in main.py
+job_queue = JobQueue()
@@ -0,0 +1,360 @@
+"""
+Local topic / sentiment classifier for meeting notes.
+
+A linear model over hashed word and word-bigram features, trained on the
+meetings an AI provider has already analyzed (ai_analysis_version is set),
+so the providers' answers are the labels. Sentiment is a softmax over
+positive / neutral / negative; topics are one-vs-rest sigmoids over the
+topics the providers used often enough. Scoring a batch is one gather and
+one segmented sum in NumPy, so topics and sentiment cost microseconds per
+meeting instead of a provider call.
+
+Every prediction carries a confidence: the lower of the sentiment
+probability and the least certain topic decision. The analyzer answers
+locally only above LOCAL_CLASSIFIER_MIN_CONFIDENCE and sends everything
+else to a provider.
+
+Trained weights live in the local_models table so every server process
+loads the same model. Retrain with scripts/train_local_classifier.py or
+POST /api/analytics/local-model/train.
+"""
+import io
+import os
+import re
+import json
+import math
+import time
+import zlib
+import random
+import unicodedata
+from collections import Counter
+from typing import Dict, List, Optional, Tuple
+
+import numpy as np
+from pydantic import BaseModel
+from sqlalchemy.orm import Session
+
+from models import Meeting, LocalModel
+
+
+# off: never used; fallback: replaces the keyword rules when no provider answers;
+# prefer: also answers confident predictions before any provider is called
+LOCAL_CLASSIFIER = os.getenv("LOCAL_CLASSIFIER", "off").lower()
+LOCAL_CLASSIFIER_MIN_CONFIDENCE = float(os.getenv("LOCAL_CLASSIFIER_MIN_CONFIDENCE", "0.75"))
+LOCAL_CLASSIFIER_MIN_SAMPLES = int(os.getenv("LOCAL_CLASSIFIER_MIN_SAMPLES", "200"))
+LOCAL_CLASSIFIER_REFRESH_SECONDS = float(os.getenv("LOCAL_CLASSIFIER_REFRESH_SECONDS", "300"))
+
+MODEL_NAME = "topics_sentiment"
+KEEP_MODELS = 2  # Older trained models are deleted
+
+FEATURE_DIM = 1 << 16  # Hash buckets; bucket FEATURE_DIM is the always-on bias feature
+SENTIMENTS = ("positive", "neutral", "negative")
+MIN_TOPIC_SUPPORT = 5  # Meetings a topic needs before it gets its own head
+MAX_TOPICS = 64
+MAX_PREDICTED_TOPICS = 5
+
+TOKEN_RE = re.compile(r"\w\w+")
+
+Rows = Tuple[np.ndarray, np.ndarray, np.ndarray]  # CSR: indptr, indices, values
+
+
+class LocalPrediction(BaseModel):
+    topics: List[str]
+    sentiment: str
+    confidence: float  # 0..1
+
+
+_buckets: Dict[str, int] = {}
+_BUCKET_CACHE_SIZE = 200_000
+
+
+def _bucket(term: str) -> int:
+    bucket = _buckets.get(term)
+    if bucket is None:
+        # crc32 rather than hash(): str hashes are salted per process
+        bucket = zlib.crc32(term.encode()) & (FEATURE_DIM - 1)
+        if len(_buckets) < _BUCKET_CACHE_SIZE:
+            _buckets[term] = bucket
+    return bucket
+
+
+def featurize(texts: List[str]) -> Rows:
+    """Log-scaled, L2-normalized hashed word + bigram counts per text, plus the bias feature"""
+    indptr = [0]
+    indices: List[int] = []
+    values: List[float] = []
+    for text in texts:
+        tokens = TOKEN_RE.findall(unicodedata.normalize("NFC", text or "").lower())
+        counts = Counter(map(_bucket, tokens))
+        counts.update(_bucket(f"{a} {b}") for a, b in zip(tokens, tokens[1:]))
+        weights = [1.0 + math.log(count) for count in counts.values()]
+        norm = math.sqrt(sum(w * w for w in weights)) or 1.0
+        indices.extend(counts)
+        values.extend(w / norm for w in weights)
+        indices.append(FEATURE_DIM)
+        values.append(1.0)
+        indptr.append(len(indices))
+    return (
+        np.asarray(indptr, dtype=np.int64),
+        np.asarray(indices, dtype=np.int64),
+        np.asarray(values, dtype=np.float32)
+    )
+
+
+def _scores(weights: np.ndarray, indices: np.ndarray, values: np.ndarray, indptr: np.ndarray) -> np.ndarray:
+    # Every row has the bias feature, so no reduceat segment is empty
+    return np.add.reduceat(weights[indices] * values[:, None], indptr[:-1], axis=0)
+
+
+def _probabilities(scores: np.ndarray) -> np.ndarray:
+    """Softmax over the sentiment columns, sigmoid over the topic columns"""
+    sentiment = scores[:, :len(SENTIMENTS)]
+    sentiment = np.exp(sentiment - sentiment.max(axis=1, keepdims=True))
+    sentiment /= sentiment.sum(axis=1, keepdims=True)
+    topics = 1.0 / (1.0 + np.exp(-np.clip(scores[:, len(SENTIMENTS):], -30, 30)))
+    return np.hstack([sentiment, topics])
+
+
+class LocalClassifier:
+    def __init__(self, weights: np.ndarray, topics: List[str], model_id: Optional[int] = None):
+        self.weights = weights  # (FEATURE_DIM + 1, len(SENTIMENTS) + len(topics)) float32
+        self.topics = topics
+        self.model_id = model_id
+
+    def predict(self, texts: List[str]) -> List[LocalPrediction]:
+        """Topics, sentiment and confidence for a batch of notes"""
+        if not texts:
+            return []
+        indptr, indices, values = featurize(texts)
+        probs = _probabilities(_scores(self.weights, indices, values, indptr))
+        sentiment_probs = probs[:, :len(SENTIMENTS)]
+        topic_probs = probs[:, len(SENTIMENTS):]
+
+        confidence = sentiment_probs.max(axis=1)
+        if self.topics:
+            # The least certain yes/no topic decision bounds the confidence
+            confidence = np.minimum(confidence, (np.abs(topic_probs - 0.5) + 0.5).min(axis=1))
+        sentiments = sentiment_probs.argmax(axis=1)
+        ranked = np.argsort(-topic_probs, axis=1)[:, :MAX_PREDICTED_TOPICS]
+
+        predictions = []
+        for i in range(len(texts)):
+            topics = [self.topics[j] for j in ranked[i] if topic_probs[i, j] >= 0.5]
+            predictions.append(LocalPrediction(
+                topics=topics,
+                sentiment=SENTIMENTS[sentiments[i]],
+                confidence=round(float(confidence[i]), 4) if topics else 0.0  # No topic: let a provider decide
+            ))
+        return predictions
+
+    def to_bytes(self) -> bytes:
+        buffer = io.BytesIO()
+        np.savez_compressed(buffer, weights=self.weights, topics=np.array(self.topics, dtype=str))
+        return buffer.getvalue()
+
+    @classmethod
+    def from_bytes(cls, data: bytes, model_id: Optional[int] = None) -> "LocalClassifier":
+        with np.load(io.BytesIO(data)) as archive:
+            return cls(archive["weights"], [str(topic) for topic in archive["topics"]], model_id)
+
+
+def _topic_key(topic: str) -> str:
+    return " ".join(str(topic).lower().split())
+
+
+def _topic_vocabulary(topic_labels: List[List[str]]) -> List[str]:
+    """Topics used in at least MIN_TOPIC_SUPPORT meetings, most frequent first, in their most common spelling"""
+    support: Counter = Counter()
+    spellings: Dict[str, Counter] = {}
+    for labels in topic_labels:
+        for key in {_topic_key(label) for label in labels}:
+            support[key] += 1
+        for label in labels:
+            spellings.setdefault(_topic_key(label), Counter())[str(label).strip()] += 1
+    support.pop("general", None)  # Rule fallback placeholder
+    keys = [key for key, count in support.most_common(MAX_TOPICS) if count >= MIN_TOPIC_SUPPORT]
+    return [spellings[key].most_common(1)[0][0] for key in keys]
+
+
+def train(
+    texts: List[str],
+    topic_labels: List[List[str]],
+    sentiments: List[str],
+    epochs: int = 150,
+    learning_rate: float = 0.5,
+    l2: float = 1e-4
+) -> LocalClassifier:
+    """
+    Fit both heads with full-batch AdaGrad on the logistic losses.
+    Only buckets that occur in the training texts get weights: the non-zeros
+    are sorted by bucket once, so each epoch is a gather for the scores and a
+    segmented sum for the gradient.
+    """
+    topics = _topic_vocabulary(topic_labels)
+    topic_index = {_topic_key(topic): j for j, topic in enumerate(topics)}
+    columns = len(SENTIMENTS) + len(topics)
+
+    targets = np.zeros((len(texts), columns), dtype=np.float32)
+    for i, (labels, sentiment) in enumerate(zip(topic_labels, sentiments)):
+        targets[i, SENTIMENTS.index(sentiment)] = 1.0
+        for label in labels:
+            j = topic_index.get(_topic_key(label))
+            if j is not None:
+                targets[i, len(SENTIMENTS) + j] = 1.0
+
+    indptr, indices, values = featurize(texts)
+    buckets, compact = np.unique(indices, return_inverse=True)
+    row_of = np.repeat(np.arange(len(texts)), np.diff(indptr))
+    order = np.argsort(compact, kind="stable")
+    starts = np.flatnonzero(np.r_[True, np.diff(compact[order]) != 0])
+    sorted_rows, sorted_values = row_of[order], values[order][:, None]
+
+    weights = np.zeros((len(buckets), columns), dtype=np.float32)
+    squared = np.full_like(weights, 1e-8)
+    for _ in range(epochs):
+        errors = (_probabilities(_scores(weights, compact, values, indptr)) - targets) / len(texts)
+        gradient = np.add.reduceat(errors[sorted_rows] * sorted_values, starts, axis=0) + l2 * weights
+        squared += gradient * gradient
+        weights -= learning_rate * gradient / np.sqrt(squared)
+
+    full = np.zeros((FEATURE_DIM + 1, columns), dtype=np.float32)
+    full[buckets] = weights
+    return LocalClassifier(full, topics)
+
+
+def evaluate(
+    classifier: LocalClassifier,
+    texts: List[str],
+    topic_labels: List[List[str]],
+    sentiments: List[str],
+    min_confidence: float = LOCAL_CLASSIFIER_MIN_CONFIDENCE
+) -> dict:
+    """Accuracy on labeled notes, overall and on the predictions confident enough to answer locally"""
+    known = {_topic_key(topic) for topic in classifier.topics}
+
+    def summarize(indices: List[int]) -> dict:
+        correct = tp = fp = fn = 0
+        for i in indices:
+            correct += predictions[i].sentiment == sentiments[i]
+            predicted = {_topic_key(topic) for topic in predictions[i].topics}
+            expected = {_topic_key(topic) for topic in topic_labels[i]} & known
+            tp += len(predicted & expected)
+            fp += len(predicted - expected)
+            fn += len(expected - predicted)
+        return {
+            "count": len(indices),
+            "sentiment_accuracy": round(correct / len(indices), 4) if indices else None,
+            "topic_f1": round(2 * tp / (2 * tp + fp + fn), 4) if tp + fp + fn else None
+        }
+
+    predictions = classifier.predict(texts)
+    confident = [i for i, prediction in enumerate(predictions) if prediction.confidence >= min_confidence]
+    return {
+        "all": summarize(list(range(len(texts)))),
+        "confident": summarize(confident),
+        "answered_locally": round(len(confident) / len(texts), 4) if texts else 0.0,
+        "min_confidence": min_confidence
+    }
+
+
+def training_data(db: Session) -> Tuple[List[str], List[List[str]], List[str]]:
+    """Notes and provider labels of every meeting analyzed by an AI provider"""
+    texts, topic_labels, sentiments = [], [], []
+    query = db.query(Meeting.notes, Meeting.ai_topics, Meeting.ai_sentiment).filter(
+        Meeting.ai_analysis_version.isnot(None),
+        Meeting.notes.isnot(None),
+        Meeting.notes != "",
+        Meeting.ai_topics.isnot(None)
+    ).order_by(Meeting.id)
+    for notes, topics_json, sentiment in query.yield_per(500):
+        if sentiment not in SENTIMENTS:
+            continue
+        try:
+            topics = json.loads(topics_json)
+        except ValueError:
+            continue
+        if not isinstance(topics, list):
+            continue
+        texts.append(notes)
+        topic_labels.append([str(topic) for topic in topics])
+        sentiments.append(sentiment)
+    return texts, topic_labels, sentiments
+
+
+def train_from_db(db: Session, holdout: float = 0.2, seed: int = 0) -> LocalModel:
+    """
+    Train on the provider-labeled meetings, report held-out metrics, then
+    refit on all of them and store the model (raises ValueError if there are
+    too few labeled meetings).
+    """
+    texts, topic_labels, sentiments = training_data(db)
+    if len(texts) < LOCAL_CLASSIFIER_MIN_SAMPLES:
+        raise ValueError(
+            f"Only {len(texts)} AI-analyzed meetings; at least {LOCAL_CLASSIFIER_MIN_SAMPLES} are needed"
+        )
+
+    order = list(range(len(texts)))
+    random.Random(seed).shuffle(order)
+    cut = int(len(order) * (1 - holdout))
+    def pick(items: list, ids: List[int]) -> list:
+        return [items[i] for i in ids]
+
+    train_ids, test_ids = order[:cut], order[cut:]
+
+    started = time.perf_counter()
+    held_out = train(pick(texts, train_ids), pick(topic_labels, train_ids), pick(sentiments, train_ids))
+    metrics = evaluate(held_out, pick(texts, test_ids), pick(topic_labels, test_ids), pick(sentiments, test_ids))
+
+    classifier = train(texts, topic_labels, sentiments)
+    metrics["topics"] = len(classifier.topics)
+    metrics["train_seconds"] = round(time.perf_counter() - started, 2)
+
+    row = LocalModel(name=MODEL_NAME, data=classifier.to_bytes(), samples=len(texts), metrics=json.dumps(metrics))
+    db.add(row)
+    db.commit()
+    db.refresh(row)
+
+    stale = db.query(LocalModel.id).filter(LocalModel.name == MODEL_NAME).order_by(LocalModel.id.desc()).offset(KEEP_MODELS)
+    db.query(LocalModel).filter(LocalModel.id.in_([model_id for model_id, in stale.all()])).delete(synchronize_session=False)
+    db.commit()
+
+    classifier.model_id = row.id
+    local_classifier.set(classifier)
+    print(f"[Local Classifier] Trained model {row.id} on {len(texts)} meetings: {metrics}")
+    return row
+
+
+class LocalClassifierRegistry:
+    """The newest stored model, re-checked in the DB at most every LOCAL_CLASSIFIER_REFRESH_SECONDS"""
+
+    def __init__(self):
+        self.classifier: Optional[LocalClassifier] = None
+        self._checked_at: Optional[float] = None
+
+    def get(self, db: Optional[Session] = None) -> Optional[LocalClassifier]:
+        if LOCAL_CLASSIFIER == "off":
+            return None
+        if db is not None and (
+            self._checked_at is None or time.monotonic() - self._checked_at >= LOCAL_CLASSIFIER_REFRESH_SECONDS
+        ):
+            self.refresh(db)
+        return self.classifier
+
+    def refresh(self, db: Session) -> None:
+        self._checked_at = time.monotonic()
+        latest = db.query(LocalModel.id).filter(LocalModel.name == MODEL_NAME).order_by(LocalModel.id.desc()).first()
+        if latest is None or (self.classifier is not None and self.classifier.model_id == latest.id):
+            return
+        row = db.get(LocalModel, latest.id)
+        try:
+            self.classifier = LocalClassifier.from_bytes(row.data, row.id)
+            print(f"[Local Classifier] Loaded model {row.id} ({row.samples} meetings, {len(self.classifier.topics)} topics)")
+        except Exception as e:
+            print(f"[Local Classifier] Could not load model {row.id}: {e}")
+
+    def set(self, classifier: LocalClassifier) -> None:
+        self.classifier = classifier
+        self._checked_at = time.monotonic()
+
+
+local_classifier = LocalClassifierRegistry()
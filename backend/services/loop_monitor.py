@@ -0,0 +1,206 @@
+"""
+Event-loop lag monitor and blocking-call detector.
+
+A heartbeat coroutine sleeps LOOP_MONITOR_INTERVAL_MS at a time; how late it
+wakes up is the event-loop lag, kept as a rolling window of samples. A
+watchdog thread watches the heartbeat. When the loop has not come back for
+LOOP_BLOCK_THRESHOLD_MS, the watchdog captures the loop thread's stack while
+the blocking call is still on it. The route comes from the ASGI `scope` of
+the request frames on that stack. The report is completed with the full
+blocked time once the heartbeat runs again.
+
+Exposed as Prometheus text on /metrics and with stacks on /debug/event-loop.
+"""
+import asyncio
+import os
+import sys
+import threading
+import time
+import traceback
+from collections import Counter, deque
+from datetime import datetime
+from typing import Deque, List, Optional
+
+LOOP_MONITOR_ENABLED = os.getenv("LOOP_MONITOR_ENABLED", "true").lower() == "true"
+LOOP_MONITOR_INTERVAL_MS = float(os.getenv("LOOP_MONITOR_INTERVAL_MS", "50"))
+LOOP_BLOCK_THRESHOLD_MS = float(os.getenv("LOOP_BLOCK_THRESHOLD_MS", "100"))
+# Recent blocking reports kept with their stacks
+LOOP_MONITOR_MAX_REPORTS = int(os.getenv("LOOP_MONITOR_MAX_REPORTS", "50"))
+# Innermost frames kept per stack
+LOOP_MONITOR_STACK_DEPTH = 25
+
+LAG_WINDOW = 1200  # ~1 minute of samples at the default interval
+LAG_BUCKETS_MS = (5, 10, 25, 50, 100, 250, 500, 1000, 2500, 5000)
+
+
+def _route_of(frame) -> Optional[str]:
+    """'METHOD /route/{template}' of the innermost ASGI request frame on the stack"""
+    while frame is not None:
+        scope = frame.f_locals.get("scope")
+        if isinstance(scope, dict) and scope.get("type") == "http":
+            route = scope.get("route")
+            path = getattr(route, "path", None) or scope.get("path")
+            return f"{scope.get('method', '')} {path}".strip()
+        frame = frame.f_back
+    return None
+
+
+class LoopMonitor:
+    """Per-process monitor of the running event loop"""
+
+    def __init__(self):
+        self._lags: Deque[float] = deque(maxlen=LAG_WINDOW)
+        self._buckets: List[int] = [0] * (len(LAG_BUCKETS_MS) + 1)
+        self._lag_sum = 0.0
+        self._lag_count = 0
+        self._lag_max = 0.0
+        self._reports: Deque[dict] = deque(maxlen=LOOP_MONITOR_MAX_REPORTS)
+        self._blocked: Counter = Counter()  # route -> blocking episodes
+        self._blocked_seconds: Counter = Counter()
+        self._pending: Optional[dict] = None  # Captured by the watchdog, completed by the heartbeat
+        self._lock = threading.Lock()
+        self._beat = 0.0
+        self._beat_id = 0
+        self._loop_thread: Optional[int] = None
+        self._task: Optional[asyncio.Task] = None
+        self._watchdog: Optional[threading.Thread] = None
+        self._stopping = threading.Event()
+
+    def start(self) -> None:
+        """Start the heartbeat on the running loop and the watchdog thread"""
+        if not LOOP_MONITOR_ENABLED or self._task:
+            return
+        self._loop_thread = threading.get_ident()
+        self._beat = time.perf_counter()
+        self._stopping.clear()
+        self._task = asyncio.create_task(self._heartbeat())
+        self._watchdog = threading.Thread(target=self._watch, name="loop-monitor", daemon=True)
+        self._watchdog.start()
+        print(f"[Loop Monitor] Watching the event loop (threshold {LOOP_BLOCK_THRESHOLD_MS:.0f} ms)")
+
+    async def stop(self) -> None:
+        if not self._task:
+            return
+        self._stopping.set()
+        self._task.cancel()
+        await asyncio.gather(self._task, return_exceptions=True)
+        self._watchdog.join(timeout=1)
+        self._task = None
+        self._watchdog = None
+
+    async def _heartbeat(self) -> None:
+        interval = LOOP_MONITOR_INTERVAL_MS / 1000
+        while True:
+            started = time.perf_counter()
+            await asyncio.sleep(interval)
+            now = time.perf_counter()
+            self._record_lag((now - started - interval) * 1000)
+            with self._lock:
+                self._beat = now
+                self._beat_id += 1
+                pending, self._pending = self._pending, None
+            if pending:
+                self._complete(pending, (now - pending["_since"]) * 1000)
+
+    def _record_lag(self, lag_ms: float) -> None:
+        lag_ms = max(lag_ms, 0.0)
+        self._lags.append(lag_ms)
+        self._lag_sum += lag_ms
+        self._lag_count += 1
+        self._lag_max = max(self._lag_max, lag_ms)
+        for i, bound in enumerate(LAG_BUCKETS_MS):
+            if lag_ms <= bound:
+                self._buckets[i] += 1
+                break
+        else:
+            self._buckets[-1] += 1
+
+    def _watch(self) -> None:
+        interval = LOOP_MONITOR_INTERVAL_MS / 1000
+        threshold = LOOP_BLOCK_THRESHOLD_MS / 1000
+        poll = max(min(threshold / 4, 0.05), 0.005)
+        captured_beat = None
+        while not self._stopping.wait(poll):
+            with self._lock:
+                since, beat_id = self._beat, self._beat_id
+            if beat_id == captured_beat or time.perf_counter() - since < interval + threshold:
+                continue
+            frame = sys._current_frames().get(self._loop_thread)
+            if frame is None:
+                continue
+            report = {
+                "_since": since + interval,  # When the heartbeat was due
+                "at": datetime.utcnow().isoformat(),
+                "route": _route_of(frame),
+                "stack": traceback.format_stack(frame)[-LOOP_MONITOR_STACK_DEPTH:],
+            }
+            del frame
+            with self._lock:
+                if self._beat_id == beat_id:  # Still blocked: the stack shows the culprit
+                    self._pending = report
+            captured_beat = beat_id
+
+    def _complete(self, report: dict, blocked_ms: float) -> None:
+        report.pop("_since")
+        report["blocked_ms"] = round(blocked_ms, 1)
+        route = report["route"] or "(no request)"
+        self._blocked[route] += 1
+        self._blocked_seconds[route] += blocked_ms / 1000
+        self._reports.append(report)
+        culprit = report["stack"][-1].strip().splitlines()[0] if report["stack"] else "?"
+        print(f"[Loop Monitor] Event loop blocked {blocked_ms:.0f} ms in {route}: {culprit}")
+
+    def snapshot(self) -> dict:
+        lags = sorted(self._lags)
+        return {
+            "enabled": self._task is not None,
+            "threshold_ms": LOOP_BLOCK_THRESHOLD_MS,
+            "lag_ms": {
+                "p50": round(lags[len(lags) // 2], 2) if lags else None,
+                "p99": round(lags[min(len(lags) - 1, int(len(lags) * 0.99))], 2) if lags else None,
+                "max": round(self._lag_max, 2),
+            },
+            "blocked": {
+                route: {"count": count, "seconds": round(self._blocked_seconds[route], 3)}
+                for route, count in self._blocked.most_common()
+            },
+        }
+
+    def reports(self) -> List[dict]:
+        """Recent blocking reports, newest first"""
+        return list(reversed(self._reports))
+
+    def metrics(self) -> str:
+        """Prometheus text exposition"""
+        lines = [
+            "# HELP event_loop_lag_seconds Event-loop lag measured by the heartbeat.",
+            "# TYPE event_loop_lag_seconds histogram",
+        ]
+        cumulative = 0
+        for bound, count in zip(LAG_BUCKETS_MS, self._buckets):
+            cumulative += count
+            lines.append(f'event_loop_lag_seconds_bucket{{le="{bound / 1000}"}} {cumulative}')
+        lines.append(f'event_loop_lag_seconds_bucket{{le="+Inf"}} {self._lag_count}')
+        lines.append(f"event_loop_lag_seconds_sum {self._lag_sum / 1000:.6f}")
+        lines.append(f"event_loop_lag_seconds_count {self._lag_count}")
+        lines += [
+            "# HELP event_loop_blocked_total Times a callback held the event loop past the threshold.",
+            "# TYPE event_loop_blocked_total counter",
+        ]
+        lines += [f'event_loop_blocked_total{{route="{_label(route)}"}} {count}' for route, count in self._blocked.items()]
+        lines += [
+            "# HELP event_loop_blocked_seconds_total Time the event loop was held past the threshold.",
+            "# TYPE event_loop_blocked_seconds_total counter",
+        ]
+        lines += [
+            f'event_loop_blocked_seconds_total{{route="{_label(route)}"}} {seconds:.6f}'
+            for route, seconds in self._blocked_seconds.items()
+        ]
+        return "\n".join(lines) + "\n"
+
+
+def _label(value: str) -> str:
+    return value.replace("\\", "\\\\").replace('"', '\\"')
+
+
+loop_monitor = LoopMonitor()
@@ -0,0 +1,133 @@
+"""
+Content-defined chunking of meeting notes and merging of per-chunk analyses.
+
+A chunk ends after a line whose hash hits the boundary condition (once the
+chunk has reached a minimum size), or when it grows past the maximum size.
+Boundaries therefore depend only on nearby content: editing one line changes
+the chunk that contains it (and at most its neighbour), while every other
+chunk keeps the same text and hash, so its stored analysis can be reused.
+
+split_paragraphs() is the coarser splitter for very long notes: whole
+paragraphs packed under a token budget for map-reduce analysis.
+"""
+import os
+import hashlib
+from typing import Dict, List
+
+from schemas import AIAnalysisResponse
+from services.analysis_cache import normalize_notes
+
+
+CHUNK_MIN_CHARS = int(os.getenv("NOTE_CHUNK_MIN_CHARS", "2000"))
+CHUNK_MAX_CHARS = int(os.getenv("NOTE_CHUNK_MAX_CHARS", "6000"))
+CHUNK_BOUNDARY_MODULUS = 4  # On average every 4th line past the minimum size ends a chunk
+
+MAX_MERGED_TOPICS = 8
+
+SENTIMENT_SCORES = {"positive": 1.0, "neutral": 0.0, "negative": -1.0}
+
+
+def _is_boundary(line: str) -> bool:
+    digest = hashlib.sha1(line.encode()).digest()
+    return int.from_bytes(digest[:4], "big") % CHUNK_BOUNDARY_MODULUS == 0
+
+
+def split_notes(notes: str) -> List[str]:
+    """Split notes into content-defined chunks of whole lines"""
+    chunks: List[str] = []
+    current: List[str] = []
+    size = 0
+    for line in normalize_notes(notes).split("\n"):
+        current.append(line)
+        size += len(line) + 1
+        if size >= CHUNK_MAX_CHARS or (size >= CHUNK_MIN_CHARS and line.strip() and _is_boundary(line)):
+            chunks.append("\n".join(current).strip())
+            current, size = [], 0
+    if current:
+        chunks.append("\n".join(current).strip())
+    return [chunk for chunk in chunks if chunk]
+
+
+def estimate_tokens(text: str) -> int:
+    """Rough token count (~4 characters per token)"""
+    return len(text) // 4 + 1
+
+
+def split_paragraphs(notes: str, max_tokens: int) -> List[str]:
+    """
+    Pack whole paragraphs (blank-line separated) into parts of at most
+    `max_tokens`. An oversized paragraph is split at line boundaries, and an
+    oversized line is cut hard as a last resort.
+    """
+    max_chars = max_tokens * 4
+    pieces: List[str] = []
+    for paragraph in normalize_notes(notes).split("\n\n"):
+        if len(paragraph) <= max_chars:
+            pieces.append(paragraph)
+            continue
+        for line in paragraph.split("\n"):
+            pieces.extend(line[i:i + max_chars] for i in range(0, len(line), max_chars))
+
+    parts: List[str] = []
+    current = ""
+    for piece in pieces:
+        if current and len(current) + 2 + len(piece) > max_chars:
+            parts.append(current)
+            current = piece
+        else:
+            current = f"{current}\n\n{piece}" if current else piece
+    if current.strip():
+        parts.append(current)
+    return parts
+
+
+def merge_chunk_analyses(chunks: List[str], analyses: List[AIAnalysisResponse]) -> AIAnalysisResponse:
+    """
+    Combine per-chunk results into one meeting-level analysis without another
+    model call: topics ranked by the amount of text they appear in, sentiment
+    as a length-weighted average, insights and suggested actions concatenated
+    in note order with duplicates removed.
+    """
+    topic_weights: Dict[str, float] = {}
+    topic_names: Dict[str, str] = {}
+    sentiment_total = 0.0
+    weight_total = 0.0
+    insights: List[str] = []
+    actions: Dict[str, str] = {}
+
+    for chunk, analysis in zip(chunks, analyses):
+        weight = float(len(chunk))
+        weight_total += weight
+        sentiment_total += weight * SENTIMENT_SCORES.get(analysis.sentiment, 0.0)
+
+        for topic in analysis.topics:
+            key = topic.strip().lower()
+            if key:
+                topic_names.setdefault(key, topic.strip())
+                topic_weights[key] = topic_weights.get(key, 0.0) + weight
+
+        text = analysis.insights.strip()
+        if text and text not in insights:
+            insights.append(text)
+
+        for action in analysis.action_items_suggested:
+            actions.setdefault(action.strip().lower(), action.strip())
+
+    if len(topic_weights) > 1:
+        topic_weights.pop("general", None)  # Rule fallback placeholder
+    ranked = sorted(topic_weights, key=lambda key: topic_weights[key], reverse=True)[:MAX_MERGED_TOPICS]
+
+    score = sentiment_total / weight_total if weight_total else 0.0
+    if score > 0.25:
+        sentiment = "positive"
+    elif score < -0.25:
+        sentiment = "negative"
+    else:
+        sentiment = "neutral"
+
+    return AIAnalysisResponse(
+        insights=" ".join(insights),
+        topics=[topic_names[key] for key in ranked] or ["general"],
+        sentiment=sentiment,
+        action_items_suggested=[action for action in actions.values() if action]
+    )
@@ -0,0 +1,252 @@
+"""
+Fuzzy resolution of free-text person names to Employee ids.
+
+Extraction models return names as written in the screenshot: first name
+only, a typo, or the Hebrew spelling of a name stored in English (and the
+other way round). Each user gets an in-memory index of their active people:
+
+- every name token is normalized (case, niqqud, accents, Hebrew final
+  letters) and reduced to a consonant skeleton shared by both scripts
+  ("מיכל" and "Michal" both become "mkl");
+- an inverted index of padded character trigrams over the tokens and the
+  skeletons picks the MAX_CANDIDATES people sharing the most trigrams,
+  which are then scored with edit distance.
+
+A name's confidence is its best score, lowered when a second person scores
+almost as well ("Dana" with both Dana Levi and Dana Cohen on the team).
+
+The index is rebuilt when the user's people change: employee writes call
+invalidate(), and every lookup compares a cheap (count, max id, max
+updated_at) fingerprint so writes from other workers are picked up too.
+"""
+import os
+import re
+import threading
+import unicodedata
+from collections import Counter
+from dataclasses import dataclass
+from functools import lru_cache
+from typing import Dict, List, Optional, Set, Tuple
+
+from sqlalchemy import func, or_
+from sqlalchemy.orm import Session
+
+from models import Employee
+
+
+PERSON_MATCH_MIN_CONFIDENCE = float(os.getenv("PERSON_MATCH_MIN_CONFIDENCE", "0.6"))
+
+# A transliterated match is never as certain as a same-script one
+CROSS_SCRIPT_WEIGHT = 0.9
+# Per name token missing on one side ("Dana" vs "Dana Levi")
+MISSING_TOKEN_PENALTY = 0.9
+# Runner-ups within this score of the best make the match ambiguous
+AMBIGUITY_MARGIN = 0.15
+# People sharing the most trigrams with the name; only these are scored with edit distance
+MAX_CANDIDATES = 20
+
+HEBREW_RE = re.compile(r"[א-ת]")
+NIQQUD_RE = re.compile(r"[֑-ׇ]")
+WORD_RE = re.compile(r"[^\W\d_]+")
+
+HEBREW_FINALS = str.maketrans("ךםןףץ", "כמנפצ")
+# Consonant skeleton letters; matres lectionis and gutturals are dropped (None)
+HEBREW_SKELETON = {
+    "א": None, "ב": "b", "ג": "g", "ד": "d", "ה": "h", "ו": None, "ז": "z", "ח": "k",
+    "ט": "t", "י": None, "כ": "k", "ל": "l", "מ": "m", "נ": "n", "ס": "s", "ע": None,
+    "פ": "p", "צ": "c", "ק": "k", "ר": "r", "ש": "s", "ת": "t",
+}
+LATIN_DIGRAPHS = [("sch", "s"), ("sh", "s"), ("ch", "k"), ("kh", "k"), ("ph", "p"), ("th", "t"),
+                  ("tz", "c"), ("ts", "c"), ("ck", "k")]
+LATIN_SKELETON = {"v": "b", "w": "b", "f": "p", "q": "k", "c": "k", "j": "g", "x": "ks"}
+LATIN_VOWELS = set("aeiouy")
+
+
+def normalize(text: str) -> str:
+    text = unicodedata.normalize("NFKD", text or "")
+    text = "".join(ch for ch in text if not unicodedata.combining(ch))
+    return NIQQUD_RE.sub("", text).lower().translate(HEBREW_FINALS)
+
+
+def tokens(name: str) -> List[str]:
+    return WORD_RE.findall(normalize(name))
+
+
+def _collapse(letters: str) -> str:
+    return "".join(ch for i, ch in enumerate(letters) if i == 0 or letters[i - 1] != ch)
+
+
+def skeletons(token: str) -> List[str]:
+    """
+    Script-independent consonant skeletons of a normalized token. A Latin
+    v/w after the first letter may stand for a vav the Hebrew spelling drops
+    (Levi / לוי) or for a bet (Avi / אבי), so both variants are returned.
+    """
+    if HEBREW_RE.search(token):
+        letters = []
+        for i, ch in enumerate(token):
+            if ch == "ו" and i == 0:
+                letters.append("b")  # Initial vav is a consonant (Vered)
+            elif ch == "ה" and i == len(token) - 1:
+                continue  # Final he is a vowel (Dana)
+            elif HEBREW_SKELETON.get(ch):
+                letters.append(HEBREW_SKELETON[ch])
+        return [_collapse("".join(letters))]
+
+    if len(token) > 1 and token.endswith("h"):
+        token = token[:-1]  # Sarah
+    variants, i = [""], 0
+    while i < len(token):
+        for digraph, letter in LATIN_DIGRAPHS:
+            if token.startswith(digraph, i):
+                options, i = (letter,), i + len(digraph)
+                break
+        else:
+            ch, i = token[i], i + 1
+            if ch in LATIN_VOWELS:
+                continue
+            options = ("b", "") if ch in "vw" and i > 1 else (LATIN_SKELETON.get(ch, ch),)
+        variants = [variant + option for variant in variants for option in options]
+    return list(dict.fromkeys(_collapse(variant) for variant in variants))
+
+
+def edit_distance(a: str, b: str) -> int:
+    if len(a) < len(b):
+        a, b = b, a
+    previous = list(range(len(b) + 1))
+    for i, ca in enumerate(a, 1):
+        current = [i]
+        for j, cb in enumerate(b, 1):
+            current.append(min(previous[j] + 1, current[j - 1] + 1, previous[j - 1] + (ca != cb)))
+        previous = current
+    return previous[-1]
+
+
+@lru_cache(maxsize=65536)  # Name tokens repeat across people (first names, family names)
+def _ratio(a: str, b: str) -> float:
+    if not a or not b:
+        return 0.0
+    return 1.0 - edit_distance(a, b) / max(len(a), len(b))
+
+
+def _grams(text: str) -> Set[str]:
+    padded = f"^{text}$"
+    return {padded[i:i + 3] for i in range(max(1, len(padded) - 2))}
+
+
+@dataclass
+class _Token:
+    text: str
+    skeletons: List[str]
+    hebrew: bool
+
+    @classmethod
+    def of(cls, text: str) -> "_Token":
+        return cls(text, skeletons(text), bool(HEBREW_RE.search(text)))
+
+
+def token_similarity(a: _Token, b: _Token) -> float:
+    if a.hebrew == b.hebrew:
+        if len(a.text) == 1 or len(b.text) == 1:
+            return 0.8 if a.text[0] == b.text[0] else 0.0  # Initial ("Dana L.")
+        return _ratio(a.text, b.text)
+    return CROSS_SCRIPT_WEIGHT * max(_ratio(x, y) for x in a.skeletons for y in b.skeletons)
+
+
+def name_similarity(query: List[_Token], candidate: List[_Token]) -> float:
+    """Mean similarity of greedily paired tokens, penalized per unpaired token"""
+    if not query or not candidate:
+        return 0.0
+    pairs = sorted(
+        ((token_similarity(q, c), i, j) for i, q in enumerate(query) for j, c in enumerate(candidate)),
+        reverse=True
+    )
+    used_q, used_c, total = set(), set(), 0.0
+    for score, i, j in pairs:
+        if i not in used_q and j not in used_c:
+            used_q.add(i)
+            used_c.add(j)
+            total += score
+    paired = min(len(query), len(candidate))
+    return total / paired * MISSING_TOKEN_PENALTY ** abs(len(query) - len(candidate))
+
+
+class PersonIndex:
+    """Trigram-indexed active people of one user"""
+
+    def __init__(self, people: List[Tuple[int, str]]):
+        self.people: Dict[int, List[_Token]] = {}
+        self.grams: Dict[str, Set[int]] = {}
+        for person_id, name in people:
+            name_tokens = [_Token.of(token) for token in tokens(name)]
+            if not name_tokens:
+                continue
+            self.people[person_id] = name_tokens
+            for token in name_tokens:
+                for gram in self._token_grams(token):
+                    self.grams.setdefault(gram, set()).add(person_id)
+
+    @staticmethod
+    def _token_grams(token: _Token) -> Set[str]:
+        grams = _grams(token.text)
+        for variant in token.skeletons:
+            if variant:
+                grams |= {f"s{gram}" for gram in _grams(variant)}
+        return grams
+
+    def resolve(self, name: Optional[str]) -> Optional[Tuple[int, float]]:
+        """(person_id, confidence) of the best match, or None if nothing reaches PERSON_MATCH_MIN_CONFIDENCE"""
+        query = [_Token.of(token) for token in tokens(name or "")]
+        if not query:
+            return None
+        shared: Counter = Counter()
+        for token in query:
+            for gram in self._token_grams(token):
+                shared.update(self.grams.get(gram, ()))
+        candidates = [pid for pid, _ in shared.most_common(MAX_CANDIDATES)]
+
+        scored = sorted(((name_similarity(query, self.people[pid]), pid) for pid in candidates), reverse=True)
+        if not scored:
+            return None
+        best, person_id = scored[0]
+        runner_up = scored[1][0] if len(scored) > 1 else 0.0
+        margin = best - runner_up
+        confidence = best if margin >= AMBIGUITY_MARGIN else best * (0.5 + 0.5 * margin / AMBIGUITY_MARGIN)
+        if confidence < PERSON_MATCH_MIN_CONFIDENCE:
+            return None
+        return person_id, round(confidence, 3)
+
+
+class PersonIndexRegistry:
+    """Per-user PersonIndex cache (per process)"""
+
+    def __init__(self):
+        self._indexes: Dict[Optional[int], Tuple[tuple, PersonIndex]] = {}
+        self._lock = threading.Lock()
+
+    @staticmethod
+    def _scope(query, user_id: Optional[int]):
+        query = query.filter(or_(Employee.is_active == True, Employee.is_active.is_(None)))
+        if user_id:
+            query = query.filter(Employee.user_id == user_id)
+        return query
+
+    def get(self, db: Session, user_id: Optional[int]) -> PersonIndex:
+        fingerprint = tuple(self._scope(
+            db.query(func.count(Employee.id), func.max(Employee.id), func.max(Employee.updated_at)), user_id
+        ).one())
+        with self._lock:
+            cached = self._indexes.get(user_id)
+        if cached and cached[0] == fingerprint:
+            return cached[1]
+        index = PersonIndex(self._scope(db.query(Employee.id, Employee.name), user_id).all())
+        with self._lock:
+            self._indexes[user_id] = (fingerprint, index)
+        return index
+
+    def invalidate(self, user_id: Optional[int] = None) -> None:
+        with self._lock:
+            self._indexes.pop(user_id, None)
+
+
+person_index = PersonIndexRegistry()
@@ -0,0 +1,118 @@
+import os
+import time
+from typing import Callable, Dict, List, Optional, TypeVar
+
+T = TypeVar("T")
+
+
+class ProviderHealth:
+    """EWMA latency / error rate and circuit-breaker state for one provider+model"""
+
+    def __init__(self):
+        self.ewma_latency: Optional[float] = None
+        self.ewma_error_rate = 0.0
+        self.consecutive_failures = 0
+        self.opened_at: Optional[float] = None
+        self.probe_started_at: Optional[float] = None  # Half-open trial call in flight
+
+    def to_dict(self, now: float, cooldown: float) -> dict:
+        if self.opened_at is None:
+            state = "closed"
+        elif now - self.opened_at >= cooldown:
+            state = "half_open"
+        else:
+            state = "open"
+        return {
+            "state": state,
+            "ewma_latency_seconds": round(self.ewma_latency, 3) if self.ewma_latency is not None else None,
+            "ewma_error_rate": round(self.ewma_error_rate, 3),
+            "consecutive_failures": self.consecutive_failures,
+        }
+
+
+class ProviderRouter:
+    """
+    Routes AI calls to the fastest healthy provider.
+    Every call outcome updates an exponentially weighted moving average of
+    latency and error rate per "provider:model". After `failure_threshold`
+    consecutive failures the provider's circuit opens and it is skipped for
+    `cooldown` seconds; after that a single trial call is let through
+    (half-open) and a success closes the circuit again, a failure reopens it.
+    Concurrent calls keep skipping the provider while the trial is in flight;
+    a trial that never reports back (e.g. ordered but not called) expires
+    after another `cooldown`.
+    """
+
+    def __init__(self, alpha: float = 0.2, failure_threshold: int = 3, cooldown: float = 30.0):
+        self.alpha = alpha
+        self.failure_threshold = failure_threshold
+        self.cooldown = cooldown
+        self._health: Dict[str, ProviderHealth] = {}
+
+    def _get(self, key: str) -> ProviderHealth:
+        if key not in self._health:
+            self._health[key] = ProviderHealth()
+        return self._health[key]
+
+    def record(self, key: str, seconds: float, ok: bool) -> None:
+        health = self._get(key)
+        health.probe_started_at = None
+        health.ewma_error_rate = (1 - self.alpha) * health.ewma_error_rate + self.alpha * (0.0 if ok else 1.0)
+
+        if ok:
+            if health.ewma_latency is None:
+                health.ewma_latency = seconds
+            else:
+                health.ewma_latency = (1 - self.alpha) * health.ewma_latency + self.alpha * seconds
+            health.consecutive_failures = 0
+            health.opened_at = None
+            return
+
+        health.consecutive_failures += 1
+        if health.consecutive_failures >= self.failure_threshold:
+            if health.opened_at is None:
+                print(f"[Provider Router] Circuit opened for {key}")
+            health.opened_at = time.monotonic()
+
+    def is_available(self, key: str) -> bool:
+        """True when the circuit is closed, or when this caller gets the half-open trial call"""
+        health = self._health.get(key)
+        if health is None or health.opened_at is None:
+            return True
+        now = time.monotonic()
+        if now - health.opened_at < self.cooldown:
+            return False
+        if health.probe_started_at is not None and now - health.probe_started_at < self.cooldown:
+            return False
+        health.probe_started_at = now
+        return True
+
+    def _score(self, key: str) -> float:
+        health = self._health.get(key)
+        if health is None:
+            return 0.0  # Untried providers get a chance to report in
+        if health.ewma_latency is None:
+            return float("inf")  # Only failures so far
+        return health.ewma_latency / max(0.05, 1.0 - health.ewma_error_rate)
+
+    def order(self, candidates: List[T], key: Callable[[T], str]) -> List[T]:
+        """
+        Sort candidates fastest-healthy-first. Providers with an open circuit
+        are dropped unless every candidate is open, in which case the original
+        precedence order is kept as a last resort.
+        """
+        available = [c for c in candidates if self.is_available(key(c))]
+        if not available:
+            return list(candidates)
+        # sorted() is stable, so equal scores keep the configured precedence
+        return sorted(available, key=lambda c: self._score(key(c)))
+
+    def snapshot(self) -> dict:
+        now = time.monotonic()
+        return {key: health.to_dict(now, self.cooldown) for key, health in self._health.items()}
+
+
+provider_router = ProviderRouter(
+    failure_threshold=int(os.getenv("PROVIDER_CIRCUIT_FAILURES", "3")),
+    cooldown=float(os.getenv("PROVIDER_CIRCUIT_COOLDOWN_SECONDS", "30"))
+)
@@ -0,0 +1,244 @@
+import os
+import json
+import time
+import random
+import asyncio
+from email.utils import parsedate_to_datetime
+from typing import Dict, Optional
+
+import httpx
+
+
+# Defaults for every provider; override per provider with e.g. AI_OPENAI_RPM
+AI_MAX_CONCURRENCY = int(os.getenv("AI_MAX_CONCURRENCY", "4"))
+AI_RPM = float(os.getenv("AI_RPM", "60"))
+AI_TPM = float(os.getenv("AI_TPM", "200000"))
+AI_RATE_LIMIT_RETRIES = int(os.getenv("AI_RATE_LIMIT_RETRIES", "3"))
+AI_BACKOFF_BASE_SECONDS = float(os.getenv("AI_BACKOFF_BASE_SECONDS", "1"))
+AI_BACKOFF_MAX_SECONDS = float(os.getenv("AI_BACKOFF_MAX_SECONDS", "30"))
+
+# Rough token cost of one image in a vision request
+IMAGE_TOKEN_ESTIMATE = 1500
+
+
+def _provider_setting(provider: str, name: str, default: float) -> float:
+    return float(os.getenv(f"AI_{provider.upper()}_{name}", default))
+
+
+class TokenBucket:
+    """Classic token bucket: `rate` tokens per second up to `capacity`"""
+
+    def __init__(self, rate: float, capacity: float):
+        self.rate = rate
+        self.capacity = capacity
+        self.tokens = capacity
+        self.updated = time.monotonic()
+
+    def _refill(self) -> None:
+        now = time.monotonic()
+        self.tokens = min(self.capacity, self.tokens + (now - self.updated) * self.rate)
+        self.updated = now
+
+    def wait_time(self, amount: float) -> float:
+        """Seconds until `amount` tokens are available (0 if they are now)"""
+        self._refill()
+        amount = min(amount, self.capacity)  # An oversized request still gets through eventually
+        if self.tokens >= amount:
+            return 0.0
+        return (amount - self.tokens) / self.rate
+
+    def take(self, amount: float) -> None:
+        self._refill()
+        self.tokens -= min(amount, self.capacity)
+
+
+class ProviderLimiter:
+    """
+    Concurrency + rate limits for one provider.
+    A semaphore caps in-flight calls; two token buckets cap requests per
+    minute and estimated tokens per minute. A 429 pauses the whole provider
+    until its Retry-After has passed, so queued calls don't pile onto it.
+    """
+
+    def __init__(self, provider: str):
+        self.provider = provider
+        self.semaphore = asyncio.Semaphore(int(_provider_setting(provider, "MAX_CONCURRENCY", AI_MAX_CONCURRENCY)))
+        rpm = _provider_setting(provider, "RPM", AI_RPM)
+        tpm = _provider_setting(provider, "TPM", AI_TPM)
+        self.requests = TokenBucket(rpm / 60.0, max(1.0, rpm / 6.0))  # Allow bursts of ~10s worth
+        self.tokens = TokenBucket(tpm / 60.0, max(1.0, tpm / 6.0))
+        self.paused_until = 0.0
+
+        self.waiting = 0
+        self.in_flight = 0
+        self.throttled = 0
+        self.retries = 0
+
+    async def acquire(self, estimated_tokens: float) -> None:
+        """Wait for a concurrency slot and enough request/token budget"""
+        self.waiting += 1
+        try:
+            await self.semaphore.acquire()
+            try:
+                while True:
+                    delay = max(
+                        self.paused_until - time.monotonic(),
+                        self.requests.wait_time(1),
+                        self.tokens.wait_time(estimated_tokens)
+                    )
+                    if delay <= 0:
+                        break
+                    await asyncio.sleep(delay)
+            except BaseException:
+                self.semaphore.release()
+                raise
+            self.requests.take(1)
+            self.tokens.take(estimated_tokens)
+        finally:
+            self.waiting -= 1
+        self.in_flight += 1
+
+    def release(self) -> None:
+        self.in_flight -= 1
+        self.semaphore.release()
+
+    def pause(self, seconds: float) -> None:
+        self.throttled += 1
+        self.paused_until = max(self.paused_until, time.monotonic() + seconds)
+
+    def snapshot(self) -> dict:
+        return {
+            "in_flight": self.in_flight,
+            "queue_depth": self.waiting,
+            "throttled": self.throttled,
+            "retries": self.retries,
+            "tokens_available": round(self.tokens.tokens),
+        }
+
+
+class RateLimiter:
+    """Registry of per-provider limiters (created on first use)"""
+
+    def __init__(self):
+        self._limiters: Dict[str, ProviderLimiter] = {}
+
+    def for_provider(self, provider: str) -> ProviderLimiter:
+        if provider not in self._limiters:
+            self._limiters[provider] = ProviderLimiter(provider)
+        return self._limiters[provider]
+
+    def snapshot(self) -> dict:
+        return {provider: limiter.snapshot() for provider, limiter in self._limiters.items()}
+
+
+rate_limiter = RateLimiter()
+
+
+def estimate_request_tokens(body: bytes) -> float:
+    """
+    Estimate the tokens a provider request will consume: ~4 characters per
+    text token, a flat cost per embedded image and the requested output size.
+    """
+    try:
+        data = json.loads(body) if body else None
+    except ValueError:
+        return len(body) / 4
+
+    total = 0.0
+
+    def walk(value, key: Optional[str] = None) -> None:
+        nonlocal total
+        if isinstance(value, dict):
+            for k, v in value.items():
+                walk(v, k)
+        elif isinstance(value, list):
+            for item in value:
+                walk(item, key)
+        elif isinstance(value, str):
+            if value.startswith("data:image") or key in ("data", "url") and len(value) > 1000:
+                total += IMAGE_TOKEN_ESTIMATE
+            else:
+                total += len(value) / 4
+        elif isinstance(value, int) and key in ("max_tokens", "maxOutputTokens", "max_output_tokens"):
+            total += value
+
+    walk(data)
+    return total
+
+
+def retry_after_seconds(response: httpx.Response, attempt: int) -> float:
+    """Delay before retrying a throttled call: Retry-After if sent, else jittered exponential backoff"""
+    backoff = min(AI_BACKOFF_MAX_SECONDS, AI_BACKOFF_BASE_SECONDS * (2 ** attempt))
+    header = response.headers.get("retry-after")
+    if header:
+        try:
+            retry_after = float(header)
+        except ValueError:
+            try:
+                retry_after = parsedate_to_datetime(header).timestamp() - time.time()
+            except (TypeError, ValueError):
+                retry_after = 0.0
+        backoff = max(min(retry_after, AI_BACKOFF_MAX_SECONDS), 0.0)
+    return backoff + random.uniform(0, backoff * 0.25)
+
+
+class _ReleaseOnClose(httpx.AsyncByteStream):
+    """Response body stream that gives the concurrency slot back once closed"""
+
+    def __init__(self, stream: httpx.AsyncByteStream, release):
+        self.stream = stream
+        self._release = release
+
+    async def __aiter__(self):
+        async for chunk in self.stream:
+            yield chunk
+
+    async def aclose(self) -> None:
+        try:
+            await self.stream.aclose()
+        finally:
+            if self._release is not None:
+                release, self._release = self._release, None
+                release()
+
+
+class RateLimitedTransport(httpx.AsyncBaseTransport):
+    """
+    httpx transport wrapper that runs every request of one provider through
+    its ProviderLimiter and retries 429s (honouring Retry-After) before the
+    response reaches the caller.
+    The concurrency slot is held until the response is closed, so a
+    streamed body (client.stream) counts as in flight until it is consumed.
+    """
+
+    def __init__(self, transport: httpx.AsyncBaseTransport, limiter: ProviderLimiter):
+        self.transport = transport
+        self.limiter = limiter
+
+    async def handle_async_request(self, request: httpx.Request) -> httpx.Response:
+        estimated_tokens = estimate_request_tokens(await request.aread())  # Also buffers multipart uploads
+        attempt = 0
+        while True:
+            await self.limiter.acquire(estimated_tokens)
+            try:
+                response = await self.transport.handle_async_request(request)
+            except BaseException:
+                self.limiter.release()
+                raise
+            if response.is_closed:  # Body already buffered by the inner transport
+                self.limiter.release()
+            else:
+                response.stream = _ReleaseOnClose(response.stream, self.limiter.release)
+
+            if response.status_code != 429 or attempt >= AI_RATE_LIMIT_RETRIES:
+                return response
+
+            delay = retry_after_seconds(response, attempt)
+            await response.aclose()
+            print(f"[Rate Limit] {self.limiter.provider} returned 429, retrying in {delay:.1f}s")
+            self.limiter.pause(delay)
+            self.limiter.retries += 1
+            attempt += 1
+
+    async def aclose(self) -> None:
+        await self.transport.aclose()
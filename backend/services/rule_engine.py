@@ -0,0 +1,135 @@
+"""
+Rule-based meeting analysis used when no AI provider is available, and for
+offline batch runs over many meetings. All keyword tables and patterns are
+built once at import time.
+"""
+import re
+from typing import Iterable, List, Optional, Tuple
+
+from schemas import AIAnalysisResponse, TaskCreate, ExtractTasksResponse
+
+
+TOPIC_KEYWORDS = {
+    "career": ("career", "promotion", "growth", "קידום", "קריירה"),
+    "feedback": ("feedback", "review", "פידבק", "משוב"),
+    "blockers": ("blocker", "stuck", "problem", "issue", "חסימה", "בעיה"),
+    "project": ("project", "deadline", "delivery", "פרויקט", "דדליין"),
+    "personal": ("personal", "family", "health", "אישי", "משפחה", "בריאות"),
+    "learning": ("learning", "course", "training", "למידה", "קורס", "הכשרה"),
+    "team": ("team", "collaboration", "צוות", "שיתוף פעולה"),
+    "workload": ("workload", "overtime", "stress", "עומס", "שעות נוספות", "לחץ"),
+}
+TOPIC_ITEMS = tuple(TOPIC_KEYWORDS.items())
+
+POSITIVE_WORDS = ("great", "excellent", "happy", "good", "success", "מצוין", "טוב", "שמח", "הצלחה")
+NEGATIVE_WORDS = ("problem", "issue", "frustrated", "unhappy", "difficult", "בעיה", "מתוסכל", "קשה")
+
+SUGGESTED_ACTIONS = (
+    (("blocker", "חסימה"), "Follow up on blockers mentioned"),
+    (("deadline", "דדליין"), "Review project timeline"),
+    (("feedback", "משוב"), "Provide requested feedback"),
+)
+
+HIGH_PRIORITY_WORDS = ("urgent", "דחוף", "asap", "critical")
+LOW_PRIORITY_WORDS = ("when possible", "כשיהיה זמן", "low priority")
+
+# The six action-item patterns of the original per-line loop, merged into one
+# multiline alternation so a whole document is scanned in a single pass.
+# Bulleted forms are tried first, in the same order, then a TODO marker
+# anywhere in a line. Horizontal whitespace ([^\S\n]) keeps matches on one line.
+_WS = r"[^\S\n]"
+ACTION_ITEM_RE = re.compile(
+    rf"^{_WS}*[-•*]{_WS}*(?:"
+    rf"(?:TODO|לעשות|משימה|action item)[:：]?{_WS}*(.+)"
+    rf"|צריך{_WS}+(.+)"
+    rf"|need to{_WS}+(.+)"
+    rf"|should{_WS}+(.+)"
+    rf"|will{_WS}+(.+)"
+    rf")"
+    rf"|(?:TODO|לעשות|משימה)[:：]{_WS}*(.+)",
+    re.IGNORECASE | re.MULTILINE
+)
+
+
+def summarize(topics: List[str], sentiment: str) -> str:
+    """Template insights sentence for rule / local-model answers"""
+    insights_parts = []
+    if topics:
+        insights_parts.append(f"Main discussion areas: {', '.join(topics)}.")
+    if sentiment == "positive":
+        insights_parts.append("Overall positive tone in the conversation.")
+    elif sentiment == "negative":
+        insights_parts.append("Some concerns or challenges were discussed.")
+    return " ".join(insights_parts) if insights_parts else "Standard 1:1 discussion."
+
+
+def analyze(notes: str) -> AIAnalysisResponse:
+    """Topics, sentiment, insights and suggested actions from keyword rules"""
+    notes_lower = notes.lower()
+
+    # Substring search is done in C; for this many keywords it beats a single
+    # Python-level regex automaton, so the tables are just scanned directly.
+    topics = [topic for topic, keywords in TOPIC_ITEMS if any(kw in notes_lower for kw in keywords)]
+
+    positive_count = sum(1 for word in POSITIVE_WORDS if word in notes_lower)
+    negative_count = sum(1 for word in NEGATIVE_WORDS if word in notes_lower)
+
+    if positive_count > negative_count:
+        sentiment = "positive"
+    elif negative_count > positive_count:
+        sentiment = "negative"
+    else:
+        sentiment = "neutral"
+
+    insights = summarize(topics, sentiment)
+
+    action_items = [action for words, action in SUGGESTED_ACTIONS if any(w in notes_lower for w in words)]
+
+    return AIAnalysisResponse(
+        insights=insights,
+        topics=topics if topics else ["general"],
+        sentiment=sentiment,
+        action_items_suggested=action_items
+    )
+
+
+def extract_tasks(
+    notes: str, person_id: Optional[int] = None, meeting_id: Optional[int] = None
+) -> ExtractTasksResponse:
+    """Action items marked by bullets / TODO markers, one per line at most"""
+    tasks = []
+    for match in ACTION_ITEM_RE.finditer(notes):
+        title = match.group(match.lastindex).strip()
+        if len(title) <= 5:  # Filter very short matches
+            continue
+
+        line_start = notes.rfind("\n", 0, match.start()) + 1
+        line_lower = notes[line_start:match.end()].lower()
+        priority = "medium"
+        if any(word in line_lower for word in HIGH_PRIORITY_WORDS):
+            priority = "high"
+        elif any(word in line_lower for word in LOW_PRIORITY_WORDS):
+            priority = "low"
+
+        tasks.append(TaskCreate(
+            title=title[:200],  # Limit length
+            description=None,
+            task_type="from_meeting",
+            priority=priority,
+            person_id=person_id,
+            meeting_id=meeting_id
+        ))
+
+    return ExtractTasksResponse(suggested_tasks=tasks)
+
+
+def analyze_batch(notes_list: Iterable[str]) -> List[AIAnalysisResponse]:
+    """Rule analysis for many meetings (offline runs, backfills)"""
+    return [analyze(notes or "") for notes in notes_list]
+
+
+def extract_tasks_batch(
+    items: Iterable[Tuple[str, Optional[int], Optional[int]]]
+) -> List[ExtractTasksResponse]:
+    """Rule task extraction for many (notes, person_id, meeting_id) tuples"""
+    return [extract_tasks(notes or "", person_id, meeting_id) for notes, person_id, meeting_id in items]
@@ -0,0 +1,35 @@
+import os
+
+from fastapi import HTTPException, Request
+
+
+# Screenshots above this size are rejected before (or while) they are read
+MAX_SCREENSHOT_BYTES = int(os.getenv("MAX_SCREENSHOT_BYTES", str(10 * 1024 * 1024)))
+
+
+async def read_screenshot_body(request: Request) -> bytearray:
+    """
+    Read a raw binary screenshot upload (Content-Type image/* or
+    application/octet-stream) with an enforced size limit.
+    The declared Content-Length is checked before any byte is read, and the
+    stream is collected chunk by chunk into one buffer, so an oversized body
+    is cut off early and the upload is held in memory exactly once (the
+    bytearray is used as is wherever bytes are expected).
+    """
+    content_type = request.headers.get("content-type", "").split(";")[0].strip().lower()
+    if content_type and not (content_type.startswith("image/") or content_type == "application/octet-stream"):
+        raise HTTPException(status_code=415, detail="Expected an image upload")
+
+    declared = request.headers.get("content-length")
+    if declared and declared.isdigit() and int(declared) > MAX_SCREENSHOT_BYTES:
+        raise HTTPException(status_code=413, detail="Screenshot is too large")
+
+    body = bytearray()
+    async for chunk in request.stream():
+        if len(body) + len(chunk) > MAX_SCREENSHOT_BYTES:
+            raise HTTPException(status_code=413, detail="Screenshot is too large")
+        body += chunk
+
+    if not body:
+        raise HTTPException(status_code=400, detail="Empty image upload")
+    return body
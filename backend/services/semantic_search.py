@@ -0,0 +1,536 @@
+"""
+Local semantic search over meetings, quick notes and tasks.
+
+Documents are embedded without any network call: hashed word, word-bigram
+and character-trigram counts, TF-IDF weighted, projected onto the top
+singular vectors of the tenant's own TF-IDF matrix (latent semantic
+analysis; randomized SVD in NumPy), concatenated with a fixed random
+projection of the same hashed terms so words that appeared after the last
+fit still match exactly. Every tenant (user) has its own index
+directory under SEARCH_INDEX_DIR:
+
+    model-<gen>.npz     kept feature buckets, idf and the projection matrix
+    vectors-<gen>.f32   unit-length float32 embeddings, memory-mapped
+    keys-<gen>.i64      (kind, id) per row; kind 0 marks a deleted row
+    meta.json           current generation, row count and capacity
+
+A write folds the changed document into the existing projection and
+rewrites its row in place. The projection is refit (a new generation) once
+the folded-in documents outnumber SEARCH_REFIT_FRACTION of the fitted ones,
+or when the index is older than SEARCH_INDEX_MAX_AGE_HOURS. A query is one
+matrix-vector product over the mapped rows plus argpartition, on a snapshot
+of one generation taken without the writers' lock, so a running rebuild
+never blocks or tears a search.
+
+The index is derived data: a missing or broken directory is rebuilt from
+the database on the next search.
+"""
+import os
+import re
+import json
+import time
+import zlib
+import threading
+import unicodedata
+from collections import Counter
+from contextlib import contextmanager
+from pathlib import Path
+from typing import Dict, List, Optional, Tuple
+
+import numpy as np
+from sqlalchemy.orm import Session, joinedload
+
+from models import Meeting, Employee, QuickNote, Task
+
+try:
+    import fcntl
+except ImportError:  # Windows: only in-process locking
+    fcntl = None
+
+
+SEARCH_INDEX_DIR = Path(os.getenv("SEARCH_INDEX_DIR", "./search_index"))
+SEARCH_EMBEDDING_DIM = int(os.getenv("SEARCH_EMBEDDING_DIM", "128"))
+SEARCH_REFIT_FRACTION = float(os.getenv("SEARCH_REFIT_FRACTION", "0.3"))
+SEARCH_REFIT_MIN_DOCS = 50  # Small indexes are not refit on every write
+SEARCH_INDEX_MAX_AGE_HOURS = float(os.getenv("SEARCH_INDEX_MAX_AGE_HOURS", "24"))
+SEARCH_SEMANTIC_WEIGHT = float(os.getenv("SEARCH_SEMANTIC_WEIGHT", "0.6"))  # The rest goes to exact term overlap
+
+FEATURE_MASK = (1 << 22) - 1
+MAX_FEATURES = 50_000
+MIN_CAPACITY = 1024
+SVD_OVERSAMPLING = 10
+SVD_POWER_ITERATIONS = 2
+PRODUCT_BLOCK = 250_000  # Non-zeros per block in the sparse products
+LEXICAL_ROWS = 1 << 16
+LEXICAL_DIM = 64
+LEXICAL_SEED = 20240601
+SVD_SAMPLE_DOCS = 5000  # Larger corpora fit the projection on a sample, then embed everything
+SNAPSHOT_RETRIES = 5  # Reads racing another process's rebuild
+
+KINDS = {"meeting": 1, "quick_note": 2, "task": 3}
+KIND_NAMES = {code: name for name, code in KINDS.items()}
+
+TOKEN_RE = re.compile(r"\w+")
+
+
+# ============== Documents ==============
+
+def _join(*parts: Optional[str]) -> str:
+    return "\n".join(part for part in parts if part)
+
+
+def meeting_text(meeting: Meeting) -> str:
+    return _join(meeting.employee.name if meeting.employee else None, meeting.summary, meeting.notes)
+
+
+def quick_note_text(note: QuickNote) -> str:
+    return _join(note.person.name if note.person else None, note.title, note.content)
+
+
+def task_text(task: Task) -> str:
+    return _join(task.person.name if task.person else None, task.title)
+
+
+def _owned(column, user_id: Optional[int]):
+    return column.is_(None) if user_id is None else column == user_id
+
+
+def tenant_documents(db: Session, user_id: Optional[int]) -> List[Tuple[int, int, str]]:
+    """(kind, id, text) of every searchable document of a user"""
+    docs = []
+    meetings = db.query(Meeting).join(Employee).options(joinedload(Meeting.employee)).filter(
+        _owned(Employee.user_id, user_id)
+    )
+    docs.extend((KINDS["meeting"], m.id, meeting_text(m)) for m in meetings.yield_per(500))
+    notes = db.query(QuickNote).options(joinedload(QuickNote.person)).filter(_owned(QuickNote.user_id, user_id))
+    docs.extend((KINDS["quick_note"], n.id, quick_note_text(n)) for n in notes.yield_per(500))
+    tasks = db.query(Task).options(joinedload(Task.person)).filter(_owned(Task.user_id, user_id))
+    docs.extend((KINDS["task"], t.id, task_text(t)) for t in tasks.yield_per(500))
+    return docs
+
+
+# ============== Embedding ==============
+
+def _terms(text: str) -> Tuple[np.ndarray, np.ndarray]:
+    """
+    (bucket ids, counts) of the hashed words, word bigrams and character
+    trigrams (the trigrams also match Hebrew words with attached prefixes)
+    """
+    words = TOKEN_RE.findall(unicodedata.normalize("NFC", text or "").lower())
+    terms = list(words)
+    terms.extend(f"{a} {b}" for a, b in zip(words, words[1:]))
+    for word in words:
+        if len(word) > 2:
+            padded = f"<{word}>"
+            terms.extend(f"#{padded[i:i + 3]}" for i in range(len(padded) - 2))
+    counts = Counter(zlib.crc32(term.encode()) & FEATURE_MASK for term in terms)
+    return (
+        np.fromiter(counts.keys(), dtype=np.int64, count=len(counts)),
+        np.fromiter(counts.values(), dtype=np.float32, count=len(counts))
+    )
+
+
+class _Sparse:
+    """
+    CSR TF-IDF rows with the two products the SVD needs (X @ M and X.T @ Y).
+    Columns are the fitted feature buckets; with lexical=True they are every
+    term's hash folded into LEXICAL_ROWS, and terms unseen at fit time are
+    weighted like the rarest fitted ones.
+    """
+
+    def __init__(
+        self,
+        term_counts: List[Tuple[np.ndarray, np.ndarray]],
+        buckets: np.ndarray,
+        idf: np.ndarray,
+        lexical: bool = False
+    ):
+        indptr, cols, vals = [0], [], []
+        unseen_idf = float(idf.max())
+        for ids, tf in term_counts:
+            pos = np.minimum(np.searchsorted(buckets, ids), len(buckets) - 1)
+            known = buckets[pos] == ids
+            if lexical:
+                columns = ids & (LEXICAL_ROWS - 1)
+                weights = (1.0 + np.log(tf)) * np.where(known, idf[pos], unseen_idf)
+            else:
+                columns = pos[known]
+                weights = (1.0 + np.log(tf[known])) * idf[columns]
+            norm = float(np.sqrt(weights @ weights))
+            if norm == 0.0:
+                # Keep every row non-empty so reduceat segments line up
+                cols.append(np.zeros(1, dtype=np.int64))
+                vals.append(np.zeros(1, dtype=np.float32))
+            else:
+                cols.append(columns)
+                vals.append((weights / norm).astype(np.float32))
+            indptr.append(indptr[-1] + len(cols[-1]))
+        self.n, self.m = len(term_counts), LEXICAL_ROWS if lexical else len(buckets)
+        self.indptr = np.asarray(indptr, dtype=np.int64)
+        self.cols = np.concatenate(cols) if cols else np.zeros(0, dtype=np.int64)
+        self.vals = np.concatenate(vals) if vals else np.zeros(0, dtype=np.float32)
+        self._transposed = None
+
+    def _blocks(self, starts: np.ndarray, total: int):
+        """Consecutive segment ranges holding about PRODUCT_BLOCK non-zeros each (bounds the gather's memory)"""
+        first = 0
+        while first < len(starts):
+            last = int(np.searchsorted(starts, starts[first] + PRODUCT_BLOCK, side="right"))
+            last = max(last, first + 1)
+            end = int(starts[last]) if last < len(starts) else total
+            yield first, last, int(starts[first]), end
+            first = last
+
+    def dot(self, matrix: np.ndarray) -> np.ndarray:
+        out = np.empty((self.n, matrix.shape[1]), dtype=np.float32)
+        for first, last, begin, end in self._blocks(self.indptr[:-1], len(self.cols)):
+            gathered = matrix[self.cols[begin:end]] * self.vals[begin:end, None]
+            out[first:last] = np.add.reduceat(gathered, self.indptr[first:last] - begin, axis=0)
+        return out
+
+    def tdot(self, matrix: np.ndarray) -> np.ndarray:
+        if self._transposed is None:
+            order = np.argsort(self.cols, kind="stable")
+            rows = np.repeat(np.arange(self.n), np.diff(self.indptr))[order]
+            sorted_cols = self.cols[order]
+            starts = np.flatnonzero(np.r_[True, np.diff(sorted_cols) != 0])
+            self._transposed = (rows, self.vals[order][:, None], sorted_cols[starts], starts)
+        rows, vals, cols, starts = self._transposed
+        out = np.zeros((self.m, matrix.shape[1]), dtype=np.float32)
+        for first, last, begin, end in self._blocks(starts, len(rows)):
+            gathered = matrix[rows[begin:end]] * vals[begin:end]
+            out[cols[first:last]] = np.add.reduceat(gathered, starts[first:last] - begin, axis=0)
+        return out
+
+
+def _projection(matrix: _Sparse, dim: int) -> np.ndarray:
+    """Top right singular vectors of the TF-IDF matrix (randomized SVD with power iterations)"""
+    rank = min(dim + SVD_OVERSAMPLING, matrix.n, matrix.m)
+    rng = np.random.default_rng(0)
+    basis, _ = np.linalg.qr(matrix.dot(rng.standard_normal((matrix.m, rank), dtype=np.float32)))
+    for _ in range(SVD_POWER_ITERATIONS):
+        # Orthonormalizing only on the (small) document side is stable enough for two rounds
+        basis, _ = np.linalg.qr(matrix.dot(matrix.tdot(basis)))
+    # X.T @ Q = V S W.T, so the left factor of this small SVD is V
+    vectors, _, _ = np.linalg.svd(matrix.tdot(basis), full_matrices=False)
+    return np.ascontiguousarray(vectors[:, :min(dim, vectors.shape[1])], dtype=np.float32)
+
+
+def _unit_rows(matrix: np.ndarray) -> np.ndarray:
+    norms = np.linalg.norm(matrix, axis=1, keepdims=True)
+    return (matrix / np.where(norms == 0, 1, norms)).astype(np.float32)
+
+
+_lexical_projection: Optional[np.ndarray] = None
+
+
+def _lexical_matrix() -> np.ndarray:
+    """Fixed Gaussian random projection of the hashed terms (same seed in every process)"""
+    global _lexical_projection
+    if _lexical_projection is None:
+        rng = np.random.default_rng(LEXICAL_SEED)
+        _lexical_projection = rng.standard_normal((LEXICAL_ROWS, LEXICAL_DIM), dtype=np.float32) / np.float32(np.sqrt(LEXICAL_DIM))
+    return _lexical_projection
+
+
+def embed(
+    term_counts: List[Tuple[np.ndarray, np.ndarray]], buckets: np.ndarray, idf: np.ndarray, projection: np.ndarray
+) -> np.ndarray:
+    """
+    Unit-length [semantic | lexical] rows: a dot product is
+    SEARCH_SEMANTIC_WEIGHT * LSA cosine plus the rest * random-projection
+    cosine. The lexical part keeps words the projection has never seen
+    (documents folded in since the last fit) findable.
+    """
+    semantic = _unit_rows(_Sparse(term_counts, buckets, idf).dot(projection))
+    lexical = _unit_rows(_Sparse(term_counts, buckets, idf, lexical=True).dot(_lexical_matrix()))
+    return np.hstack([
+        semantic * np.float32(np.sqrt(SEARCH_SEMANTIC_WEIGHT)),
+        lexical * np.float32(np.sqrt(1 - SEARCH_SEMANTIC_WEIGHT))
+    ])
+
+
+def fit(texts: List[str], dim: int = SEARCH_EMBEDDING_DIM) -> Tuple[np.ndarray, np.ndarray, np.ndarray, np.ndarray]:
+    """(buckets, idf, projection, embeddings) for a corpus"""
+    if not texts:
+        buckets, idf, projection = np.zeros(1, dtype=np.int64), np.ones(1, dtype=np.float32), np.zeros((1, 1), dtype=np.float32)
+        return buckets, idf, projection, embed([], buckets, idf, projection)
+    term_counts = [_terms(text) for text in texts]
+    buckets, df = np.unique(np.concatenate([ids for ids, _ in term_counts]), return_counts=True)
+    if len(buckets) > MAX_FEATURES:
+        # Rare terms are what a search is usually after, so only this cap drops any
+        keep = np.sort(np.argsort(-df, kind="stable")[:MAX_FEATURES])
+        buckets, df = buckets[keep], df[keep]
+    idf = (np.log((1 + len(texts)) / (1 + df)) + 1).astype(np.float32)
+
+    sample = _Sparse(term_counts, buckets, idf)
+    if len(texts) > SVD_SAMPLE_DOCS:
+        picked = np.random.default_rng(0).choice(len(texts), SVD_SAMPLE_DOCS, replace=False)
+        sample = _Sparse([term_counts[i] for i in picked], buckets, idf)
+    projection = _projection(sample, dim)
+    return buckets, idf, projection, embed(term_counts, buckets, idf, projection)
+
+
+# ============== Per-tenant index ==============
+
+class TenantIndex:
+    def __init__(self, path: Path):
+        self.path = path
+        self.meta: Optional[dict] = None
+        self.buckets = self.idf = self.projection = None
+        self.vectors: Optional[np.memmap] = None
+        self.keys: Optional[np.memmap] = None
+        self._rows: Optional[Dict[Tuple[int, int], int]] = None
+        self._thread_lock = threading.Lock()  # Writers, held for a whole rebuild
+        self._state_lock = threading.RLock()  # Swapping meta/model/maps, held only briefly
+
+    @contextmanager
+    def _locked(self):
+        self.path.mkdir(parents=True, exist_ok=True)
+        with self._thread_lock, open(self.path / "lock", "a") as handle:
+            if fcntl is not None:
+                fcntl.flock(handle, fcntl.LOCK_EX)
+            try:
+                yield
+            finally:
+                if fcntl is not None:
+                    fcntl.flock(handle, fcntl.LOCK_UN)
+
+    def _file(self, name: str, generation: int) -> Path:
+        return self.path / name.format(generation)
+
+    def _apply(self, meta: dict) -> None:
+        """
+        Switch to `meta`, reopening the model and maps if the generation or
+        capacity changed. Everything is opened before anything is swapped, so
+        a generation that vanished (FileNotFoundError) leaves the state as it was.
+        """
+        old = self.meta
+        buckets, idf, projection = self.buckets, self.idf, self.projection
+        vectors, keys = self.vectors, self.keys
+        new_generation = old is None or meta["generation"] != old["generation"]
+        if new_generation:
+            with np.load(self._file("model-{}.npz", meta["generation"])) as archive:
+                buckets, idf, projection = archive["buckets"], archive["idf"], archive["projection"]
+        if new_generation or meta["capacity"] != old["capacity"]:
+            shape = (meta["capacity"], meta["dim"])
+            vectors = np.memmap(self._file("vectors-{}.f32", meta["generation"]), dtype=np.float32, mode="r+", shape=shape)
+            keys = np.memmap(self._file("keys-{}.i64", meta["generation"]), dtype=np.int64, mode="r+", shape=(shape[0], 2))
+        with self._state_lock:
+            self.buckets, self.idf, self.projection = buckets, idf, projection
+            self.vectors, self.keys = vectors, keys
+            if new_generation:
+                self._rows = None
+            self.meta = meta
+
+    def _refresh(self) -> bool:
+        """Pick up changes written by another process; False if there is no index"""
+        with self._state_lock:
+            try:
+                meta = json.loads((self.path / "meta.json").read_text())
+            except FileNotFoundError:
+                self.meta = None
+                return False
+            if self.meta is None or (meta["generation"], meta["version"]) != (self.meta["generation"], self.meta["version"]):
+                self._apply(meta)
+                self._rows = None
+            return True
+
+    def _snapshot(self) -> Optional[tuple]:
+        """
+        (meta, buckets, idf, projection, vectors, keys) of one generation for a
+        reader, or None if there is no index. Readers don't take the writers'
+        lock, so a rebuild never blocks a search; another process may remove
+        the generation meta.json named before its files are opened, in which
+        case meta.json is read again.
+        """
+        for attempt in range(SNAPSHOT_RETRIES):
+            try:
+                with self._state_lock:
+                    if not self._refresh():
+                        return None
+                    return self.meta, self.buckets, self.idf, self.projection, self.vectors, self.keys
+            except FileNotFoundError:
+                if attempt == SNAPSHOT_RETRIES - 1:
+                    raise
+                time.sleep(0.01 * (attempt + 1))
+
+    def _write_meta(self, meta: dict) -> None:
+        meta["version"] = (self.meta["version"] if self.meta else 0) + 1
+        tmp = self.path / "meta.json.tmp"
+        tmp.write_text(json.dumps(meta))
+        with self._state_lock:
+            os.replace(tmp, self.path / "meta.json")
+            self._apply(meta)
+
+    def _row_map(self) -> Dict[Tuple[int, int], int]:
+        if self._rows is None:
+            keys = self.keys[:self.meta["count"]]
+            live = np.flatnonzero(keys[:, 0] != 0)
+            self._rows = dict(zip(map(tuple, keys[live].tolist()), live.tolist()))
+        return self._rows
+
+    def embed(self, texts: List[str]) -> np.ndarray:
+        return embed([_terms(text) for text in texts], self.buckets, self.idf, self.projection)
+
+    def exists(self) -> bool:
+        return self._refresh()
+
+    def is_stale(self) -> bool:
+        if not self._refresh():
+            return True
+        meta = self.meta
+        refit_after = max(SEARCH_REFIT_MIN_DOCS, SEARCH_REFIT_FRACTION * meta["fitted"])
+        return meta["folded"] > refit_after or time.time() - meta["built_at"] > SEARCH_INDEX_MAX_AGE_HOURS * 3600
+
+    def rebuild(self, documents: List[Tuple[int, int, str]]) -> None:
+        """Refit the projection on all documents and write a new generation"""
+        started = time.perf_counter()
+        with self._locked():
+            self._refresh()
+            buckets, idf, projection, embeddings = fit([text for _, _, text in documents])
+            previous = self.meta["generation"] if self.meta else None
+            generation = (previous or 0) + 1
+            capacity = max(MIN_CAPACITY, 2 * len(documents))
+            dim = embeddings.shape[1]
+
+            with open(self._file("model-{}.npz", generation), "wb") as handle:
+                np.savez(handle, buckets=buckets, idf=idf, projection=projection)
+            vectors = np.memmap(self._file("vectors-{}.f32", generation), dtype=np.float32, mode="w+", shape=(capacity, dim))
+            vectors[:len(documents)] = embeddings
+            vectors.flush()
+            keys = np.memmap(self._file("keys-{}.i64", generation), dtype=np.int64, mode="w+", shape=(capacity, 2))
+            if documents:
+                keys[:len(documents)] = [(kind, doc_id) for kind, doc_id, _ in documents]
+            keys.flush()
+            del vectors, keys
+
+            self._write_meta({
+                "generation": generation, "count": len(documents), "capacity": capacity, "dim": dim,
+                "fitted": len(documents), "folded": 0, "built_at": time.time()
+            })
+            if previous is not None:
+                for name in ("model-{}.npz", "vectors-{}.f32", "keys-{}.i64"):
+                    self._file(name, previous).unlink(missing_ok=True)
+        print(
+            f"[Search] Rebuilt {self.path.name}: {len(documents)} documents, {len(buckets)} features, "
+            f"{dim} dims in {time.perf_counter() - started:.2f}s"
+        )
+
+    def _grow(self) -> None:
+        meta = dict(self.meta, capacity=self.meta["capacity"] * 2)
+        for name, width, dtype in (("vectors-{}.f32", meta["dim"], np.float32), ("keys-{}.i64", 2, np.int64)):
+            with open(self._file(name, meta["generation"]), "r+b") as handle:
+                handle.truncate(meta["capacity"] * width * np.dtype(dtype).itemsize)
+        self._write_meta(meta)
+
+    def upsert(self, kind: int, doc_id: int, text: str) -> bool:
+        """Fold one document into the index; False if the tenant has no index yet"""
+        with self._locked():
+            if not self._refresh():
+                return False
+            vector = self.embed([text])[0]
+            rows = self._row_map()
+            row = rows.get((kind, doc_id))
+            if row is None:
+                if self.meta["count"] == self.meta["capacity"]:
+                    self._grow()
+                row = rows[(kind, doc_id)] = self.meta["count"]
+                self.keys[row] = (kind, doc_id)
+            self.vectors[row] = vector
+            self.vectors.flush()
+            self.keys.flush()
+            self._write_meta(dict(self.meta, count=max(self.meta["count"], row + 1), folded=self.meta["folded"] + 1))
+            return True
+
+    def remove(self, kind: int, doc_id: int) -> None:
+        with self._locked():
+            if not self._refresh():
+                return
+            row = self._row_map().pop((kind, doc_id), None)
+            if row is None:
+                return
+            self.vectors[row] = 0
+            self.keys[row] = (0, 0)
+            self.vectors.flush()
+            self.keys.flush()
+            self._write_meta(dict(self.meta))
+
+    def search(self, query: str, limit: int, kinds: Optional[List[int]] = None) -> List[Tuple[int, int, float]]:
+        """(kind, id, cosine) of the best matches, best first"""
+        snapshot = self._snapshot()
+        if snapshot is None or snapshot[0]["count"] == 0:
+            return []
+        meta, buckets, idf, projection, vectors, keys = snapshot
+        vector = embed([_terms(query)], buckets, idf, projection)[0]
+        if not vector.any():
+            return []
+        count = meta["count"]
+        scores = np.asarray(vectors[:count]) @ vector
+        keys = np.asarray(keys[:count])
+        allowed = keys[:, 0] != 0
+        if kinds:
+            allowed &= np.isin(keys[:, 0], kinds)
+        scores = np.where(allowed, scores, -np.inf)
+
+        limit = min(limit, count)
+        top = np.argpartition(-scores, limit - 1)[:limit]
+        top = top[np.argsort(-scores[top])]
+        return [(int(keys[i, 0]), int(keys[i, 1]), float(scores[i])) for i in top if scores[i] > 0]
+
+
+_indexes: Dict[Optional[int], TenantIndex] = {}
+_indexes_lock = threading.Lock()
+
+
+def tenant_index(user_id: Optional[int]) -> TenantIndex:
+    with _indexes_lock:
+        index = _indexes.get(user_id)
+        if index is None:
+            name = f"user-{user_id}" if user_id is not None else "unowned"
+            index = _indexes[user_id] = TenantIndex(SEARCH_INDEX_DIR / name)
+        return index
+
+
+def search(
+    user_id: Optional[int], query: str, limit: int = 10, kinds: Optional[List[str]] = None
+) -> List[Tuple[str, int, float]]:
+    """Top matches for a user as (kind name, id, score)"""
+    codes = [KINDS[kind] for kind in kinds] if kinds else None
+    return [(KIND_NAMES[kind], doc_id, score) for kind, doc_id, score in tenant_index(user_id).search(query, limit, codes)]
+
+
+# ============== Write hooks ==============
+# Called by the routers after a commit. Indexing must never fail a write:
+# errors are logged and the periodic rebuild catches up.
+
+def _safely(action, *args) -> None:
+    try:
+        action(*args)
+    except Exception as e:
+        print(f"[Search] Index update failed: {e}")
+
+
+def index_meeting(meeting: Meeting) -> None:
+    user_id = meeting.employee.user_id if meeting.employee else None
+    _safely(tenant_index(user_id).upsert, KINDS["meeting"], meeting.id, meeting_text(meeting))
+
+
+def index_quick_note(note: QuickNote) -> None:
+    _safely(tenant_index(note.user_id).upsert, KINDS["quick_note"], note.id, quick_note_text(note))
+
+
+def index_task(task: Task) -> None:
+    _safely(tenant_index(task.user_id).upsert, KINDS["task"], task.id, task_text(task))
+
+
+def remove_document(user_id: Optional[int], kind: str, doc_id: int) -> None:
+    _safely(tenant_index(user_id).remove, KINDS[kind], doc_id)
+
+
+def invalidate_tenant(user_id: Optional[int]) -> None:
+    """Force a rebuild on the next search (after bulk changes that bypass the hooks)"""
+    try:
+        (tenant_index(user_id).path / "meta.json").unlink(missing_ok=True)
+    except OSError as e:
+        print(f"[Search] Could not invalidate index: {e}")
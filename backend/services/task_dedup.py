@@ -0,0 +1,168 @@
+"""
+Near-duplicate detection for open tasks.
+
+An open task's title, and its title plus description, each become a set
+of shingles (words, word bigrams and in-word character trigrams). The
+MinHash signature of each set (TASK_DEDUP_PERMUTATIONS values) is cut into
+bands, and the hashed bands are stored in task_lsh_bands. A new task is only
+compared with tasks sharing at least one band key (an indexed lookup); a
+candidate is a duplicate when the exact Jaccard similarity of either pair of
+shingle sets reaches TASK_DEDUP_THRESHOLD. Matching titles alone count
+because the same follow-up extracted from two meetings usually comes with
+different descriptions.
+
+With 16 bands of 4 rows a pair at Jaccard 0.6 shares a band with
+probability ~0.88, at 0.4 ~0.35, at 0.2 ~0.03.
+"""
+import os
+import re
+import zlib
+import unicodedata
+from typing import List, Optional, Set, Tuple
+
+import numpy as np
+from sqlalchemy.orm import Session
+
+from models import Task, TaskLshBand
+
+
+# flag: create the task and report the duplicate; merge: fold it into the existing task; allow: no check
+TASK_DEDUP_MODE = os.getenv("TASK_DEDUP_MODE", "flag").lower()
+TASK_DEDUP_THRESHOLD = float(os.getenv("TASK_DEDUP_THRESHOLD", "0.6"))
+
+OPEN_STATUSES = ("pending", "in_progress")
+BANDS = 16
+ROWS_PER_BAND = 4
+TASK_DEDUP_PERMUTATIONS = BANDS * ROWS_PER_BAND
+PRIME = (1 << 32) + 15  # Smallest prime above 2^32: a * x + b stays below 2^64 for x < 2^32, a < 2^31
+
+_rng = np.random.default_rng(46)
+_A = _rng.integers(1, 1 << 31, size=TASK_DEDUP_PERMUTATIONS, dtype=np.uint64)
+_B = _rng.integers(0, 1 << 32, size=TASK_DEDUP_PERMUTATIONS, dtype=np.uint64)
+
+TOKEN_RE = re.compile(r"\w+")
+PRIORITY_RANK = {"low": 0, "medium": 1, "high": 2}
+
+# Users whose open tasks were checked for missing band rows in this process
+_backfilled: Set[Optional[int]] = set()
+
+
+def shingles(title: Optional[str], description: Optional[str] = None) -> Set[str]:
+    text = unicodedata.normalize("NFC", f"{title or ''} {description or ''}").lower()
+    words = TOKEN_RE.findall(text)
+    result = set(words)
+    result.update(f"{a} {b}" for a, b in zip(words, words[1:]))
+    for word in words:
+        if len(word) > 3:
+            result.update(f"#{word[i:i + 3]}" for i in range(len(word) - 2))
+    return result
+
+
+def jaccard(a: Set[str], b: Set[str]) -> float:
+    if not a or not b:
+        return 0.0
+    return len(a & b) / len(a | b)
+
+
+def signature(shingle_set: Set[str]) -> np.ndarray:
+    """MinHash signature: per permutation, the minimum of (a * h + b) mod PRIME over the shingle hashes"""
+    hashes = np.fromiter((zlib.crc32(s.encode()) for s in shingle_set), dtype=np.uint64, count=len(shingle_set))
+    return ((np.outer(hashes, _A) + _B) % PRIME).min(axis=0)
+
+
+def _band_keys(shingle_set: Set[str], first_band: int) -> List[int]:
+    if not shingle_set:
+        return []
+    rows = signature(shingle_set).reshape(BANDS, ROWS_PER_BAND)
+    return [((first_band + band) << 32) | zlib.crc32(rows[band].tobytes()) for band in range(BANDS)]
+
+
+def band_keys(title_shingles: Set[str], full_shingles: Set[str]) -> List[int]:
+    """Title bands are numbered 0..BANDS-1, title + description bands BANDS..2*BANDS-1"""
+    return sorted(set(_band_keys(title_shingles, 0) + _band_keys(full_shingles, BANDS)))
+
+
+def _shingle_pair(title: Optional[str], description: Optional[str]) -> Tuple[Set[str], Set[str]]:
+    return shingles(title), shingles(title, description)
+
+
+def index_task(db: Session, task: Task) -> None:
+    """Replace the band rows of a flushed task (none once it is closed). The caller commits."""
+    db.query(TaskLshBand).filter(TaskLshBand.task_id == task.id).delete(synchronize_session=False)
+    if task.status in OPEN_STATUSES:
+        keys = band_keys(*_shingle_pair(task.title, task.description))
+        db.add_all(TaskLshBand(task_id=task.id, band_key=key) for key in keys)
+    db.flush()  # Visible to the next lookup in this transaction (bulk creates)
+
+
+def unindex_task(db: Session, task_id: int) -> None:
+    db.query(TaskLshBand).filter(TaskLshBand.task_id == task_id).delete(synchronize_session=False)
+
+
+def _user_filter(user_id: Optional[int]):
+    return Task.user_id.is_(None) if user_id is None else Task.user_id == user_id
+
+
+def ensure_indexed(db: Session, user_id: Optional[int]) -> None:
+    """Index open tasks created before the band table existed (once per user and process)"""
+    if user_id in _backfilled:
+        return
+    indexed = db.query(TaskLshBand.task_id)
+    missing = db.query(Task).filter(
+        _user_filter(user_id),
+        Task.status.in_(OPEN_STATUSES),
+        Task.id.notin_(indexed)
+    ).all()
+    for task in missing:
+        index_task(db, task)
+    if missing:
+        db.commit()
+        print(f"[Task Dedup] Indexed {len(missing)} open tasks of user {user_id}")
+    _backfilled.add(user_id)
+
+
+def find_duplicate(
+    db: Session,
+    user_id: Optional[int],
+    title: str,
+    description: Optional[str] = None,
+    person_id: Optional[int] = None
+) -> Optional[Tuple[Task, float]]:
+    """
+    The most similar open task of the user at or above TASK_DEDUP_THRESHOLD.
+    Tasks about two different people are never duplicates.
+    """
+    ensure_indexed(db, user_id)
+    title_shingles, full_shingles = _shingle_pair(title, description)
+    keys = band_keys(title_shingles, full_shingles)
+    if not keys:
+        return None
+    candidates = db.query(Task).join(TaskLshBand, TaskLshBand.task_id == Task.id).filter(
+        TaskLshBand.band_key.in_(keys),
+        _user_filter(user_id),
+        Task.status.in_(OPEN_STATUSES)
+    ).distinct().all()
+
+    best, best_score = None, TASK_DEDUP_THRESHOLD
+    for task in candidates:
+        if person_id and task.person_id and task.person_id != person_id:
+            continue
+        other_title, other_full = _shingle_pair(task.title, task.description)
+        score = max(jaccard(title_shingles, other_title), jaccard(full_shingles, other_full))
+        if score >= best_score:
+            best, best_score = task, score
+    return (best, round(best_score, 3)) if best else None
+
+
+def merge_into(existing: Task, description: Optional[str] = None, **fields) -> None:
+    """Fold a duplicate into an open task: fill in what is missing and keep the higher priority and earlier due date"""
+    if description and description.strip() not in (existing.description or ""):
+        existing.description = f"{existing.description}\n\n{description}" if existing.description else description
+    for key in ("person_id", "meeting_id"):
+        if fields.get(key) and not getattr(existing, key):
+            setattr(existing, key, fields[key])
+    if fields.get("due_date") and (not existing.due_date or fields["due_date"] < existing.due_date):
+        existing.due_date = fields["due_date"]
+    priority = fields.get("priority")
+    if PRIORITY_RANK.get(priority, -1) > PRIORITY_RANK.get(existing.priority, -1):
+        existing.priority = priority
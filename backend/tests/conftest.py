@@ -0,0 +1,23 @@
+import os
+import sys
+import tempfile
+
+import pytest
+
+# Tests import the backend modules the way the app does (services.x, routers.x)
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+# Throwaway database and search index; no real AI provider is ever configured
+os.environ["DATABASE_URL"] = f"sqlite:///{tempfile.mkdtemp()}/test.db"
+os.environ.setdefault("SEARCH_INDEX_DIR", tempfile.mkdtemp())
+for key in ("GEMINI_API_KEY", "OPENAI_API_KEY", "ANTHROPIC_API_KEY", "AZURE_OPENAI_API_KEY", "AZURE_OPENAI_ENDPOINT"):
+    os.environ.pop(key, None)
+
+
+@pytest.fixture(autouse=True)
+def fresh_rate_limits():
+    """Per-test provider limiters, so one test's calls don't throttle the next"""
+    from services.rate_limiter import rate_limiter
+    rate_limiter._limiters.clear()
+    yield
+    rate_limiter._limiters.clear()
@@ -0,0 +1,107 @@
+"""
+Meeting-notes analysis against local stub providers (httpx.MockTransport).
+An answer that doesn't parse is a failed provider call: the next provider
+(or the rules) answers and only parsed answers reach the analysis cache.
+"""
+import asyncio
+import json
+
+import httpx
+import pytest
+from sqlalchemy.exc import OperationalError
+
+from database import SessionLocal, init_db
+from models import AnalysisCacheEntry
+from services.ai_analyzer import AIAnalyzer
+from services.analysis_cache import AnalysisCache
+from services.http_client import AIHttpClients
+from services.provider_router import provider_router
+
+NOTES = "Dana wants to own the Q3 roadmap review. Follow up on hiring plan."
+ANALYSIS = {
+    "insights": "Dana is ready for more ownership",
+    "topics": ["career", "roadmap"],
+    "sentiment": "positive",
+    "action_items_suggested": ["Hand over the roadmap review"],
+    "tasks": [{"title": "Hand over the roadmap review", "priority": "high"}],
+}
+
+
+def stub_providers(answers: dict) -> httpx.MockTransport:
+    """OpenAI and Anthropic answer with their canned text"""
+    def handler(request: httpx.Request) -> httpx.Response:
+        text = answers[request.url.host]
+        if request.url.host == "api.openai.com":
+            return httpx.Response(200, json={"choices": [{"message": {"content": text}}]})
+        return httpx.Response(200, json={"content": [{"text": text}]})
+
+    return httpx.MockTransport(handler)
+
+
+@pytest.fixture(autouse=True)
+def fresh_state(monkeypatch):
+    monkeypatch.setenv("OPENAI_API_KEY", "test")
+    monkeypatch.setenv("ANTHROPIC_API_KEY", "test")
+    init_db()
+    provider_router._health.clear()
+    with SessionLocal() as db:
+        db.query(AnalysisCacheEntry).delete()
+        db.commit()
+    yield
+    provider_router._health.clear()
+
+
+def cached_models(kind: str) -> list:
+    with SessionLocal() as db:
+        return [entry.model for entry in db.query(AnalysisCacheEntry).filter(AnalysisCacheEntry.kind == kind)]
+
+
+def analyze(method: str, answers: dict):
+    async def run():
+        http = AIHttpClients(transport=stub_providers(answers))
+        try:
+            with SessionLocal() as db:
+                analyzer = AIAnalyzer(http=http, db=db)
+                return await getattr(analyzer, method)(NOTES), analyzer.last_source
+        finally:
+            await http.aclose()
+    return asyncio.run(run())
+
+
+@pytest.mark.parametrize("method", ["analyze_notes", "extract_tasks_from_notes", "analyze_meeting"])
+def test_unparsed_answer_falls_through_to_next_provider(method):
+    # OpenAI is routed first (configured precedence) and answers with prose
+    result, source = analyze(method, {
+        "api.openai.com": "I'm sorry, I can't help with that.",
+        "api.anthropic.com": json.dumps(ANALYSIS),
+    })
+    if method != "extract_tasks_from_notes":
+        assert source.startswith("anthropic:")
+        assert result.insights == ANALYSIS["insights"]
+    if method != "analyze_notes":
+        assert [task.title for task in result.suggested_tasks] == ["Hand over the roadmap review"]
+    kinds = {"analyze_notes": ["analysis"], "extract_tasks_from_notes": ["tasks"], "analyze_meeting": ["analysis", "tasks"]}
+    for kind in kinds[method]:
+        assert all(model.startswith("anthropic:") for model in cached_models(kind)) and cached_models(kind)
+
+
+@pytest.mark.parametrize("method", ["analyze_notes", "extract_tasks_from_notes", "analyze_meeting"])
+def test_no_parsed_answer_caches_nothing(method):
+    result, _ = analyze(method, {"api.openai.com": "not json", "api.anthropic.com": "[1, 2, 3]"})
+    assert result is not None  # The rules answered
+    assert cached_models("analysis") == [] and cached_models("tasks") == []
+
+
+def test_failed_cache_write_still_returns_the_answer(monkeypatch):
+    # e.g. SQLite locked during eviction; the provider's answer must still be returned
+    def locked(self):
+        raise OperationalError("DELETE FROM analysis_cache", {}, Exception("database is locked"))
+
+    monkeypatch.setattr(AnalysisCache, "_evict", locked)
+    result, source = analyze("analyze_notes", {
+        "api.openai.com": json.dumps(ANALYSIS),
+        "api.anthropic.com": json.dumps(ANALYSIS),
+    })
+    assert source.startswith("openai:")
+    assert result.insights == ANALYSIS["insights"]
+    assert cached_models("analysis") == []
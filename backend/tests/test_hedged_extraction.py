@@ -0,0 +1,212 @@
+"""
+Hedged screenshot extraction against local stub providers (httpx.MockTransport).
+A provider answer without valid JSON must count as a failed attempt: the race
+moves on to the other provider and the garbage is never cached.
+"""
+import asyncio
+import base64
+import json
+
+import httpx
+import pytest
+from fastapi.testclient import TestClient
+
+from main import app
+from models import ExtractionCacheEntry
+from database import SessionLocal
+from services.hedging import hedged_call
+from services.http_client import AIHttpClients, get_ai_http
+from services.provider_router import provider_router
+from routers import calendar_meetings
+from routers.calendar_meetings import extract_with_gemini, extract_with_openai
+from services.calendar_ocr import OcrResult
+from services.extraction_cache import SCREENSHOT_PROMPT_VERSION, ExtractionCache
+
+MEETINGS = {"meetings": [{"title": "Standup", "start_time": "09:00", "end_time": "09:15"}]}
+TASKS = {"tasks": [{"title": "Send the roadmap", "priority": "high"}], "summary": "One task"}
+IMAGE = base64.b64encode(b"not really a png").decode()
+
+
+def gemini_answer(text: str) -> dict:
+    return {"candidates": [{"content": {"parts": [{"text": text}]}}]}
+
+
+def openai_answer(text: str) -> dict:
+    return {"choices": [{"message": {"content": text}}]}
+
+
+def anthropic_answer(text: str) -> dict:
+    return {"content": [{"text": text}]}
+
+
+def stub_providers(answers: dict, delays: dict = None) -> httpx.MockTransport:
+    """Every provider host answers with its canned text (after an optional delay)"""
+    envelopes = {
+        "generativelanguage.googleapis.com": gemini_answer,
+        "api.openai.com": openai_answer,
+        "api.anthropic.com": anthropic_answer,
+    }
+    calls = []
+
+    async def handler(request: httpx.Request) -> httpx.Response:
+        host = request.url.host
+        calls.append(host)
+        await asyncio.sleep((delays or {}).get(host, 0))
+        return httpx.Response(200, json=envelopes[host](answers[host]))
+
+    transport = httpx.MockTransport(handler)
+    transport.calls = calls
+    return transport
+
+
+@pytest.fixture(autouse=True)
+def fresh_router_state():
+    provider_router._health.clear()
+    yield
+    provider_router._health.clear()
+    app.dependency_overrides.clear()
+
+
+@pytest.fixture
+def client():
+    with TestClient(app) as c:
+        yield c
+
+
+def cached_entries(kind: str) -> int:
+    with SessionLocal() as db:
+        return db.query(ExtractionCacheEntry).filter(ExtractionCacheEntry.kind == kind).count()
+
+
+def cached_under(model: str, target_date: str) -> bool:
+    """True if the calendar answer for IMAGE on target_date is cached under this provider:model"""
+    key = ExtractionCache(None, "calendar").make_key(base64.b64decode(IMAGE), target_date, SCREENSHOT_PROMPT_VERSION, model)
+    with SessionLocal() as db:
+        return db.query(ExtractionCacheEntry).filter(ExtractionCacheEntry.cache_key == key).count() == 1
+
+
+def test_extractor_raises_on_answer_without_json():
+    transport = stub_providers({"generativelanguage.googleapis.com": "Sorry, I can't read this calendar."})
+
+    async def run():
+        async with httpx.AsyncClient(transport=transport) as http:
+            return await extract_with_gemini(IMAGE, "key", "2026-10-19", client=http)
+
+    with pytest.raises(ValueError):
+        asyncio.run(run())
+
+
+def test_parse_failure_loses_the_race_instead_of_winning_it():
+    transport = stub_providers(
+        {"generativelanguage.googleapis.com": "no json here", "api.openai.com": json.dumps(MEETINGS)},
+        delays={"api.openai.com": 0.05}
+    )
+
+    async def run():
+        async with httpx.AsyncClient(transport=transport) as http:
+            attempts = [
+                ("gemini:test", lambda: extract_with_gemini(IMAGE, "key", "2026-10-19", client=http)),
+                ("openai:test", lambda: extract_with_openai(IMAGE, "key", "2026-10-19", client=http)),
+            ]
+            return await hedged_call(attempts, hedge_after=10)
+
+    winner, meetings = asyncio.run(run())
+    assert winner == "openai:test"
+    assert [m.title for m in meetings] == ["Standup"]
+    assert transport.calls == ["generativelanguage.googleapis.com", "api.openai.com"]
+
+
+def test_calendar_endpoint_hedges_past_garbage_and_caches_only_valid_answers(client, monkeypatch):
+    monkeypatch.setenv("GEMINI_API_KEY", "stub")
+    monkeypatch.setenv("OPENAI_API_KEY", "stub")
+    monkeypatch.setenv("SCREENSHOT_HEDGE_AFTER_SECONDS", "10")
+
+    garbage = stub_providers({"generativelanguage.googleapis.com": "{not json", "api.openai.com": "nothing"})
+    app.dependency_overrides[get_ai_http] = lambda: AIHttpClients(transport=garbage)
+    response = client.post("/api/calendar/extract-from-screenshot", json={"image": IMAGE, "target_date": "2026-10-19"})
+    assert response.status_code == 500
+    assert cached_entries("calendar") == 0
+
+    provider_router._health.clear()
+    mixed = stub_providers({"generativelanguage.googleapis.com": "{not json", "api.openai.com": json.dumps(MEETINGS)})
+    app.dependency_overrides[get_ai_http] = lambda: AIHttpClients(transport=mixed)
+    response = client.post("/api/calendar/extract-from-screenshot", json={"image": IMAGE, "target_date": "2026-10-19"})
+    assert response.status_code == 200
+    assert response.json()["total"] == 1 and response.json()["cached"] is False
+    assert cached_entries("calendar") == 1
+    # The hedge's backup answered, so the answer is stored under its model
+    assert cached_under("openai:gpt-4o", "2026-10-19")
+    assert not cached_under("gemini:gemini-1.5-flash", "2026-10-19")
+
+
+def test_tasks_endpoint_hedges_past_garbage(client, monkeypatch):
+    monkeypatch.setenv("ANTHROPIC_API_KEY", "stub")
+    monkeypatch.setenv("OPENAI_API_KEY", "stub")
+    monkeypatch.setenv("SCREENSHOT_HEDGE_AFTER_SECONDS", "10")
+
+    transport = stub_providers({"api.anthropic.com": "I could not find tasks.", "api.openai.com": json.dumps(TASKS)})
+    app.dependency_overrides[get_ai_http] = lambda: AIHttpClients(transport=transport)
+    response = client.post("/api/tasks/extract-from-screenshot", json={"image": IMAGE, "context": "weekly sync"})
+    assert response.status_code == 200
+    assert [t["title"] for t in response.json()["tasks"]] == ["Send the roadmap"]
+    assert transport.calls == ["api.anthropic.com", "api.openai.com"]
+
+
+def test_calendar_endpoint_without_hedging_falls_back_to_the_next_provider(client, monkeypatch):
+    monkeypatch.setenv("GEMINI_API_KEY", "stub")
+    monkeypatch.setenv("OPENAI_API_KEY", "stub")
+    monkeypatch.delenv("SCREENSHOT_HEDGE_AFTER_SECONDS", raising=False)
+    provider_router._health.clear()
+
+    transport = stub_providers({"generativelanguage.googleapis.com": "{not json", "api.openai.com": json.dumps(MEETINGS)})
+    app.dependency_overrides[get_ai_http] = lambda: AIHttpClients(transport=transport)
+    response = client.post("/api/calendar/extract-from-screenshot", json={"image": IMAGE, "target_date": "2026-10-22"})
+    assert response.status_code == 200
+    assert response.json()["total"] == 1
+    assert transport.calls == ["generativelanguage.googleapis.com", "api.openai.com"]
+    assert cached_under("openai:gpt-4o", "2026-10-22")
+
+
+def test_tasks_endpoint_without_hedging_fails_only_after_every_provider(client, monkeypatch):
+    monkeypatch.setenv("ANTHROPIC_API_KEY", "stub")
+    monkeypatch.setenv("OPENAI_API_KEY", "stub")
+    monkeypatch.delenv("SCREENSHOT_HEDGE_AFTER_SECONDS", raising=False)
+    provider_router._health.clear()
+
+    transport = stub_providers({"api.anthropic.com": "I could not find tasks.", "api.openai.com": "Nothing here either."})
+    app.dependency_overrides[get_ai_http] = lambda: AIHttpClients(transport=transport)
+    response = client.post("/api/tasks/extract-from-screenshot", json={"image": IMAGE, "context": "fallback check"})
+    assert response.status_code == 500
+    assert transport.calls == ["api.anthropic.com", "api.openai.com"]
+
+
+@pytest.fixture
+def ocr_text_tier(monkeypatch):
+    """Local OCR in text mode with a low-confidence grid, so the OCR text goes to a text model"""
+    async def fake_ocr(image_bytes: bytes) -> OcrResult:
+        return OcrResult(meetings=[], confidence=0.1, layout_text="[x=10 y=40 w=80 h=12] 09:00 Standup")
+
+    monkeypatch.setattr(calendar_meetings, "SCREENSHOT_LOCAL_OCR", "text")
+    monkeypatch.setattr(calendar_meetings, "run_local_ocr_async", fake_ocr)
+    monkeypatch.setenv("GEMINI_API_KEY", "stub")
+    monkeypatch.setenv("OPENAI_API_KEY", "stub")
+
+
+def test_ocr_text_answer_that_does_not_parse_tries_the_next_text_provider(client, ocr_text_tier):
+    transport = stub_providers({"generativelanguage.googleapis.com": "{not json", "api.openai.com": json.dumps(MEETINGS)})
+    app.dependency_overrides[get_ai_http] = lambda: AIHttpClients(transport=transport)
+    response = client.post("/api/calendar/extract-from-screenshot", json={"image": IMAGE, "target_date": "2026-10-20"})
+    assert response.status_code == 200
+    assert [m["title"] for m in response.json()["meetings"]] == ["Standup"]
+    assert transport.calls == ["generativelanguage.googleapis.com", "api.openai.com"]
+    assert cached_under("local-ocr:text", "2026-10-20")
+
+
+def test_empty_ocr_text_answer_falls_through_and_is_not_cached(client, ocr_text_tier):
+    empty = json.dumps({"meetings": []})
+    transport = stub_providers({"generativelanguage.googleapis.com": empty, "api.openai.com": empty})
+    app.dependency_overrides[get_ai_http] = lambda: AIHttpClients(transport=transport)
+    response = client.post("/api/calendar/extract-from-screenshot", json={"image": IMAGE, "target_date": "2026-10-21"})
+    assert response.status_code == 200
+    assert len(transport.calls) == 2  # The OCR-text call, then a vision provider
+    assert not cached_under("local-ocr:text", "2026-10-21")
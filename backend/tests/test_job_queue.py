@@ -0,0 +1,114 @@
+"""
+Background jobs: enqueueing from the threadpool (sync endpoints) and
+handlers that hold no pooled DB connection while a provider is awaited.
+"""
+import asyncio
+import json
+import threading
+import time
+from datetime import datetime
+
+import httpx
+import pytest
+
+from database import SessionLocal, engine, init_db
+from models import Employee, Job, Meeting
+from routers import analytics, meetings
+from services import ai_analyzer, local_classifier
+from services.http_client import AIHttpClients
+from services.job_queue import JobQueue
+from services.provider_router import provider_router
+
+ANSWER = {
+    "insights": "Steady progress",
+    "topics": ["delivery"],
+    "sentiment": "neutral",
+    "action_items_suggested": [],
+    "tasks": [{"title": "Write the release notes", "priority": "medium"}],
+}
+
+
+@pytest.fixture(autouse=True)
+def fresh_state():
+    init_db()
+    provider_router._health.clear()
+    yield
+    provider_router._health.clear()
+
+
+def job_status(job_id: str) -> str:
+    with SessionLocal() as db:
+        return db.query(Job.status).filter(Job.id == job_id).scalar()
+
+
+def test_enqueue_from_a_worker_thread_wakes_the_loop():
+    queue = JobQueue(concurrency=1)
+    handled = []
+
+    async def handler(payload: dict) -> dict:
+        handled[0].set()
+        return {}
+
+    queue.register("test_thread_enqueue", handler)
+    job_ids = []
+
+    def enqueue_from_thread() -> None:
+        time.sleep(0.2)  # Let the loop go idle first
+        with SessionLocal() as db:
+            job_ids.append(queue.enqueue(db, "test_thread_enqueue", {}).id)
+
+    async def run():
+        await queue.start()
+        handled.append(asyncio.Event())
+        # A sync endpoint runs in the threadpool while the loop sits idle;
+        # the worker must wake up without anything else touching the loop
+        thread = threading.Thread(target=enqueue_from_thread)
+        started = time.perf_counter()
+        thread.start()
+        try:
+            await asyncio.wait_for(handled[0].wait(), timeout=3)
+            return time.perf_counter() - started
+        finally:
+            thread.join()
+            await queue.stop()
+
+    assert asyncio.run(run()) < 1
+    assert job_status(job_ids[0]) == "succeeded"
+
+
+@pytest.mark.parametrize("router, handler, payload", [
+    (analytics, "_run_analyze_job", lambda meeting_id: {"meeting_id": meeting_id, "notes": "Ship the release on Thursday."}),
+    (meetings, "_run_extract_tasks_job", lambda meeting_id: {"meeting_id": meeting_id}),
+])
+def test_job_handler_holds_no_connection_during_provider_call(monkeypatch, router, handler, payload):
+    monkeypatch.setenv("OPENAI_API_KEY", "test")
+    # The local-model lookup reads the DB right before the provider call
+    monkeypatch.setattr(ai_analyzer, "LOCAL_CLASSIFIER", "prefer")
+    monkeypatch.setattr(local_classifier, "LOCAL_CLASSIFIER", "prefer")
+    monkeypatch.setattr(local_classifier.local_classifier, "_checked_at", None)
+    with SessionLocal() as db:
+        employee = Employee(name="Noa")
+        db.add(employee)
+        db.flush()
+        meeting = Meeting(employee_id=employee.id, date=datetime.utcnow(), notes="Ship the release on Thursday.")
+        db.add(meeting)
+        db.commit()
+        meeting_id = meeting.id
+
+    checked_out = []
+
+    def provider(request: httpx.Request) -> httpx.Response:
+        checked_out.append(engine.pool.checkedout())
+        return httpx.Response(200, json={"choices": [{"message": {"content": json.dumps(ANSWER)}}]})
+
+    http = AIHttpClients(transport=httpx.MockTransport(provider))
+    monkeypatch.setattr(router, "get_ai_http", lambda: http)
+
+    async def run():
+        try:
+            return await getattr(router, handler)(payload(meeting_id))
+        finally:
+            await http.aclose()
+
+    asyncio.run(run())
+    assert checked_out == [0]
@@ -0,0 +1,93 @@
+"""
+Chunked (incremental) analysis is reserved for long notes: ordinary notes
+are analyzed in a single provider call, and notes too long for one prompt
+go through map-reduce.
+"""
+import asyncio
+import json
+from datetime import datetime
+
+import httpx
+from fastapi.testclient import TestClient
+
+from database import SessionLocal
+from main import app
+from models import Employee, Meeting
+from services.ai_analyzer import AIAnalyzer, INCREMENTAL_NOTES_TOKENS, LONG_NOTES_TOKENS
+from services.http_client import AIHttpClients, get_ai_http
+from services.provider_router import provider_router
+from services.note_chunks import CHUNK_MIN_CHARS, split_notes
+
+ANSWER = {"insights": "On track", "topics": ["delivery"], "sentiment": "neutral", "action_items_suggested": []}
+
+
+def meeting_notes(chars: int) -> str:
+    lines, size, i = [], 0, 0
+    while size < chars:
+        line = f"- Item {i}: discussed progress on workstream {i % 7} and the next milestone"
+        lines.append(line)
+        size += len(line) + 1
+        i += 1
+    return "\n".join(lines)
+
+
+def provider_calls(notes: str, monkeypatch) -> int:
+    monkeypatch.setenv("OPENAI_API_KEY", "test")
+    calls = []
+
+    def handler(request: httpx.Request) -> httpx.Response:
+        calls.append(request)
+        return httpx.Response(200, json={"choices": [{"message": {"content": json.dumps(ANSWER)}}]})
+
+    async def run():
+        http = AIHttpClients(transport=httpx.MockTransport(handler))
+        try:
+            await AIAnalyzer(http=http).analyze_notes_incremental(notes)
+        finally:
+            await http.aclose()
+
+    asyncio.run(run())
+    return len(calls)
+
+
+def test_ordinary_notes_take_one_call(monkeypatch):
+    assert provider_calls(meeting_notes(3000), monkeypatch) == 1
+
+
+def test_long_notes_are_chunked(monkeypatch):
+    notes = meeting_notes(INCREMENTAL_NOTES_TOKENS * 4 + 4000)
+    chunks = split_notes(notes)
+    assert len(chunks) > 1
+    assert all(len(chunk) >= CHUNK_MIN_CHARS - 100 for chunk in chunks[:-1])
+    assert provider_calls(notes, monkeypatch) == len(chunks)
+
+
+def test_analyze_endpoint_runs_map_reduce_for_very_long_notes(monkeypatch):
+    monkeypatch.setenv("OPENAI_API_KEY", "test")
+    provider_router._health.clear()
+    notes = "\n\n".join(meeting_notes(LONG_NOTES_TOKENS * 2) for _ in range(3))
+    with SessionLocal() as db:
+        employee = Employee(name="Avi")
+        db.add(employee)
+        db.flush()
+        meeting = Meeting(employee_id=employee.id, date=datetime.utcnow(), notes=notes)
+        db.add(meeting)
+        db.commit()
+        meeting_id = meeting.id
+
+    prompts = []
+
+    def handler(request: httpx.Request) -> httpx.Response:
+        prompts.append(json.loads(request.content)["messages"][-1]["content"])
+        return httpx.Response(200, json={"choices": [{"message": {"content": json.dumps({**ANSWER, "tasks": []})}}]})
+
+    app.dependency_overrides[get_ai_http] = lambda: AIHttpClients(transport=httpx.MockTransport(handler))
+    try:
+        with TestClient(app) as client:
+            response = client.post("/api/analytics/analyze", json={"meeting_id": meeting_id, "notes": notes})
+    finally:
+        app.dependency_overrides.pop(get_ai_http, None)
+    assert response.status_code == 200
+    # The map calls (one per paragraph part) are followed by a single reduce call
+    reduce = [prompt for prompt in prompts if "partial analyses of consecutive parts" in prompt]
+    assert len(reduce) == 1 and len(prompts) > 2
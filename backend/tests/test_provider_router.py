@@ -0,0 +1,44 @@
+from services import provider_router as router_module
+from services.provider_router import ProviderRouter
+
+
+def _open_circuit(router: ProviderRouter, key: str) -> None:
+    for _ in range(router.failure_threshold):
+        router.record(key, 1.0, ok=False)
+
+
+def test_half_open_lets_a_single_trial_call_through(monkeypatch):
+    now = [1000.0]
+    monkeypatch.setattr(router_module.time, "monotonic", lambda: now[0])
+    router = ProviderRouter(failure_threshold=2, cooldown=30.0)
+    _open_circuit(router, "gemini:flash")
+    assert not router.is_available("gemini:flash")
+
+    now[0] += 30.0
+    assert router.is_available("gemini:flash")
+    # Concurrent callers keep skipping it while the trial is in flight
+    assert not router.is_available("gemini:flash")
+    assert router.order(["gemini:flash", "openai:mini"], key=lambda k: k) == ["openai:mini"]
+
+    router.record("gemini:flash", 0.5, ok=True)
+    assert router.is_available("gemini:flash")
+    assert router.is_available("gemini:flash")
+
+
+def test_failed_trial_reopens_and_unreported_trial_expires(monkeypatch):
+    now = [1000.0]
+    monkeypatch.setattr(router_module.time, "monotonic", lambda: now[0])
+    router = ProviderRouter(failure_threshold=2, cooldown=30.0)
+    _open_circuit(router, "gemini:flash")
+
+    now[0] += 30.0
+    assert router.is_available("gemini:flash")
+    router.record("gemini:flash", 1.0, ok=False)
+    assert not router.is_available("gemini:flash")
+
+    now[0] += 30.0
+    assert router.is_available("gemini:flash")  # Trial claimed but never called
+    now[0] += 29.0
+    assert not router.is_available("gemini:flash")
+    now[0] += 1.0
+    assert router.is_available("gemini:flash")
@@ -0,0 +1,68 @@
+"""
+RateLimitedTransport against a local stub provider (httpx.MockTransport):
+a concurrency slot stays taken until the response body is closed.
+"""
+import asyncio
+
+import httpx
+
+from services import rate_limiter as rate_limiter_module
+from services.rate_limiter import ProviderLimiter, RateLimitedTransport
+
+
+def sse_body():
+    async def events():
+        for i in range(3):
+            yield f"data: {i}\n\n".encode()
+    return events()
+
+
+def limited_client(handler, limiter: ProviderLimiter) -> httpx.AsyncClient:
+    return httpx.AsyncClient(transport=RateLimitedTransport(httpx.MockTransport(handler), limiter))
+
+
+def test_streamed_response_holds_its_slot_until_closed(monkeypatch):
+    monkeypatch.setenv("AI_STUB_MAX_CONCURRENCY", "1")
+    limiter = ProviderLimiter("stub")
+
+    async def run():
+        async with limited_client(lambda request: httpx.Response(200, content=sse_body()), limiter) as client:
+            async with client.stream("POST", "https://stub.test/v1/stream", json={}) as response:
+                assert limiter.in_flight == 1
+                # A second call waits for the stream to finish
+                second = asyncio.create_task(client.post("https://stub.test/v1/stream", json={}))
+                await asyncio.sleep(0.05)
+                assert not second.done()
+                lines = [line async for line in response.aiter_lines() if line]
+            await second
+        return lines
+
+    assert asyncio.run(run()) == ["data: 0", "data: 1", "data: 2"]
+    assert limiter.in_flight == 0
+    assert not limiter.semaphore.locked()
+
+
+def test_throttled_and_failed_calls_give_their_slot_back(monkeypatch):
+    monkeypatch.setenv("AI_STUB_MAX_CONCURRENCY", "1")
+    monkeypatch.setattr(rate_limiter_module, "AI_BACKOFF_BASE_SECONDS", 0.0)
+    limiter = ProviderLimiter("stub")
+    statuses = iter([429, 200])
+
+    def handler(request: httpx.Request) -> httpx.Response:
+        if request.url.path == "/down":
+            raise httpx.ConnectError("connection refused")
+        return httpx.Response(next(statuses), headers={"retry-after": "0"}, json={})
+
+    async def run():
+        async with limited_client(handler, limiter) as client:
+            response = await client.post("https://stub.test/ok", json={})
+            try:
+                await client.post("https://stub.test/down", json={})
+            except httpx.ConnectError:
+                pass
+            return response.status_code
+
+    assert asyncio.run(run()) == 200
+    assert limiter.retries == 1
+    assert limiter.in_flight == 0
+    assert not limiter.semaphore.locked()
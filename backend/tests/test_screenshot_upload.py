@@ -0,0 +1,83 @@
+"""
+Raw binary screenshot uploads: the size limit is enforced from the declared
+Content-Length and while streaming, and the image reaches the provider as is.
+"""
+import asyncio
+import base64
+import json
+
+import httpx
+import pytest
+from fastapi.testclient import TestClient
+
+from main import app
+from services import screenshot_upload
+from services.http_client import AIHttpClients, get_ai_http
+from services.provider_router import provider_router
+
+UPLOAD_URL = "/api/calendar/extract-from-screenshot/upload"
+MEETINGS = {"meetings": [{"title": "Design review", "start_time": "14:00", "end_time": "15:00"}]}
+
+
+@pytest.fixture(autouse=True)
+def small_limit(monkeypatch):
+    monkeypatch.setattr(screenshot_upload, "MAX_SCREENSHOT_BYTES", 100_000)
+    provider_router._health.clear()
+    yield
+    app.dependency_overrides.clear()
+
+
+@pytest.fixture
+def client():
+    with TestClient(app) as c:
+        yield c
+
+
+def test_upload_reaches_the_provider_unchanged(client, monkeypatch):
+    monkeypatch.setenv("GEMINI_API_KEY", "stub")
+    image = bytes(range(256)) * 40  # Not a decodable image, so it is sent as uploaded
+    sent = []
+
+    def gemini(request: httpx.Request) -> httpx.Response:
+        sent.append(json.loads(request.content))
+        return httpx.Response(200, json={"candidates": [{"content": {"parts": [{"text": json.dumps(MEETINGS)}]}}]})
+
+    app.dependency_overrides[get_ai_http] = lambda: AIHttpClients(transport=httpx.MockTransport(gemini))
+    response = client.post(
+        UPLOAD_URL, params={"target_date": "2026-10-22"}, content=image, headers={"content-type": "image/png"}
+    )
+    assert response.status_code == 200
+    assert [m["title"] for m in response.json()["meetings"]] == ["Design review"]
+    inline = sent[0]["contents"][0]["parts"][0]["inline_data"]
+    assert base64.b64decode(inline["data"]) == image
+
+
+def test_declared_oversize_body_is_rejected_before_reading(client):
+    response = client.post(
+        UPLOAD_URL, params={"target_date": "2026-10-22"}, content=b"x" * 100_001,
+        headers={"content-type": "image/png"}
+    )
+    assert response.status_code == 413
+
+
+def test_undeclared_oversize_body_is_cut_off_mid_stream():
+    chunk, chunks = b"x" * 65_536, 20
+    received = []
+    messages = []
+
+    async def receive():
+        received.append(len(received))
+        return {"type": "http.request", "body": chunk, "more_body": len(received) < chunks}
+
+    async def send(message):
+        messages.append(message)
+
+    scope = {
+        "type": "http", "asgi": {"version": "3.0"}, "http_version": "1.1", "method": "POST",
+        "scheme": "http", "path": UPLOAD_URL, "raw_path": UPLOAD_URL.encode(), "root_path": "",
+        "query_string": b"target_date=2026-10-22", "client": ("127.0.0.1", 1234), "server": ("test", 80),
+        "headers": [(b"host", b"test"), (b"content-type", b"image/png"), (b"transfer-encoding", b"chunked")],
+    }
+    asyncio.run(app(scope, receive, send))
+    assert messages[0]["type"] == "http.response.start" and messages[0]["status"] == 413
+    assert len(received) == 2  # 128 KB read of the 1.25 MB body, then the upload was refused
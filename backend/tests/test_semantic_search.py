@@ -0,0 +1,64 @@
+"""
+Searches racing index rebuilds: a reader always scores a query against one
+generation, and a generation removed by another process is re-read.
+"""
+import threading
+
+from services.semantic_search import KINDS, TenantIndex
+
+TOPICS = ["roadmap review", "hiring plan", "budget approval", "career growth", "onboarding checklist"]
+
+
+def documents(count: int) -> list:
+    return [
+        (KINDS["quick_note"], i + 1, f"Note {i}: {TOPICS[i % len(TOPICS)]} follow up with team {i % 3}")
+        for i in range(count)
+    ]
+
+
+def test_generation_removed_between_meta_read_and_load_is_retried(tmp_path, monkeypatch):
+    # Two TenantIndex objects on one directory behave like two processes
+    writer, reader = TenantIndex(tmp_path), TenantIndex(tmp_path)
+    writer.rebuild(documents(20))
+    apply = TenantIndex._apply
+    raced = []
+
+    def rebuild_in_between(self, meta):
+        if self is reader and not raced:
+            raced.append(meta["generation"])
+            writer.rebuild(documents(40))  # Writes the next generation and removes this one
+        return apply(self, meta)
+
+    monkeypatch.setattr(TenantIndex, "_apply", rebuild_in_between)
+    results = reader.search("hiring plan", limit=5)
+    assert raced == [1]
+    assert reader.meta["generation"] == 2
+    assert results and all(kind == KINDS["quick_note"] for kind, _, _ in results)
+
+
+def test_searches_during_rebuilds_see_a_consistent_index(tmp_path):
+    index = TenantIndex(tmp_path)
+    index.rebuild(documents(5))
+    errors = []
+    stop = threading.Event()
+
+    def search_loop():
+        while not stop.is_set():
+            try:
+                index.search("budget approval", limit=3)
+            except Exception as e:  # Shape mismatches, vanished files
+                errors.append(e)
+                return
+
+    readers = [threading.Thread(target=search_loop) for _ in range(2)]
+    for thread in readers:
+        thread.start()
+    try:
+        # Corpus sizes change the projection's width from one generation to the next
+        for size in [3, 40, 8, 60, 2, 30] * 3:
+            index.rebuild(documents(size))
+    finally:
+        stop.set()
+        for thread in readers:
+            thread.join()
+    assert errors == []
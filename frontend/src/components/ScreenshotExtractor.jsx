@@ -71,10 +71,7 @@ function ScreenshotExtractor({ onTasksExtracted, onClose }) {
     setError(null)
     
     try {
-      const response = await tasksAPI.extractFromScreenshot({
-        image,
-        context: context || null
-      })
+      const response = await tasksAPI.extractFromScreenshotUpload(image, context || null)
       
       setResult(response)
       setSelectedTasks(response.tasks.map((_, idx) => idx))
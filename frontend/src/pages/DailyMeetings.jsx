@@ -214,10 +214,7 @@ function DailyMeetings() {
     
     try {
       const dateStr = format(selectedDate, 'yyyy-MM-dd')
-      const response = await calendarAPI.extractFromScreenshot({
-        image: screenshotImage,
-        target_date: dateStr
-      })
+      const response = await calendarAPI.extractFromScreenshotUpload(screenshotImage, dateStr)
       setExtractedMeetings(response.meetings || [])
     } catch (err) {
       console.error('Error extracting meetings:', err)
@@ -230,16 +227,14 @@ function DailyMeetings() {
   async function handleAddExtractedMeetings() {
     try {
       const dateStr = format(selectedDate, 'yyyy-MM-dd')
-      for (const meeting of extractedMeetings) {
-        await calendarAPI.create({
-          title: meeting.title,
-          start_time: `${dateStr}T${meeting.start_time}:00`,
-          end_time: `${dateStr}T${meeting.end_time}:00`,
-          location: meeting.location || null,
-          attendees: meeting.attendees || null,
-          calendar_source: 'screenshot'
-        })
-      }
+      await calendarAPI.bulkUpsert(extractedMeetings.map(meeting => ({
+        title: meeting.title,
+        start_time: `${dateStr}T${meeting.start_time}:00`,
+        end_time: `${dateStr}T${meeting.end_time}:00`,
+        location: meeting.location || null,
+        attendees: meeting.attendees || null,
+        calendar_source: 'screenshot'
+      })))
       setShowScreenshotModal(false)
       setScreenshotImage(null)
       setExtractedMeetings([])
@@ -1,7 +1,7 @@
 import { useState, useEffect } from 'react'
 import { useParams, Link, useNavigate } from 'react-router-dom'
 import { ArrowRight, Calendar, Clock, Edit2, Trash2, CheckCircle2, Circle, Sparkles } from 'lucide-react'
-import { meetingsAPI, analyticsAPI, employeesAPI } from '../services/api'
+import { meetingsAPI, employeesAPI } from '../services/api'
 import { format, parseISO } from 'date-fns'
 import './MeetingDetail.css'
 
@@ -76,7 +76,7 @@ function MeetingDetail() {
     }
     
     try {
-      const analysis = await analyticsAPI.analyzeMeeting(meeting.id, meeting.notes)
+      const analysis = await meetingsAPI.analyze(meeting.id)
       
       alert(`תובנות AI:\n\n${analysis.insights}\n\nסנטימנט: ${analysis.sentiment}`)
       
@@ -280,7 +280,8 @@ function MyTasks() {
           description: task.description || '',
           task_type: 'from_meeting',
           priority: task.priority || 'medium',
-          due_date: task.due_date ? new Date(task.due_date).toISOString() : null
+          due_date: task.due_date ? new Date(task.due_date).toISOString() : null,
+          person_id: task.person_id || null
         }
         await tasksAPI.create(taskData)
       }
@@ -1,7 +1,7 @@
 import { useState, useEffect } from 'react'
 import { useNavigate, useSearchParams, Link } from 'react-router-dom'
 import { ArrowRight, Plus, X, Sparkles } from 'lucide-react'
-import { employeesAPI, meetingsAPI, analyticsAPI } from '../services/api'
+import { employeesAPI, meetingsAPI } from '../services/api'
 import './NewMeeting.css'
 
 const TOPIC_CATEGORIES = [
@@ -102,7 +102,7 @@ function NewMeeting() {
       })
       
       // Then analyze it
-      const analysis = await analyticsAPI.analyzeMeeting(meeting.id, formData.notes)
+      const analysis = await meetingsAPI.analyze(meeting.id)
       
       // Update form with AI suggestions
       setFormData({
@@ -58,6 +58,57 @@ async function fetchAPI(endpoint, options = {}) {
   }
 }
 
+// Upload an image (data URL or Blob) as a raw binary body - no base64 JSON overhead
+async function uploadImage(endpoint, image) {
+  const blob = typeof image === 'string' ? await (await fetch(image)).blob() : image
+  return fetchAPI(endpoint, {
+    method: 'POST',
+    headers: {
+      'Content-Type': blob.type || 'application/octet-stream',
+      'Accept': 'application/json'
+    },
+    body: blob
+  })
+}
+
+// POST and read a server-sent event stream. onEvent(event, data) is called for every
+// item event as it arrives; resolves with the final "result" event (rejects on "error").
+async function streamAPI(endpoint, body, onEvent) {
+  const response = await fetch(`${API_BASE}${endpoint}`, {
+    method: 'POST',
+    headers: {
+      'Content-Type': 'application/json',
+      'Accept': 'text/event-stream'
+    },
+    mode: 'cors',
+    body: body ? JSON.stringify(body) : undefined
+  })
+  
+  if (!response.ok) {
+    const error = await response.json().catch(() => ({}))
+    throw new Error(error.detail || `HTTP ${response.status}`)
+  }
+  
+  const reader = response.body.pipeThrough(new TextDecoderStream()).getReader()
+  let buffer = ''
+  while (true) {
+    const { value, done } = await reader.read()
+    if (done) break
+    buffer += value
+    let boundary
+    while ((boundary = buffer.indexOf('\n\n')) !== -1) {
+      const block = buffer.slice(0, boundary)
+      buffer = buffer.slice(boundary + 2)
+      const event = block.match(/^event: (.*)$/m)?.[1]
+      const data = JSON.parse(block.match(/^data: (.*)$/m)?.[1] ?? 'null')
+      if (event === 'result') return data
+      if (event === 'error') throw new Error(data?.detail || 'Stream error')
+      onEvent?.(event, data)
+    }
+  }
+  throw new Error('Stream ended without a result')
+}
+
 // Users API
 export const usersAPI = {
   login: (username, password) => fetchAPI('/users/login', {
@@ -151,6 +202,14 @@ export const meetingsAPI = {
   
   extractTasks: (meetingId) => fetchAPI(`/meetings/${meetingId}/extract-tasks`, {
     method: 'POST'
+  }),
+  
+  // Same as extractTasks, streamed: onEvent('task', task) for each task as it is extracted
+  extractTasksStream: (meetingId, onEvent) => streamAPI(`/meetings/${meetingId}/extract-tasks/stream`, null, onEvent),
+  
+  // Insights, topics, sentiment and suggested tasks in one AI call (saved on the meeting)
+  analyze: (meetingId) => fetchAPI(`/meetings/${meetingId}/analyze`, {
+    method: 'POST'
   })
 }
 
@@ -203,10 +262,14 @@ export const tasksAPI = {
     })
   },
   
-  createBulk: (tasks) => fetchAPI('/tasks/bulk', {
-    method: 'POST',
-    body: JSON.stringify(tasks)
-  }),
+  createBulk: (tasks) => {
+    const userId = getCurrentUserId()
+    const queryStr = userId ? `?user_id=${userId}` : ''
+    return fetchAPI(`/tasks/bulk${queryStr}`, {
+      method: 'POST',
+      body: JSON.stringify(tasks)
+    })
+  },
   
   update: (id, data) => fetchAPI(`/tasks/${id}`, {
     method: 'PUT',
@@ -221,11 +284,27 @@ export const tasksAPI = {
     method: 'DELETE'
   }),
   
-  // Extract tasks from screenshot using AI Vision
-  extractFromScreenshot: (data) => fetchAPI('/tasks/extract-from-screenshot', {
-    method: 'POST',
-    body: JSON.stringify(data)
-  })
+  // Extract tasks from screenshot using AI Vision.
+  // Each task's person_name comes back resolved to person_id (with person_confidence) when it matches one of the user's people
+  extractFromScreenshot: (data) => {
+    const query = new URLSearchParams(addUserIdToParams()).toString()
+    return fetchAPI(`/tasks/extract-from-screenshot${query ? `?${query}` : ''}`, {
+      method: 'POST',
+      body: JSON.stringify(data)
+    })
+  },
+  
+  // Same as extractFromScreenshot, streamed: onEvent('task', task) for each task as it is extracted
+  extractFromScreenshotStream: (data, onEvent) => {
+    const query = new URLSearchParams(addUserIdToParams()).toString()
+    return streamAPI(`/tasks/extract-from-screenshot/stream${query ? `?${query}` : ''}`, data, onEvent)
+  },
+  
+  // Same as extractFromScreenshot, but uploads the image as binary
+  extractFromScreenshotUpload: (image, context = null) => {
+    const query = new URLSearchParams(addUserIdToParams(context ? { context } : {})).toString()
+    return uploadImage(`/tasks/extract-from-screenshot/upload${query ? `?${query}` : ''}`, image)
+  }
 }
 
 // Analytics
@@ -250,7 +329,11 @@ export const analyticsAPI = {
   analyzeMeeting: (meetingId, notes) => fetchAPI('/analytics/analyze', {
     method: 'POST',
     body: JSON.stringify({ meeting_id: meetingId, notes })
-  })
+  }),
+  
+  // Same as analyzeMeeting, streamed: insights / topic / sentiment / action_item events
+  analyzeMeetingStream: (meetingId, notes, onEvent) =>
+    streamAPI('/analytics/analyze/stream', { meeting_id: meetingId, notes }, onEvent)
 }
 
 // Calendar Meetings
@@ -283,6 +366,16 @@ export const calendarAPI = {
     })
   },
   
+  // Create/update many meetings in one request (deduplicated on the server)
+  bulkUpsert: (meetings) => {
+    const userId = getCurrentUserId()
+    const queryStr = userId ? `?user_id=${userId}` : ''
+    return fetchAPI(`/calendar/bulk${queryStr}`, {
+      method: 'POST',
+      body: JSON.stringify({ meetings })
+    })
+  },
+  
   update: (id, data) => fetchAPI(`/calendar/${id}`, {
     method: 'PUT',
     body: JSON.stringify(data)
@@ -298,6 +391,13 @@ export const calendarAPI = {
     body: JSON.stringify(data)
   }),
   
+  // Same as extractFromScreenshot, streamed: onEvent('meeting', meeting) for each meeting as it is extracted
+  extractFromScreenshotStream: (data, onEvent) => streamAPI('/calendar/extract-from-screenshot/stream', data, onEvent),
+  
+  // Same as extractFromScreenshot, but uploads the image as binary
+  extractFromScreenshotUpload: (image, targetDate) =>
+    uploadImage(`/calendar/extract-from-screenshot/upload?target_date=${targetDate}`, image),
+  
   // Prep Notes
   addNote: (meetingId, data) => fetchAPI(`/calendar/${meetingId}/notes`, {
     method: 'POST',
@@ -315,9 +415,31 @@ export const calendarAPI = {
   
   toggleNote: (meetingId, noteId) => fetchAPI(`/calendar/${meetingId}/notes/${noteId}/toggle`, {
     method: 'POST'
+  }),
+  
+  // Apply a batch of reorder/complete changes in one request
+  // changes: [{ id, after_id?, before_id?, is_completed?, content? }]
+  batchUpdateNotes: (meetingId, changes) => fetchAPI(`/calendar/${meetingId}/notes/batch`, {
+    method: 'POST',
+    body: JSON.stringify({ changes })
   })
 }
 
+// Search
+export const searchAPI = {
+  // Local semantic search over meetings, quick notes and tasks
+  search: (q, params = {}) => {
+    const query = new URLSearchParams(addUserIdToParams({ q, ...params })).toString()
+    return fetchAPI(`/search?${query}`)
+  },
+
+  rebuild: () => {
+    const userId = getCurrentUserId()
+    const queryStr = userId ? `?user_id=${userId}` : ''
+    return fetchAPI(`/search/rebuild${queryStr}`, { method: 'POST' })
+  }
+}
+
 // Quick Notes
 export const quickNotesAPI = {
   getAll: (params = {}) => {